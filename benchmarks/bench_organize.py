@@ -0,0 +1,367 @@
+"""
+FileSort Pro organize/revert benchmark.
+
+Generates reproducible synthetic source trees (on tmpfs by default), then
+runs these phases one after another in a child process, measuring each:
+
+    plan      Organizer.plan_files()       scan and classify, nothing moved
+    execute   Organizer.execute_plan()     the moves of that plan
+    revert    Reverter.revert()            moving everything back
+    organize  Organizer.organize_files()   streaming scan + moves, as the GUI runs it
+    revert_organize                        reverting the streaming run
+
+For every phase it records wall time, files/sec, peak RSS, the engine's
+own per-phase timings (RunMetrics), counts of the os-level calls the
+engine makes, and the read/write syscalls and context switches reported
+by the kernel. The peak RSS is reset before each phase through
+/proc/self/clear_refs, so peak_rss_kb is that phase's own peak; where
+that is not possible (not Linux), only process_peak_rss_kb, the peak of
+the child so far, is reported. Results are written as JSON so runs can
+be compared over time:
+
+    python benchmarks/bench_organize.py --sizes 10000,100000 --output before.json
+    python benchmarks/bench_organize.py --sizes 10000,100000 --compare before.json
+"""
+
+import argparse
+import builtins
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("flat", "nested", "collisions", "extensionless", "mixed")
+PHASES = ("plan", "execute", "revert", "organize", "revert_organize")
+
+# Extensions drawn by the generator, roughly in the proportions of a downloads folder
+EXTENSIONS = [".pdf"] * 6 + [".jpg"] * 6 + [".png"] * 4 + [".docx"] * 3 + [".zip"] * 2 + [".mp4", ".mp3", ".exe",
+              ".py", ".txt", ".csv", ".tar.gz", ".JPG", ".xyz"]
+# os functions the engine calls; each call is counted per phase
+COUNTED_OS_CALLS = ("scandir", "stat", "lstat", "rename", "replace", "mkdir", "unlink", "link",
+                    "copy_file_range", "sendfile", "listdir", "fsync")
+
+
+# -----------------------------
+# TREE GENERATION
+# -----------------------------
+def generate_tree(root, scenario, files, seed, file_size=0):
+    """Create a reproducible source tree; returns (files, folders) created"""
+    rng = random.Random(f"{scenario}:{files}:{seed}")
+    os.makedirs(root)
+    payload = b"x" * file_size
+    folders = {root}
+    created = set()
+
+    if scenario == "nested":
+        # 8 levels with a fanout of 4; files spread over every level
+        dirs = [root]
+        frontier = [root]
+        for _ in range(8):
+            frontier = [os.path.join(d, f"d{i}") for d in frontier for i in range(4)][:max(files // 20, 4)]
+            dirs.extend(frontier)
+            if len(dirs) * 20 >= files:
+                break
+    elif scenario == "flat":
+        dirs = [root]
+    else:
+        # A few hundred folders, two levels deep
+        dirs = [root] + [os.path.join(root, f"g{i // 20}", f"s{i}") for i in range(max(1, min(files // 50, 400)))]
+
+    for index in range(files):
+        if scenario == "collisions":
+            # About 100 files share every name, so nearly every file collides with an earlier one
+            name = f"report{rng.randrange(max(50, files // 300))}{rng.choice(('.pdf', '.jpg', '.docx'))}"
+        elif scenario == "extensionless":
+            name = f"file{index}" if rng.random() < 0.5 else f"file{index}{rng.choice(EXTENSIONS)}"
+        elif scenario == "mixed":
+            stem = rng.choice(("IMG_", "scan ", "Invoice-", "setup", "notes.v2.", "photo (1) "))
+            name = f"{stem}{index}{rng.choice(EXTENSIONS)}"
+        else:
+            name = f"file{index}{rng.choice(EXTENSIONS)}"
+        path = os.path.join(rng.choice(dirs), name)
+        if path in created:
+            # Same name drawn twice for one folder: keep the collision for the destination only
+            path = os.path.join(os.path.dirname(path), f"{index}-{name}")
+        directory = os.path.dirname(path)
+        if directory not in folders:
+            os.makedirs(directory, exist_ok=True)
+            folders.add(directory)
+        with open(path, "xb") as f:
+            f.write(payload)
+        created.add(path)
+    return len(created), len(folders)
+
+
+def filesystem_type(path):
+    """Return the filesystem type a path lives on (Linux only), e.g. "tmpfs" """
+    try:
+        with open("/proc/mounts") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return None
+    best = ("", None)
+    path = os.path.realpath(path)
+    for mount_point, fs_type in mounts:
+        if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > len(best[0]):
+            best = (mount_point, fs_type)
+    return best[1]
+
+
+# -----------------------------
+# MEASUREMENT (CHILD PROCESS)
+# -----------------------------
+class CallCounter:
+    """Count calls to selected os functions and builtins.open across all threads"""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNTED_OS_CALLS + ("open",), 0)
+        self._lock = threading.Lock()
+
+    def install(self):
+        for name in COUNTED_OS_CALLS:
+            if hasattr(os, name):
+                setattr(os, name, self._wrap(name, getattr(os, name)))
+        builtins.open = self._wrap("open", builtins.open)
+
+    def _wrap(self, name, func):
+        counts, lock = self.counts, self._lock
+
+        def counted(*args, **kwargs):
+            with lock:
+                counts[name] += 1
+            return func(*args, **kwargs)
+        return counted
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+def reset_peak_rss():
+    """Reset the peak RSS of this process (Linux 4.0+); returns False where that is not possible"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def kernel_counters():
+    """Peak RSS and syscall/context-switch counters of this process, where the OS reports them"""
+    counters = {}
+    try:
+        import resource
+
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # ru_maxrss is in KiB on Linux and in bytes on macOS
+        counters["peak_rss_kb"] = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+        counters["ctx_switches"] = usage.ru_nvcsw + usage.ru_nivcsw
+    except ImportError:
+        pass
+    try:
+        # Unlike ru_maxrss, VmHWM starts over when reset_peak_rss() resets the peak
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    counters["peak_rss_kb"] = int(line.split()[1])
+                    break
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/proc/self/io") as f:
+            io = dict(line.split(": ") for line in f.read().splitlines())
+        counters["read_syscalls"] = int(io["syscr"])
+        counters["write_syscalls"] = int(io["syscw"])
+    except (OSError, KeyError, ValueError):
+        pass
+    return counters
+
+
+def run_child(spec):
+    """Run every phase against the tree in ``spec`` and return the measurements"""
+    # The engine keeps its data under ~; point it at the benchmark folder
+    os.environ["HOME"] = os.environ["USERPROFILE"] = spec["home"]
+    sys.path.insert(0, REPO_DIR)
+    from filesort_core import Organizer, Reverter
+
+    counter = CallCounter()
+    if spec["count_calls"]:
+        counter.install()
+    options = {
+        "recursive": True,
+        "skip_duplicates": spec["skip_duplicates"],
+        "skip_no_extension": True,
+        "workers": spec["workers"],
+        "incremental": False
+    }
+    state = {}
+
+    # Each step returns (files, the engine's per-phase timings)
+    def plan():
+        state["organizer"] = Organizer(spec["source"], spec["dest"], options)
+        state["plan"] = state["organizer"].plan_files()
+        state["plan_phases"] = dict(state["organizer"].metrics.phases)
+        return len(state["plan"].jobs), state["plan_phases"]
+
+    def execute():
+        results = state["organizer"].execute_plan(state["plan"])
+        state["journal"] = results["journal"]
+        # The organizer's metrics also hold the planning that came before
+        phases = {key: value - state["plan_phases"][key] for key, value in results["metrics"]["phases"].items()}
+        return results["processed"], phases
+
+    def revert():
+        results = Reverter(state["journal"], spec["workers"]).revert()
+        return results["reverted"], results["metrics"]["phases"]
+
+    def organize():
+        results = Organizer(spec["source"], spec["dest"], options).organize_files()
+        state["journal"] = results["journal"]
+        return results["processed"], results["metrics"]["phases"]
+
+    steps = {"plan": plan, "execute": execute, "revert": revert, "organize": organize, "revert_organize": revert}
+    phases = {}
+    for name in PHASES:
+        per_phase_peak = reset_peak_rss()
+        calls_before, kernel_before = counter.snapshot(), kernel_counters()
+        start = time.perf_counter()
+        files, engine_phases = steps[name]()
+        elapsed = time.perf_counter() - start
+        calls_after, kernel_after = counter.snapshot(), kernel_counters()
+
+        phase = {
+            "seconds": round(elapsed, 4),
+            "files": files,
+            "files_per_sec": round(files / elapsed, 1) if elapsed else None,
+            "peak_rss_kb" if per_phase_peak else "process_peak_rss_kb": kernel_after.get("peak_rss_kb"),
+            "engine_phases": {key: round(value, 4) for key, value in engine_phases.items() if round(value, 4) > 0}
+        }
+        for key in ("read_syscalls", "write_syscalls", "ctx_switches"):
+            if key in kernel_after:
+                phase[key] = kernel_after[key] - kernel_before[key]
+        if spec["count_calls"]:
+            phase["os_calls"] = {key: calls_after[key] - calls_before[key]
+                                 for key in calls_after if calls_after[key] != calls_before[key]}
+        phases[name] = phase
+    return phases
+
+
+# -----------------------------
+# DRIVER
+# -----------------------------
+def run_scenario(args, scenario, files):
+    workdir = tempfile.mkdtemp(prefix="filesort-bench-", dir=args.root)
+    try:
+        source = os.path.join(workdir, "src")
+        start = time.perf_counter()
+        created, folders = generate_tree(source, scenario, files, args.seed, args.file_size)
+        generate_seconds = time.perf_counter() - start
+        spec = {
+            "source": source,
+            "dest": os.path.join(workdir, "sorted"),
+            "home": os.path.join(workdir, "home"),
+            "workers": args.workers,
+            "skip_duplicates": args.skip_duplicates,
+            "count_calls": not args.no_call_counts
+        }
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", json.dumps(spec)],
+                               capture_output=True, text=True)
+        if child.returncode != 0:
+            raise RuntimeError(f"{scenario}/{files} failed:\n{child.stderr}")
+        return {
+            "scenario": scenario,
+            "files": created,
+            "folders": folders,
+            "generate_seconds": round(generate_seconds, 3),
+            "phases": json.loads(child.stdout)
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results, baseline_path):
+    """Print files/sec of this run against a previous result file"""
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["files"]): r for r in json.load(f)["results"]}
+    for result in results:
+        old = baseline.get((result["scenario"], result["files"]))
+        if old is None:
+            continue
+        for phase, numbers in result["phases"].items():
+            before = old["phases"].get(phase, {}).get("files_per_sec")
+            after = numbers.get("files_per_sec")
+            if before and after:
+                print(f"{result['scenario']:>14} {result['files']:>8} {phase:>16}: "
+                      f"{before:>10.0f} -> {after:>10.0f} files/s ({(after / before - 1) * 100:+.1f}%)", file=sys.stderr)
+
+
+def default_root():
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FileSort organize and revert on synthetic trees.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--sizes", default="10000", help="comma-separated file counts, e.g. 10000,100000,1000000")
+    parser.add_argument("--root", default=default_root(), help="where trees are generated (default: tmpfs if present)")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the generated names and layout")
+    parser.add_argument("--workers", type=int, default=4, help="parallel moves, as in the settings")
+    parser.add_argument("--file-size", type=int, default=0, help="bytes written to every file")
+    parser.add_argument("--skip-duplicates", action="store_true", help="enable duplicate detection")
+    parser.add_argument("--no-call-counts", action="store_true", help="do not wrap os calls to count them")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="print files/sec changes against an earlier result file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(json.loads(args.child))))
+        return 0
+
+    fs_type = filesystem_type(args.root)
+    if fs_type not in (None, "tmpfs"):
+        print(f"warning: {args.root} is {fs_type}, not tmpfs; results include disk latency", file=sys.stderr)
+
+    results = []
+    for files in (int(size) for size in args.sizes.split(",")):
+        for scenario in args.scenarios.split(","):
+            print(f"{scenario} with {files} files...", file=sys.stderr)
+            results.append(run_scenario(args, scenario.strip(), files))
+
+    report = {
+        "benchmark": "organize",
+        "format_version": 1,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "root": args.root,
+        "filesystem": fs_type,
+        "settings": {"seed": args.seed, "workers": args.workers, "file_size": args.file_size,
+                     "skip_duplicates": args.skip_duplicates, "call_counts": not args.no_call_counts},
+        "results": results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
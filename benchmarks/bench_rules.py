@@ -0,0 +1,236 @@
+"""
+FileSort Pro category rule benchmark.
+
+Classifies a reproducible set of synthetic files (names, folders, sizes
+and modification times, all in memory) three ways:
+
+    extensions  CategoryIndex.category_for()           the extension-only path
+    compiled    RuleSet.classify() on FileRecords, rules and extensions in one pass
+    naive       every rule checked in turn with fnmatch/re/relpath
+
+and reports nanoseconds per file for each rule set. The naive evaluator
+doubles as a reference: every file must get the same category from it
+as from the compiled rules, otherwise the benchmark fails.
+
+    python benchmarks/bench_rules.py --files 200000
+    python benchmarks/bench_rules.py --rule-sets typical,many --many 500 --output rules.json
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from filesort_core import CategoryIndex, FileRecord, RuleSet, parse_size  # noqa: E402
+
+SOURCE = os.path.join(os.sep, "bench", "src")
+RULE_SETS = ("none", "extension", "typical", "many")
+CATEGORIES = {
+    "Documents": [".pdf", ".docx", ".txt", ".odt", ".xlsx", ".csv"],
+    "Images": [".jpg", ".jpeg", ".png", ".gif", ".webp"],
+    "Videos": [".mp4", ".mov", ".mkv"],
+    "Audio": [".mp3", ".flac"],
+    "Archives": [".zip", ".rar", ".7z", ".gz"],
+    "Installers": [".exe", ".msi"],
+    "Code": [".py", ".js", ".json"],
+    "Misc": []
+}
+EXTENSIONS = [".pdf"] * 6 + [".jpg"] * 6 + [".png"] * 4 + [".docx"] * 3 + [".zip"] * 2 + [
+    ".mp4", ".mp3", ".exe", ".py", ".txt", ".csv", ".tar.gz", ".JPG", ".xyz", ".msi", ".7z", ".mkv"]
+FOLDERS = ["", "Work", "Work/Invoices", "Work/Invoices/2024", "Photos", "Photos/Trip", "Downloads", "Downloads/tmp"]
+PREFIXES = ["IMG_", "Screenshot ", "invoice-", "report_", "setup", "scan", "DSC", "backup-", "notes", ""]
+TYPICAL_RULES = [
+    {"category": "Archives/Large", "extensions": [".zip", ".7z", ".rar"], "min_size": "1 GB"},
+    {"category": "Installers/Old", "extensions": [".exe", ".msi"], "min_age_days": 90},
+    {"category": "Images/Screenshots", "glob": "Screenshot *"},
+    {"category": "Images/Camera", "regex": r"^(IMG|DSC)_?\d+", "extensions": [".jpg", ".png"]},
+    {"category": "Work/Invoices", "regex": r"(?i)^invoice-", "subpath": "Work"},
+    {"category": "Videos/Large", "extensions": [".mp4", ".mkv", ".mov"], "min_size": "500 MB"},
+    {"category": "Misc/Temporary", "glob": ["*.tmp", "*.part", "~*"]},
+    {"category": "Documents/Recent", "extensions": [".pdf", ".docx"], "max_age_days": 7, "max_size": "10 MB"},
+]
+# The typical rules that are limited to some extensions; files with any other extension need no rule checks
+EXTENSION_RULES = [rule for rule in TYPICAL_RULES if rule.get("extensions")]
+
+
+# -----------------------------
+# INPUT GENERATION
+# -----------------------------
+def generate_files(count, seed, now):
+    """Return reproducible FileRecords"""
+    rng = random.Random(f"rules:{count}:{seed}")
+    files = []
+    for i in range(count):
+        ext = rng.choice(EXTENSIONS) if rng.random() > 0.03 else ""
+        name = f"{rng.choice(PREFIXES)}{i}{ext}"
+        directory = os.path.join(SOURCE, *rng.choice(FOLDERS).split("/"))
+        size = int(10 ** rng.uniform(1, 9.8))  # 10 bytes to ~6 GB, log-uniform
+        mtime = now - rng.uniform(0, 2 * 365) * 86400
+        st = os.stat_result((0o100644, 0, 0, 1, 0, 0, size, mtime, mtime, mtime))
+        files.append(FileRecord(os.path.join(directory, name), name, directory, st))
+    return files
+
+
+def many_rules(count, seed):
+    """A large generated rule set mixing every kind of condition"""
+    rng = random.Random(f"many:{count}:{seed}")
+    extensions = sorted({ext.lower() for ext in EXTENSIONS if ext})
+    rules = []
+    for i in range(count):
+        rule = {"category": f"Rules/R{i}"}
+        kind = rng.randrange(5)
+        if kind == 0:
+            rule["extensions"] = rng.sample(extensions, rng.randint(1, 3))
+            rule["min_size"] = int(10 ** rng.uniform(3, 9.5))
+        elif kind == 1:
+            rule["extensions"] = rng.sample(extensions, rng.randint(1, 2))
+            rule["min_age_days"] = rng.randint(1, 700)
+        elif kind == 2:
+            rule["glob"] = f"{rng.choice(PREFIXES).strip() or 'x'}{rng.randint(0, 99)}*"
+        elif kind == 3:
+            rule["regex"] = rf"^{re.escape(rng.choice(PREFIXES))}{rng.randint(100, 999)}\d*\b"
+        else:
+            rule["subpath"] = rng.choice(FOLDERS[1:])
+            rule["max_size"] = int(10 ** rng.uniform(4, 8))
+        rules.append(rule)
+    return rules
+
+
+# -----------------------------
+# REFERENCE EVALUATOR
+# -----------------------------
+def naive_category(rules, now, record):
+    """Check every rule in turn, the way a straightforward implementation would"""
+    name = record.name
+    for rule in rules:
+        extensions = rule.get("extensions")
+        if extensions:
+            ext = os.path.splitext(name)[1].lower()
+            if ext not in [e.lower() if e.startswith(".") else "." + e.lower() for e in extensions]:
+                continue
+        if rule.get("min_size") is not None and record.size < parse_size(rule["min_size"]):
+            continue
+        if rule.get("max_size") is not None and record.size >= parse_size(rule["max_size"]):
+            continue
+        if rule.get("min_age_days") is not None and record.mtime >= now - rule["min_age_days"] * 86400:
+            continue
+        if rule.get("max_age_days") is not None and record.mtime < now - rule["max_age_days"] * 86400:
+            continue
+        if rule.get("glob"):
+            globs = [rule["glob"]] if isinstance(rule["glob"], str) else rule["glob"]
+            if not any(fnmatch.fnmatchcase(name.lower(), glob.lower()) for glob in globs):
+                continue
+        if rule.get("regex") and not re.search(rule["regex"], name):
+            continue
+        if rule.get("subpath"):
+            relative = os.path.relpath(record.directory, SOURCE).replace(os.sep, "/")
+            subpath = rule["subpath"].strip("/")
+            if relative != subpath and not relative.startswith(subpath + "/"):
+                continue
+        return os.path.normpath(rule["category"])
+    return None
+
+
+# -----------------------------
+# MEASUREMENT
+# -----------------------------
+def best_time(func, repeat):
+    """Fastest of ``repeat`` runs of func(), in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_rule_set(name, rules, files, now, repeat):
+    index = CategoryIndex(CATEGORIES)
+    compiled = RuleSet(rules, SOURCE, now, category_index=index)
+    category_for = index.category_for
+    rule_category_for = compiled.category_for
+    classify = compiled.classify
+
+    def extensions_only():
+        return [category_for(record.name) for record in files]
+
+    def with_rules():
+        if not compiled:
+            return extensions_only()  # The organizer skips an empty rule set the same way
+        return [classify(record) for record in files]
+
+    def naive():
+        return [naive_category(rules, now, record) or category_for(record.name) for record in files]
+
+    mismatches = sum(a != b for a, b in zip(with_rules(), naive()))
+    matched = sum(rule_category_for(record) is not None for record in files)
+    timings = {
+        "extensions": best_time(extensions_only, repeat),
+        "compiled": best_time(with_rules, repeat),
+        "naive": best_time(naive, 1)  # Slow enough that one run is representative
+    }
+    per_file = {key: round(seconds / len(files) * 1e9, 1) for key, seconds in timings.items()}
+    return {
+        "rule_set": name,
+        "rules": len(rules),
+        "files": len(files),
+        "matched_by_rules": matched,
+        "ns_per_file": per_file,
+        "compiled_vs_extensions": round(per_file["compiled"] / per_file["extensions"], 2),
+        "naive_vs_compiled": round(per_file["naive"] / per_file["compiled"], 1),
+        "mismatches": mismatches
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FileSort category rules against the extension lookup.")
+    parser.add_argument("--files", type=int, default=200000, help="number of synthetic files to classify")
+    parser.add_argument("--rule-sets", default=",".join(RULE_SETS), help=f"comma-separated subset of {RULE_SETS}")
+    parser.add_argument("--many", type=int, default=200, help="number of rules in the \"many\" rule set")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the generated files and rules")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per variant; the fastest counts")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    now = time.time()
+    files = generate_files(args.files, args.seed, now)
+    rule_sets = {"none": [], "extension": EXTENSION_RULES, "typical": TYPICAL_RULES, "many": many_rules(args.many, args.seed)}
+    results = []
+    for name in args.rule_sets.split(","):
+        name = name.strip()
+        print(f"{name} rules on {args.files} files...", file=sys.stderr)
+        results.append(run_rule_set(name, rule_sets[name], files, now, args.repeat))
+
+    report = {
+        "benchmark": "rules",
+        "format_version": 1,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"files": args.files, "seed": args.seed, "many": args.many, "repeat": args.repeat},
+        "results": results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if any(result["mismatches"] for result in results):
+        print("error: compiled rules and the reference evaluator disagree", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -26,7 +26,6 @@ def build_executable():
         "--hidden-import=PyQt5.QtCore",
         "--hidden-import=PyQt5.QtGui", 
         "--hidden-import=PyQt5.QtWidgets",
-        "--hidden-import=winreg",
         "--hidden-import=json",
         "--hidden-import=logging",
         "--hidden-import=threading",
@@ -1,233 +1,162 @@
 import os
-import shutil
 import sys
-import json
-import copy
-import winreg
 import logging
-import threading
-import time
 from datetime import datetime
-from pathlib import Path
 from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5.QtCore import QThread, pyqtSignal, QTimer
 from PyQt5.QtWidgets import QProgressBar, QMessageBox, QFileDialog, QVBoxLayout, QHBoxLayout, QGroupBox, QTabWidget, QListWidget, QListWidgetItem, QPushButton, QLabel, QLineEdit, QCheckBox, QSpinBox, QComboBox, QTextEdit, QSplitter, QWidget
 
+from filesort_core import (APP_DATA_DIR, BatchJob, BatchRunner, CategoryIndex, LogTail, MoveJournal, Organizer,
+                           Reverter, SourceWatcher, export_metrics, get_config_manager, latest_checkpoint,
+                           open_history_store, summarize_results)
+from filesort_logging import LOG_FORMATS, start_logging
 
-# -----------------------------
-# CONFIGURATION MANAGEMENT
-# -----------------------------
-class ConfigManager:
-    def __init__(self):
-        self.config_file = os.path.join(os.path.expanduser("~"), "AppData", "Local", "FileSort", "config.json")
-        self.ensure_config_dir()
-        self.default_config = {
-            "categories": {
-                "Documents": [".pdf", ".docx", ".txt", ".rtf", ".odt", ".pptx", ".xlsx", ".csv", ".doc", ".ppt"],
-                "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp", ".svg", ".ico"],
-                "Videos": [".mp4", ".mov", ".avi", ".mkv", ".flv", ".wmv", ".m4v", ".webm"],
-                "Audio": [".mp3", ".wav", ".flac", ".aac", ".ogg", ".m4a", ".wma"],
-                "Archives": [".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz"],
-                "Installers": [".exe", ".msi", ".bat", ".cmd", ".appx", ".msix"],
-                "Code": [".py", ".cpp", ".c", ".h", ".js", ".html", ".css", ".java", ".json", ".xml", ".ts", ".php", ".rb", ".go"],
-                "Spreadsheets": [".xls", ".xlsx", ".ods", ".csv"],
-                "Misc": []
-            },
-            "settings": {
-                "default_source": os.path.join(os.path.expanduser("~"), "Downloads"),
-                "default_dest": os.path.join(os.path.expanduser("~"), "Downloads"),
-                "create_date_folders": False,
-                "skip_duplicates": False,
-                "log_level": "INFO"
-            },
-            "recent_operations": []
-        }
-        self.config = self.load_config()
-    
-    def ensure_config_dir(self):
-        os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-    
-    def load_config(self):
-        try:
-            # Always start with a fresh copy of default config
-            default_copy = copy.deepcopy(self.default_config)
-            
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                # Merge with defaults for any missing keys
-                return self.merge_configs(default_copy, config)
-            return default_copy
-        except Exception as e:
-            logging.error(f"Failed to load config: {e}")
-            return copy.deepcopy(self.default_config)
-    
-    def save_config(self):
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
-        except Exception as e:
-            logging.error(f"Failed to save config: {e}")
-    
-    def merge_configs(self, default, user):
-        """Recursively merge user config with defaults"""
-        result = copy.deepcopy(default)
-        for key, value in user.items():
-            if key in result:
-                if isinstance(value, dict) and isinstance(result[key], dict):
-                    result[key] = self.merge_configs(result[key], value)
-                else:
-                    result[key] = value
-            else:
-                result[key] = value
-        return result
 
 # Global config manager
-config_manager = ConfigManager()
+config_manager = get_config_manager()
 
 
 # -----------------------------
 # ENHANCED FILE ORGANIZATION LOGIC
 # -----------------------------
 class FileOrganizer(QThread):
+    """Qt adapter running the core Organizer on a worker thread"""
+    
     progress_updated = pyqtSignal(int, int)  # current, total
-    file_processed = pyqtSignal(str, str)  # filename, status
+    files_processed = pyqtSignal(list)  # [(filename, status), ...], batched at UI_REFRESH_HZ
+    plan_ready = pyqtSignal(object)  # MovePlan waiting for confirmation (preview mode)
     operation_completed = pyqtSignal(dict)  # results summary
     
-    def __init__(self, source_folder, destination_folder, options):
+    def __init__(self, source_folder, destination_folder, options, category_index=None, preview=False, resume=None):
         super().__init__()
-        self.source_folder = source_folder
-        self.destination_folder = destination_folder
-        self.options = options
-        self.should_stop = False
+        if resume is not None:
+            # Continue the run of this checkpoint, with its own folders and options
+            self.organizer = Organizer.resume(resume, category_index, self.deliver_batch)
+        else:
+            self.organizer = Organizer(source_folder, destination_folder, options, category_index,
+                                       self.deliver_batch)
+        self.preview = preview
+        self.plan = None
         
     def stop(self):
-        self.should_stop = True
+        self.organizer.stop()
+    
+    def execute(self, plan):
+        """Run the confirmed plan on this thread's organizer"""
+        self.plan = plan
+        self.start()
         
     def run(self):
         try:
-            results = self.organize_files()
+            if self.plan is not None:
+                results = self.organizer.execute_plan(self.plan)
+            elif self.preview:
+                self.plan_ready.emit(self.organizer.plan_files())
+                return
+            else:
+                results = self.organizer.organize_files()
             self.operation_completed.emit(results)
         except Exception as e:
             logging.error(f"Organization failed: {e}")
             self.operation_completed.emit({"error": str(e)})
     
-    def organize_files(self):
-        results = {
-            "total_files": 0,
-            "processed": 0,
-            "skipped": 0,
-            "errors": 0,
-            "categories_created": set(),
-            "errors_list": [],
-            "moved_files": []  # Track movements for revert
-        }
+    def deliver_batch(self, statuses, progress):
+        """Emit one batch of coalesced updates to the GUI"""
+        if statuses:
+            self.files_processed.emit(statuses)
+        if progress is not None:
+            self.progress_updated.emit(*progress)
+
+
+class RevertWorker(QThread):
+    """Qt adapter running the core Reverter on a worker thread"""
+    
+    progress_updated = pyqtSignal(int, int)  # current, total
+    files_processed = pyqtSignal(list)  # [(filename, status), ...], batched at UI_REFRESH_HZ
+    operation_completed = pyqtSignal(dict)  # results summary
+    
+    def __init__(self, journal_path, workers=1):
+        super().__init__()
+        self.reverter = Reverter(journal_path, workers, self.deliver_batch)
         
-        # Collect all files first for progress tracking
-        all_files = []
-        for root, dirs, files in os.walk(self.source_folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                all_files.append(file_path)
-            if not self.options.get("recursive", True):
-                break
-        
-        results["total_files"] = len(all_files)
-        
-        for i, file_path in enumerate(all_files):
-            if self.should_stop:
-                break
-                
-            try:
-                filename = os.path.basename(file_path)
-                _, ext = os.path.splitext(filename)
-                
-                # Skip files without extensions if configured
-                if not ext and self.options.get("skip_no_extension", True):
-                    results["skipped"] += 1
-                    logging.info(f"Skipped file (no extension): {file_path}")
-                    self.file_processed.emit(filename, "Skipped (no extension)")
-                    continue
-                
-                # Determine category
-                category = self.get_file_category(ext)
-                
-                # Create destination path
-                dest_path = self.create_destination_path(category, filename)
-                
-                # Handle duplicates
-                if os.path.exists(dest_path):
-                    if self.options.get("skip_duplicates", True):
-                        # Move to duplicates folder instead of skipping
-                        duplicates_dir = os.path.join(self.destination_folder, "duplicates")
-                        dest_path = os.path.join(duplicates_dir, filename)
-                        
-                        # If duplicate also exists in duplicates folder, make it unique
-                        if os.path.exists(dest_path):
-                            dest_path = self.get_unique_filename(dest_path)
-                        
-                        category = "duplicates"
-                    else:
-                        dest_path = self.get_unique_filename(dest_path)
-                
-                # Move file
-                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                shutil.move(file_path, dest_path)
-                
-                # Track the movement for revert
-                results["moved_files"].append({
-                    "source": file_path,
-                    "destination": dest_path,
-                    "filename": filename
-                })
-                
-                results["processed"] += 1
-                results["categories_created"].add(category)
-                
-                # Enhanced logging
-                logging.info(f"Moved file: {file_path} -> {dest_path}")
-                self.file_processed.emit(filename, f"Moved to {category} folder")
-                
-            except Exception as e:
-                results["errors"] += 1
-                error_msg = f"Failed to move {filename}: {str(e)}"
-                results["errors_list"].append(error_msg)
-                logging.error(error_msg)
-                self.file_processed.emit(filename, f"Error: {str(e)}")
-            
-            # Update progress
-            self.progress_updated.emit(i + 1, results["total_files"])
-        
-        return results
-    
-    def get_file_category(self, ext):
-        """Determine file category based on extension"""
-        categories = config_manager.config["categories"]
-        ext_lower = ext.lower()
-        
-        for category, extensions in categories.items():
-            if ext_lower in extensions:
-                return category
-        return "Misc"
-    
-    def create_destination_path(self, category, filename):
-        """Create destination path with optional date folders"""
-        base_path = os.path.join(self.destination_folder, category)
-        
-        if self.options.get("create_date_folders", False):
-            today = datetime.now().strftime("%Y-%m-%d")
-            base_path = os.path.join(base_path, today)
-        
-        return os.path.join(base_path, filename)
-    
-    def get_unique_filename(self, filepath):
-        """Generate unique filename if file exists"""
-        base, ext = os.path.splitext(filepath)
-        counter = 1
-        while os.path.exists(filepath):
-            filepath = f"{base}_{counter}{ext}"
-            counter += 1
-        return filepath
+    def stop(self):
+        self.reverter.stop()
+        
+    def run(self):
+        try:
+            results = self.reverter.revert()
+            self.operation_completed.emit(results)
+        except Exception as e:
+            logging.error(f"Revert failed: {e}")
+            self.operation_completed.emit({"error": str(e)})
+    
+    def deliver_batch(self, statuses, progress):
+        """Emit one batch of coalesced updates to the GUI"""
+        if statuses:
+            self.files_processed.emit(statuses)
+        if progress is not None:
+            self.progress_updated.emit(*progress)
+
+
+class WatchWorker(QThread):
+    """Qt adapter running the core SourceWatcher on a worker thread"""
+    
+    files_processed = pyqtSignal(list)  # [(filename, status), ...], batched at UI_REFRESH_HZ
+    batch_completed = pyqtSignal(dict)  # results of one sorted batch
+    operation_completed = pyqtSignal(dict)  # combined results once watching stops
+    
+    def __init__(self, source_folder, destination_folder, options, category_index=None, settle_seconds=2.0):
+        super().__init__()
+        self.watcher = SourceWatcher(source_folder, destination_folder, options, category_index,
+                                     self.deliver_batch, self.batch_completed.emit, settle_seconds)
+        
+    def stop(self):
+        self.watcher.stop()
+        
+    def run(self):
+        try:
+            results = self.watcher.run()
+            self.operation_completed.emit(results)
+        except Exception as e:
+            logging.error(f"Watching failed: {e}")
+            self.operation_completed.emit({"error": str(e)})
+    
+    def deliver_batch(self, statuses, progress):
+        """Emit file statuses; a watch session has no overall progress to show"""
+        if statuses:
+            self.files_processed.emit(statuses)
+
+
+class BatchWorker(QThread):
+    """Qt adapter running the core BatchRunner on a worker thread"""
+    
+    job_progress = pyqtSignal(int, int, int)  # job index, current, total
+    job_finished = pyqtSignal(dict)  # BatchJob.summary() of a finished, failed or skipped job
+    operation_completed = pyqtSignal(dict)  # combined results of the batch
+    
+    def __init__(self, jobs, options, category_index=None, io_slots=4, max_jobs=4):
+        super().__init__()
+        self.runner = BatchRunner(jobs, options, category_index, io_slots, max_jobs, self.deliver_batch,
+                                  self.deliver_job)
+        
+    def stop(self):
+        self.runner.stop()
+        
+    def run(self):
+        try:
+            results = self.runner.run()
+            self.operation_completed.emit(results)
+        except Exception as e:
+            logging.error(f"Batch failed: {e}")
+            self.operation_completed.emit({"error": str(e)})
+    
+    def deliver_batch(self, job, statuses, progress):
+        """Emit a job's progress; the Batch tab shows one row per job, not file statuses"""
+        if progress is not None:
+            self.job_progress.emit(job.index, *progress)
+    
+    def deliver_job(self, job):
+        self.job_finished.emit(job.summary())
 
 
 # -----------------------------
@@ -259,43 +188,45 @@ This method is safer and more reliable than registry modifications.
 # ENHANCED MAIN APPLICATION WINDOW
 # -----------------------------
 class FileSortApp(QtWidgets.QMainWindow):
+    BATCH_COLUMNS = ["Source", "Destination", "Status", "Progress", "Moved", "Errors"]
+    HISTORY_PAGE_SIZE = 50
+    LOG_VIEW_MAX_LINES = 5000
+    LOG_FOLLOW_INTERVAL_MS = 1000
+    PREVIEW_DETAIL_LIMIT = 500
+    
     def __init__(self):
         super().__init__()
+        self.watch_action = None
         self.setup_logging()
         self.setup_ui()
         self.setup_tray()
         self.load_settings()
         self.organizer_thread = None
-        self.last_operation_moves = []  # Store last operation's file movements
+        self.revert_thread = None
+        self.watch_thread = None
+        self.batch_thread = None
+        self.category_index = CategoryIndex(config_manager.config["categories"])
+        
+        # The journal of the last run survives restarts, so it can still be reverted
+        last_run = config_manager.config["last_run"]
+        self.last_journal = last_run.get("journal")
+        if self.last_journal and not last_run.get("reverted") and os.path.exists(self.last_journal):
+            self.revert_btn.setEnabled(True)
+        # So is the checkpoint of a run that was stopped or crashed
+        self.resume_btn.setEnabled(latest_checkpoint() is not None)
         
     def setup_logging(self):
         """Setup logging for the application"""
-        log_dir = os.path.join(os.path.expanduser("~"), "AppData", "Local", "FileSort", "logs")
+        log_dir = os.path.join(APP_DATA_DIR, "logs")
         os.makedirs(log_dir, exist_ok=True)
         
         log_file = os.path.join(log_dir, f"filesort_{datetime.now().strftime('%Y%m%d')}.log")
+        # The Logs tab follows the file this session writes to
+        self.log_tail = LogTail(log_file)
         
-        # Get root logger and clear any existing handlers
-        root_logger = logging.getLogger()
-        root_logger.handlers.clear()
-        
-        # Set logging level
-        root_logger.setLevel(getattr(logging, config_manager.config["settings"]["log_level"]))
-        
-        # Create formatter
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        
-        # Add file handler
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(logging.INFO)
-        file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
-        
-        # Add console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(formatter)
-        root_logger.addHandler(console_handler)
+        # Records are queued and written by a listener thread, off the organizer's path
+        settings = config_manager.config["settings"]
+        self.log_listener = start_logging(log_file, settings["log_level"], settings.get("log_format", "text"))
         
         # Log application startup
         logging.info("=" * 50)
@@ -322,8 +253,10 @@ class FileSortApp(QtWidgets.QMainWindow):
         
         # Create tabs
         self.create_organize_tab()
+        self.create_batch_tab()
         self.create_categories_tab()
         self.create_settings_tab()
+        self.create_history_tab()
         self.create_logs_tab()
         
         # Status bar
@@ -378,14 +311,28 @@ class FileSortApp(QtWidgets.QMainWindow):
         self.date_folders_chk = QCheckBox("Create date-based subfolders")
         self.date_folders_chk.setChecked(config_manager.config["settings"].get("create_date_folders", False))
         
+        date_source_layout = QHBoxLayout()
+        date_source_layout.addWidget(self.date_folders_chk)
+        self.date_source_combo = QComboBox()
+        for label, source in (("by the day they are sorted", "run"), ("by their modified date", "mtime")):
+            self.date_source_combo.addItem(label, source)
+        self.date_source_combo.setCurrentIndex(max(0, self.date_source_combo.findData(
+            config_manager.config["settings"].get("date_folder_source", "run"))))
+        self.date_source_combo.setEnabled(self.date_folders_chk.isChecked())
+        self.date_folders_chk.toggled.connect(self.date_source_combo.setEnabled)
+        date_source_layout.addWidget(self.date_source_combo)
+        date_source_layout.addStretch()
+        
         self.skip_duplicates_chk = QCheckBox("Move duplicate files to duplicates folder")
         self.skip_duplicates_chk.setChecked(config_manager.config["settings"].get("skip_duplicates", False))
+        self.skip_duplicates_chk.setToolTip("Files whose content matches a file already in the destination "
+                                            "are moved to the duplicates folder")
         
         self.preview_chk = QCheckBox("Preview before organizing")
         self.preview_chk.setChecked(True)
         
         options_layout.addWidget(self.recursive_chk)
-        options_layout.addWidget(self.date_folders_chk)
+        options_layout.addLayout(date_source_layout)
         options_layout.addWidget(self.skip_duplicates_chk)
         options_layout.addWidget(self.preview_chk)
         
@@ -400,13 +347,28 @@ class FileSortApp(QtWidgets.QMainWindow):
         self.stop_btn.setEnabled(False)
         self.stop_btn.setStyleSheet("QPushButton { background-color: #f44336; color: white; font-weight: bold; padding: 10px; }")
         
+        self.watch_btn = QPushButton("Watch Folder")
+        self.watch_btn.setCheckable(True)
+        self.watch_btn.toggled.connect(self.toggle_watch)
+        self.watch_btn.setToolTip("Keep running and sort new files as they arrive in the source folder")
+        self.watch_btn.setStyleSheet("QPushButton { background-color: #2196F3; color: white; font-weight: bold; padding: 10px; } "
+                                     "QPushButton:checked { background-color: #0D47A1; }")
+        
         self.revert_btn = QPushButton("Revert Last Organization")
         self.revert_btn.clicked.connect(self.revert_last_operation)
         self.revert_btn.setEnabled(False)
         self.revert_btn.setStyleSheet("QPushButton { background-color: #FF9800; color: white; font-weight: bold; padding: 10px; }")
         
+        self.resume_btn = QPushButton("Resume Last Run")
+        self.resume_btn.clicked.connect(self.resume_last_run)
+        self.resume_btn.setEnabled(False)
+        self.resume_btn.setToolTip("Continue a stopped or interrupted run without scanning its finished folders again")
+        self.resume_btn.setStyleSheet("QPushButton { background-color: #607D8B; color: white; font-weight: bold; padding: 10px; }")
+        
         button_layout.addWidget(self.run_btn)
         button_layout.addWidget(self.stop_btn)
+        button_layout.addWidget(self.watch_btn)
+        button_layout.addWidget(self.resume_btn)
         button_layout.addWidget(self.revert_btn)
         button_layout.addStretch()
         
@@ -428,6 +390,203 @@ class FileSortApp(QtWidgets.QMainWindow):
         
         self.tab_widget.addTab(tab, "Organize Files")
     
+    def create_batch_tab(self):
+        """Create the tab running several source -> destination jobs at once"""
+        tab = QWidget()
+        layout = QVBoxLayout(tab)
+        
+        self.batch_table = QtWidgets.QTableWidget(0, len(self.BATCH_COLUMNS))
+        self.batch_table.setHorizontalHeaderLabels(self.BATCH_COLUMNS)
+        self.batch_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.batch_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.batch_table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.batch_table.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.Stretch)
+        for source, dest in config_manager.config["settings"].get("batch_jobs", []):
+            self.add_batch_row(source, dest)
+        layout.addWidget(self.batch_table)
+        
+        # Global limits shared by all jobs of the batch
+        limits_layout = QHBoxLayout()
+        limits_layout.addWidget(QLabel("File moves at once:"))
+        self.batch_io_spin = QSpinBox()
+        self.batch_io_spin.setRange(1, 64)
+        self.batch_io_spin.setValue(config_manager.config["settings"].get("batch_io_slots", 4))
+        self.batch_io_spin.setToolTip("Moves running at the same time across all jobs; free slots are shared "
+                                      "fairly, so a large job cannot hold up the others")
+        limits_layout.addWidget(self.batch_io_spin)
+        limits_layout.addWidget(QLabel("Jobs at once:"))
+        self.batch_jobs_spin = QSpinBox()
+        self.batch_jobs_spin.setRange(1, 16)
+        self.batch_jobs_spin.setValue(config_manager.config["settings"].get("batch_max_jobs", 4))
+        self.batch_jobs_spin.setToolTip("Jobs scanning their folders at the same time. Jobs that share a "
+                                        "folder always run one after another.")
+        limits_layout.addWidget(self.batch_jobs_spin)
+        limits_layout.addStretch()
+        layout.addLayout(limits_layout)
+        
+        button_layout = QHBoxLayout()
+        add_job_btn = QPushButton("Add Job")
+        add_job_btn.clicked.connect(self.add_batch_job)
+        self.remove_job_btn = QPushButton("Remove Job")
+        self.remove_job_btn.clicked.connect(self.remove_batch_job)
+        self.batch_run_btn = QPushButton("Run Batch")
+        self.batch_run_btn.clicked.connect(self.run_batch)
+        self.batch_run_btn.setStyleSheet("QPushButton { background-color: #4CAF50; color: white; font-weight: bold; padding: 10px; }")
+        self.batch_stop_btn = QPushButton("Stop")
+        self.batch_stop_btn.clicked.connect(self.stop_batch)
+        self.batch_stop_btn.setEnabled(False)
+        self.batch_stop_btn.setStyleSheet("QPushButton { background-color: #f44336; color: white; font-weight: bold; padding: 10px; }")
+        
+        button_layout.addWidget(add_job_btn)
+        button_layout.addWidget(self.remove_job_btn)
+        button_layout.addStretch()
+        button_layout.addWidget(self.batch_run_btn)
+        button_layout.addWidget(self.batch_stop_btn)
+        layout.addLayout(button_layout)
+        
+        self.tab_widget.addTab(tab, "Batch")
+    
+    def add_batch_row(self, source, dest):
+        """Append a queued job to the batch table"""
+        row = self.batch_table.rowCount()
+        self.batch_table.insertRow(row)
+        for column, text in enumerate((source, dest, "Queued", None, "", "")):
+            if text is not None:
+                self.batch_table.setItem(row, column, QtWidgets.QTableWidgetItem(text))
+        progress = QProgressBar()
+        progress.setValue(0)
+        self.batch_table.setCellWidget(row, 3, progress)
+    
+    def batch_jobs(self):
+        """The (source, destination) pairs listed in the batch table"""
+        return [(self.batch_table.item(row, 0).text(), self.batch_table.item(row, 1).text())
+                for row in range(self.batch_table.rowCount())]
+    
+    def save_batch_jobs(self):
+        config_manager.config["settings"]["batch_jobs"] = [list(job) for job in self.batch_jobs()]
+        config_manager.mark_dirty()
+    
+    def add_batch_job(self):
+        """Pick a source and a destination folder and queue them as a job"""
+        source = QFileDialog.getExistingDirectory(self, "Select source folder")
+        if not source:
+            return
+        dest = QFileDialog.getExistingDirectory(self, "Select destination folder", source)
+        if not dest:
+            return
+        self.add_batch_row(source, dest)
+        self.save_batch_jobs()
+    
+    def remove_batch_job(self):
+        rows = sorted({index.row() for index in self.batch_table.selectedIndexes()}, reverse=True)
+        for row in rows:
+            self.batch_table.removeRow(row)
+        self.save_batch_jobs()
+    
+    def run_batch(self):
+        """Run every job in the batch table concurrently"""
+        busy = [thread for thread in (self.organizer_thread, self.revert_thread, self.watch_thread, self.batch_thread)
+                if thread and thread.isRunning()]
+        if busy:
+            QMessageBox.information(self, "Batch", "Another operation is running. Start the batch once it has finished.")
+            return
+        jobs = self.batch_jobs()
+        if not jobs:
+            QMessageBox.warning(self, "Batch", "Add at least one job to the batch.")
+            return
+        settings = config_manager.config["settings"]
+        settings["batch_io_slots"] = self.batch_io_spin.value()
+        settings["batch_max_jobs"] = self.batch_jobs_spin.value()
+        config_manager.mark_dirty()
+        
+        for row in range(self.batch_table.rowCount()):
+            self.batch_table.item(row, 2).setText("Queued")
+            self.batch_table.cellWidget(row, 3).setValue(0)
+            for column in (4, 5):
+                self.batch_table.setItem(row, column, QtWidgets.QTableWidgetItem(""))
+        
+        # Options come from the Organize tab, except that a batch never asks for a preview
+        self.batch_thread = BatchWorker([BatchJob(source, dest) for source, dest in jobs], self.organize_options(),
+                                        self.category_index, self.batch_io_spin.value(), self.batch_jobs_spin.value())
+        self.batch_thread.job_progress.connect(self.update_batch_progress)
+        self.batch_thread.job_finished.connect(self.batch_job_finished)
+        self.batch_thread.operation_completed.connect(self.batch_completed)
+        self.batch_thread.start()
+        
+        self.batch_run_btn.setEnabled(False)
+        self.remove_job_btn.setEnabled(False)
+        self.batch_stop_btn.setEnabled(True)
+        self.run_btn.setEnabled(False)
+        self.revert_btn.setEnabled(False)
+        self.status_bar.showMessage(f"Running {len(jobs)} jobs...")
+    
+    def stop_batch(self):
+        if self.batch_thread and self.batch_thread.isRunning():
+            # Running jobs finish their current moves and report as stopped
+            self.batch_thread.stop()
+            self.status_bar.showMessage("Stopping batch...")
+    
+    def update_batch_progress(self, index, current, total):
+        if self.batch_table.item(index, 2).text() == "Queued":
+            self.batch_table.item(index, 2).setText("Running")
+        progress = self.batch_table.cellWidget(index, 3)
+        progress.setMaximum(max(total, 1))
+        progress.setValue(current)
+    
+    def batch_job_finished(self, summary):
+        """Show the outcome of one job in its row"""
+        row = summary["index"]
+        self.batch_table.item(row, 2).setText(summary["status"].capitalize())
+        if summary["error"]:
+            self.batch_table.item(row, 2).setToolTip(summary["error"])
+        if "processed" in summary:
+            progress = self.batch_table.cellWidget(row, 3)
+            if summary["status"] == "done":
+                progress.setValue(progress.maximum())
+            self.batch_table.setItem(row, 4, QtWidgets.QTableWidgetItem(str(summary["processed"])))
+            self.batch_table.setItem(row, 5, QtWidgets.QTableWidgetItem(str(summary["errors"])))
+    
+    def batch_completed(self, results):
+        """Handle the end of a batch; its moves share one journal and revert together"""
+        self.batch_run_btn.setEnabled(True)
+        self.remove_job_btn.setEnabled(True)
+        self.batch_stop_btn.setEnabled(False)
+        self.run_btn.setEnabled(True)
+        
+        if "error" in results:
+            QMessageBox.critical(self, "Error", f"Batch failed: {results['error']}")
+            self.status_bar.showMessage("Batch failed")
+        else:
+            jobs = results["jobs"]
+            done = sum(job["status"] == "done" for job in jobs)
+            summary = f"Batch {'stopped' if results['stopped'] else 'completed'}!\n\n"
+            summary += f"Jobs completed: {done} of {len(jobs)}\n"
+            summary += f"Total files: {results['total_files']}\n"
+            summary += f"Processed: {results['processed']}\n"
+            summary += f"Skipped: {results['skipped']}\n"
+            summary += f"Errors: {results['errors']}\n"
+            summary += self.timing_summary(results)
+            if results["errors_list"]:
+                summary += f"\nErrors:\n" + "\n".join(results["errors_list"][:5])
+                if len(results["errors_list"]) > 5:
+                    summary += f"\n... and {len(results['errors_list']) - 5} more errors"
+            QMessageBox.information(self, "Batch Complete", summary)
+            self.status_bar.showMessage(f"Batch finished: {results['processed']} files moved in {done} jobs")
+            
+            # One history entry per job; the last run is the whole batch
+            for job in jobs:
+                if "processed" in job and results.get("journal"):
+                    self.history().add(summarize_results(dict(job, journal=results["journal"]),
+                                                         job["source"], job["destination"]))
+            if results.get("journal") and results["processed"] > 0:
+                self.last_journal = results["journal"]
+                config_manager.config["last_run"] = summarize_results(
+                    results, [job["source"] for job in jobs], [job["destination"] for job in jobs])
+            config_manager.save_config()
+            self.export_run_metrics(results)
+        if self.last_journal and not config_manager.config["last_run"].get("reverted"):
+            self.revert_btn.setEnabled(True)
+    
     def create_categories_tab(self):
         """Create the categories management tab"""
         tab = QWidget()
@@ -530,9 +689,95 @@ class FileSortApp(QtWidgets.QMainWindow):
         self.log_level_combo.addItems(["DEBUG", "INFO", "WARNING", "ERROR"])
         self.log_level_combo.setCurrentText(config_manager.config["settings"]["log_level"])
         log_layout.addWidget(self.log_level_combo)
+        log_layout.addWidget(QLabel("Format:"))
+        self.log_format_combo = QComboBox()
+        self.log_format_combo.addItems(LOG_FORMATS)
+        self.log_format_combo.setCurrentText(config_manager.config["settings"].get("log_format", "text"))
+        self.log_format_combo.setToolTip("\"json\" writes one JSON object per line, for log shipping tools. "
+                                         "Takes effect after a restart.")
+        log_layout.addWidget(self.log_format_combo)
         log_layout.addStretch()
         advanced_layout.addLayout(log_layout)
         
+        # Number of files moved in parallel
+        workers_layout = QHBoxLayout()
+        workers_layout.addWidget(QLabel("Parallel file moves:"))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 32)
+        self.workers_spin.setValue(config_manager.config["settings"].get("move_workers", 4))
+        self.workers_spin.setToolTip("Number of files moved at the same time. Use 1 to move files one by one.")
+        workers_layout.addWidget(self.workers_spin)
+        workers_layout.addStretch()
+        advanced_layout.addLayout(workers_layout)
+        
+        # History retention
+        history_layout = QHBoxLayout()
+        history_layout.addWidget(QLabel("Keep history of the last"))
+        self.history_runs_spin = QSpinBox()
+        self.history_runs_spin.setRange(10, 100000)
+        self.history_runs_spin.setValue(config_manager.config["settings"].get("history_max_runs", 1000))
+        history_layout.addWidget(self.history_runs_spin)
+        history_layout.addWidget(QLabel("runs, for up to"))
+        self.history_days_spin = QSpinBox()
+        self.history_days_spin.setRange(1, 3650)
+        self.history_days_spin.setValue(config_manager.config["settings"].get("history_max_days", 90))
+        history_layout.addWidget(self.history_days_spin)
+        history_layout.addWidget(QLabel("days"))
+        history_layout.addStretch()
+        advanced_layout.addLayout(history_layout)
+        
+        # Incremental scanning
+        self.incremental_chk = QCheckBox("Only rescan folders that changed since the last run")
+        self.incremental_chk.setChecked(config_manager.config["settings"].get("incremental_scan", True))
+        self.incremental_chk.setToolTip("Folders whose contents did not change are skipped, which makes "
+                                        "re-running on a large, mostly unchanged folder much faster")
+        advanced_layout.addWidget(self.incremental_chk)
+        
+        # Content sniffing
+        sniff_layout = QHBoxLayout()
+        sniff_layout.addWidget(QLabel("Detect file types from content for:"))
+        self.sniff_combo = QComboBox()
+        for label, mode in (("No files", "off"), ("Files without an extension", "extensionless"),
+                            ("All files", "all")):
+            self.sniff_combo.addItem(label, mode)
+        self.sniff_combo.setCurrentIndex(max(0, self.sniff_combo.findData(
+            config_manager.config["settings"].get("content_sniffing", "extensionless"))))
+        self.sniff_combo.setToolTip("Reads the first bytes of a file to recognize PDFs, images, archives, "
+                                    "videos and more. \"All files\" also catches files with a wrong extension.")
+        sniff_layout.addWidget(self.sniff_combo)
+        sniff_layout.addStretch()
+        advanced_layout.addLayout(sniff_layout)
+        
+        # Watch mode settle time
+        settle_layout = QHBoxLayout()
+        settle_layout.addWidget(QLabel("Watch mode: move new files after they stay unchanged for"))
+        self.settle_spin = QtWidgets.QDoubleSpinBox()
+        self.settle_spin.setRange(0.5, 600)
+        self.settle_spin.setSingleStep(0.5)
+        self.settle_spin.setValue(config_manager.config["settings"].get("watch_settle_seconds", 2.0))
+        self.settle_spin.setToolTip("Gives downloads and copies time to finish before the file is moved")
+        settle_layout.addWidget(self.settle_spin)
+        settle_layout.addWidget(QLabel("seconds"))
+        settle_layout.addStretch()
+        advanced_layout.addLayout(settle_layout)
+        
+        # Run metrics export
+        metrics_json_layout = QHBoxLayout()
+        metrics_json_layout.addWidget(QLabel("Write run metrics (JSON) to:"))
+        self.metrics_json_input = QLineEdit(config_manager.config["settings"].get("metrics_json_file", ""))
+        self.metrics_json_input.setPlaceholderText("Off")
+        self.metrics_json_input.setToolTip("Per-phase timings, move latencies and counts of each run")
+        metrics_json_layout.addWidget(self.metrics_json_input)
+        advanced_layout.addLayout(metrics_json_layout)
+        
+        metrics_prom_layout = QHBoxLayout()
+        metrics_prom_layout.addWidget(QLabel("Prometheus textfile:"))
+        self.metrics_prom_input = QLineEdit(config_manager.config["settings"].get("metrics_textfile", ""))
+        self.metrics_prom_input.setPlaceholderText("Off")
+        self.metrics_prom_input.setToolTip("A .prom file in the textfile collector directory of a node exporter")
+        metrics_prom_layout.addWidget(self.metrics_prom_input)
+        advanced_layout.addLayout(metrics_prom_layout)
+        
         # Save settings button
         save_btn = QPushButton("Save Settings")
         save_btn.clicked.connect(self.save_settings)
@@ -545,15 +790,66 @@ class FileSortApp(QtWidgets.QMainWindow):
         
         self.tab_widget.addTab(tab, "Settings")
     
+    def create_history_tab(self):
+        """Create the operation history tab"""
+        self.history_store = None  # Opened on first use, so startup never reads the history
+        self.history_page = 0
+        
+        tab = QWidget()
+        layout = QVBoxLayout(tab)
+        
+        self.history_list = QListWidget()
+        layout.addWidget(self.history_list)
+        
+        # Paging controls
+        history_controls = QHBoxLayout()
+        self.history_prev_btn = QPushButton("Newer")
+        self.history_prev_btn.clicked.connect(lambda: self.show_history_page(self.history_page - 1))
+        self.history_next_btn = QPushButton("Older")
+        self.history_next_btn.clicked.connect(lambda: self.show_history_page(self.history_page + 1))
+        self.history_page_label = QLabel()
+        
+        history_controls.addWidget(self.history_prev_btn)
+        history_controls.addWidget(self.history_next_btn)
+        history_controls.addWidget(self.history_page_label)
+        history_controls.addStretch()
+        layout.addLayout(history_controls)
+        
+        self.tab_widget.addTab(tab, "History")
+    
+    def history(self):
+        """Return the operation history store, opening it on first use"""
+        if self.history_store is None:
+            self.history_store = open_history_store()
+        return self.history_store
+    
+    def show_history_page(self, page):
+        """Show one page of past organization runs, newest first"""
+        total = self.history().count()
+        pages = max(1, (total + self.HISTORY_PAGE_SIZE - 1) // self.HISTORY_PAGE_SIZE)
+        self.history_page = min(max(page, 0), pages - 1)
+        
+        self.history_list.clear()
+        for run in self.history().page(self.history_page * self.HISTORY_PAGE_SIZE, self.HISTORY_PAGE_SIZE):
+            timestamp = run["timestamp"][:19].replace("T", " ")
+            self.history_list.addItem(f"{timestamp}  {run['source']} -> {run['destination']}  "
+                                      f"({run['processed']} moved, {run['skipped']} skipped, {run['errors']} errors)")
+        
+        self.history_page_label.setText(f"Page {self.history_page + 1} of {pages}")
+        self.history_prev_btn.setEnabled(self.history_page > 0)
+        self.history_next_btn.setEnabled(self.history_page < pages - 1)
+    
     def create_logs_tab(self):
         """Create the logs tab"""
         tab = QWidget()
         layout = QVBoxLayout(tab)
         
-        # Log display
-        self.log_display = QTextEdit()
+        # Log display, capped so old lines are dropped as new ones arrive
+        self.log_display = QtWidgets.QPlainTextEdit()
         self.log_display.setReadOnly(True)
         self.log_display.setFont(QtGui.QFont("Consolas", 9))
+        self.log_display.setMaximumBlockCount(self.LOG_VIEW_MAX_LINES)
+        self.log_display.setPlaceholderText("No log entries yet.\nLogs will appear here after you organize files.")
         layout.addWidget(self.log_display)
         
         # Log controls
@@ -562,9 +858,16 @@ class FileSortApp(QtWidgets.QMainWindow):
         refresh_logs_btn.clicked.connect(self.refresh_logs)
         clear_logs_btn = QPushButton("Clear Logs")
         clear_logs_btn.clicked.connect(self.clear_logs)
+        self.follow_logs_chk = QCheckBox("Follow live")
+        self.follow_logs_chk.setToolTip("Show new log lines as they are written while this tab is open")
+        self.follow_logs_chk.toggled.connect(self.toggle_log_follow)
+        self.log_follow_timer = QTimer(self)
+        self.log_follow_timer.setInterval(self.LOG_FOLLOW_INTERVAL_MS)
+        self.log_follow_timer.timeout.connect(self.follow_logs)
         
         log_controls.addWidget(refresh_logs_btn)
         log_controls.addWidget(clear_logs_btn)
+        log_controls.addWidget(self.follow_logs_chk)
         log_controls.addStretch()
         
         layout.addLayout(log_controls)
@@ -586,6 +889,9 @@ class FileSortApp(QtWidgets.QMainWindow):
             tray_menu = QtWidgets.QMenu()
             tray_menu.addAction("Open FileSort", self.show_window)
             tray_menu.addAction("Organize Now", self.run_sort)
+            self.watch_action = tray_menu.addAction("Watch Folder")
+            self.watch_action.setCheckable(True)
+            self.watch_action.toggled.connect(self.watch_btn.setChecked)
             tray_menu.addSeparator()
             tray_menu.addAction("Exit", self.close)
             
@@ -618,12 +924,26 @@ class FileSortApp(QtWidgets.QMainWindow):
         """Save source and destination paths to config"""
         config_manager.config["settings"]["default_source"] = self.source_input.text()
         config_manager.config["settings"]["default_dest"] = self.dest_input.text()
-        config_manager.save_config()
+        # Debounced: typing a path writes the config once, after the typing stops
+        config_manager.mark_dirty()
     
     def save_settings(self):
         """Save current settings to configuration"""
         config_manager.config["settings"]["log_level"] = self.log_level_combo.currentText()
+        config_manager.config["settings"]["log_format"] = self.log_format_combo.currentText()
+        config_manager.config["settings"]["move_workers"] = self.workers_spin.value()
+        config_manager.config["settings"]["history_max_runs"] = self.history_runs_spin.value()
+        config_manager.config["settings"]["history_max_days"] = self.history_days_spin.value()
+        config_manager.config["settings"]["watch_settle_seconds"] = self.settle_spin.value()
+        config_manager.config["settings"]["incremental_scan"] = self.incremental_chk.isChecked()
+        config_manager.config["settings"]["content_sniffing"] = self.sniff_combo.currentData()
+        config_manager.config["settings"]["metrics_json_file"] = self.metrics_json_input.text().strip()
+        config_manager.config["settings"]["metrics_textfile"] = self.metrics_prom_input.text().strip()
+        if self.history_store is not None:
+            self.history_store.max_runs = self.history_runs_spin.value()
+            self.history_store.max_days = self.history_days_spin.value()
         config_manager.config["settings"]["create_date_folders"] = self.date_folders_chk.isChecked()
+        config_manager.config["settings"]["date_folder_source"] = self.date_source_combo.currentData()
         config_manager.config["settings"]["skip_duplicates"] = self.skip_duplicates_chk.isChecked()
         config_manager.config["settings"]["default_source"] = self.source_input.text()
         config_manager.config["settings"]["default_dest"] = self.dest_input.text()
@@ -667,45 +987,213 @@ class FileSortApp(QtWidgets.QMainWindow):
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Could not open startup folder: {e}")
     
-    def run_sort(self):
-        """Start file organization process"""
+    def check_folders(self):
+        """Validate the source and destination inputs; returns (src, dst) or None"""
         src = self.source_input.text()
         dst = self.dest_input.text()
         
         if not src or not dst:
             QMessageBox.warning(self, "Error", "Please select both source and destination folders.")
-            return
+            return None
         
         if not os.path.exists(src):
             QMessageBox.warning(self, "Error", "Source folder does not exist.")
-            return
-        
-        # Prepare options
-        options = {
+            return None
+        return src, dst
+    
+    def organize_options(self):
+        """Collect the organizer options from the UI"""
+        return {
             "recursive": self.recursive_chk.isChecked(),
             "create_date_folders": self.date_folders_chk.isChecked(),
             "skip_duplicates": self.skip_duplicates_chk.isChecked(),
-            "skip_no_extension": True
+            "date_source": self.date_source_combo.currentData(),
+            "skip_no_extension": True,
+            "workers": self.workers_spin.value(),
+            "incremental": self.incremental_chk.isChecked(),
+            "content_sniffing": self.sniff_combo.currentData(),
+            "checkpoint": True  # Single runs only; watch sessions and batches share a journal and ignore it
         }
+    
+    def busy(self):
+        """Whether an organize run, a revert, a watch session or a batch is running"""
+        return any(thread and thread.isRunning() for thread in (self.organizer_thread, self.revert_thread,
+                                                                self.watch_thread, self.batch_thread))
+    
+    def run_sort(self):
+        """Start file organization process"""
+        if self.busy():
+            self.status_bar.showMessage("Another operation is running; organize once it has finished")
+            return
+        folders = self.check_folders()
+        if folders is None:
+            return
+        src, dst = folders
+        options = self.organize_options()
         
-        # Start organization thread
-        self.organizer_thread = FileOrganizer(src, dst, options)
+        # Start organization thread; with a preview it only plans until the plan is confirmed
+        preview = self.preview_chk.isChecked()
+        self.organizer_thread = FileOrganizer(src, dst, options, self.category_index, preview)
         self.organizer_thread.progress_updated.connect(self.update_progress)
-        self.organizer_thread.file_processed.connect(self.log_file_processed)
+        self.organizer_thread.files_processed.connect(self.log_files_processed)
+        self.organizer_thread.plan_ready.connect(self.confirm_plan)
         self.organizer_thread.operation_completed.connect(self.organization_completed)
         
         self.organizer_thread.start()
         
         # Update UI
         self.run_btn.setEnabled(False)
+        self.resume_btn.setEnabled(False)
+        self.revert_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         self.results_text.clear()
+        self.status_bar.showMessage("Planning moves..." if preview else "Organizing files...")
+    
+    def resume_last_run(self):
+        """Continue the last stopped or interrupted run from its checkpoint"""
+        if self.busy():
+            self.status_bar.showMessage("Another operation is running; resume once it has finished")
+            return
+        checkpoint = latest_checkpoint()
+        if checkpoint is None:
+            self.resume_btn.setEnabled(False)
+            return
+        try:
+            self.organizer_thread = FileOrganizer(None, None, None, self.category_index, resume=checkpoint)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Error", f"Could not read the checkpoint: {e}")
+            return
+        organizer = self.organizer_thread.organizer
+        if not os.path.isdir(organizer.source_folder):
+            QMessageBox.warning(self, "Error", f"Source folder does not exist: {organizer.source_folder}")
+            return
+        # The run summary and history take the folders from the inputs
+        self.source_input.setText(organizer.source_folder)
+        self.dest_input.setText(organizer.destination_folder)
+        self.organizer_thread.progress_updated.connect(self.update_progress)
+        self.organizer_thread.files_processed.connect(self.log_files_processed)
+        self.organizer_thread.operation_completed.connect(self.organization_completed)
+        self.organizer_thread.start()
+        
+        self.run_btn.setEnabled(False)
+        self.resume_btn.setEnabled(False)
+        self.revert_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.results_text.clear()
+        self.status_bar.showMessage(f"Resuming the run of {organizer.source_folder}...")
+    
+    def confirm_plan(self, plan):
+        """Show the planned moves and execute them once confirmed"""
+        thread = self.organizer_thread
+        if thread is None or thread.organizer.should_stop:
+            return
+        summary = plan.summary()
+        if not plan.jobs:
+            QMessageBox.information(self, "Preview", f"Nothing to organize.\n\n"
+                                                     f"Files found: {summary['total_files']}\n"
+                                                     f"Skipped: {summary['skipped']}\n"
+                                                     f"Errors: {summary['errors']}")
+            self.organization_completed({"stopped": True})
+            self.status_bar.showMessage("Nothing to organize")
+            return
+        
+        text = f"{summary['moves']} files ({summary['total_bytes'] / (1024 * 1024):.1f} MB) will be moved:\n\n"
+        text += "\n".join(f"{category}: {count}" for category, count in summary["categories"].items())
+        text += f"\n\nRenamed to avoid a name clash: {summary['collisions']}"
+        text += f"\nSkipped: {summary['skipped']}"
+        if summary["errors"]:
+            text += f"\nCould not be planned: {summary['errors']}"
+        
+        dialog = QMessageBox(self)
+        dialog.setWindowTitle("Preview")
+        dialog.setIcon(QMessageBox.Question)
+        dialog.setText(text)
+        # The first moves in full, for a closer look before confirming
+        details = [f"{job.source} -> {job.destination}" for job in plan.jobs[:self.PREVIEW_DETAIL_LIMIT]]
+        if len(plan.jobs) > self.PREVIEW_DETAIL_LIMIT:
+            details.append(f"... and {len(plan.jobs) - self.PREVIEW_DETAIL_LIMIT} more")
+        dialog.setDetailedText("\n".join(details))
+        organize_btn = dialog.addButton("Organize", QMessageBox.AcceptRole)
+        dialog.addButton(QMessageBox.Cancel)
+        dialog.exec_()
+        
+        if dialog.clickedButton() is not organize_btn:
+            self.organization_completed({"stopped": True})
+            self.status_bar.showMessage("Organization cancelled")
+            return
+        
+        self.progress_bar.setValue(0)
         self.status_bar.showMessage("Organizing files...")
+        thread.execute(plan)
+    
+    def toggle_watch(self, checked):
+        """Start or stop sorting new files as they arrive"""
+        if self.watch_action is not None and self.watch_action.isChecked() != checked:
+            self.watch_action.setChecked(checked)
+        if not checked:
+            if self.watch_thread and self.watch_thread.isRunning():
+                # The session reports its results through watch_completed once it winds down
+                self.watch_thread.stop()
+                self.status_bar.showMessage("Stopping watch...")
+            return
+        
+        busy = [thread for thread in (self.organizer_thread, self.revert_thread, self.batch_thread)
+                if thread and thread.isRunning()]
+        folders = None if busy else self.check_folders()
+        if folders is None:
+            self.watch_btn.setChecked(False)
+            return
+        src, dst = folders
+        
+        self.watch_thread = WatchWorker(src, dst, self.organize_options(), self.category_index, self.settle_spin.value())
+        self.watch_thread.files_processed.connect(self.log_files_processed)
+        self.watch_thread.batch_completed.connect(self.watch_batch_completed)
+        self.watch_thread.operation_completed.connect(self.watch_completed)
+        self.watch_sorted = 0
+        self.watch_thread.start()
+        
+        self.run_btn.setEnabled(False)
+        self.revert_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.results_text.clear()
+        self.status_bar.showMessage(f"Watching {src} for new files...")
+    
+    def watch_batch_completed(self, results):
+        """Show the running total of a watch session"""
+        self.watch_sorted += results["processed"]
+        self.status_bar.showMessage(f"Watching {self.source_input.text()}: {self.watch_sorted} files sorted")
+        # Batch results carry the session's metrics so far, which keeps a scraped textfile current
+        self.export_run_metrics(results)
+    
+    def watch_completed(self, results):
+        """Handle the end of a watch session"""
+        self.watch_btn.setChecked(False)
+        self.run_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        
+        if "error" in results:
+            QMessageBox.critical(self, "Error", f"Watching failed: {results['error']}")
+            self.status_bar.showMessage("Watching failed")
+        else:
+            self.status_bar.showMessage(f"Stopped watching: {results['processed']} files sorted, "
+                                        f"{results['errors']} errors")
+            self.record_run(results)
+        if self.last_journal and not config_manager.config["last_run"].get("reverted"):
+            self.revert_btn.setEnabled(True)
     
     def stop_organization(self):
         """Stop the organization process"""
+        if self.watch_thread and self.watch_thread.isRunning():
+            self.watch_btn.setChecked(False)
+            return
+        if self.revert_thread and self.revert_thread.isRunning():
+            # The revert reports its own (partial) results when it winds down
+            self.revert_thread.stop()
+            return
         if self.organizer_thread:
             self.organizer_thread.stop()
             self.organizer_thread.wait()
@@ -716,9 +1204,9 @@ class FileSortApp(QtWidgets.QMainWindow):
         self.progress_bar.setMaximum(total)
         self.progress_bar.setValue(current)
     
-    def log_file_processed(self, filename, status):
-        """Log file processing status"""
-        self.results_text.append(f"{filename}: {status}")
+    def log_files_processed(self, statuses):
+        """Log a batch of file processing statuses with a single append"""
+        self.results_text.append("\n".join(f"{filename}: {status}" for filename, status in statuses))
         self.results_text.ensureCursorVisible()
     
     def organization_completed(self, results):
@@ -726,6 +1214,11 @@ class FileSortApp(QtWidgets.QMainWindow):
         self.run_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.progress_bar.setVisible(False)
+        # A stopped run leaves its checkpoint behind; a completed one removes it
+        self.resume_btn.setEnabled(latest_checkpoint() is not None)
+        # A run that completes makes itself the one to revert (record_run); otherwise the previous one still is
+        if self.last_journal and not config_manager.config["last_run"].get("reverted"):
+            self.revert_btn.setEnabled(True)
         
         if "error" in results:
             QMessageBox.critical(self, "Error", f"Organization failed: {results['error']}")
@@ -739,6 +1232,10 @@ class FileSortApp(QtWidgets.QMainWindow):
             summary += f"Processed: {results['processed']}\n"
             summary += f"Skipped: {results['skipped']}\n"
             summary += f"Errors: {results['errors']}\n"
+            summary += f"Renamed in place: {results.get('renamed', 0)}\n"
+            summary += f"Copied across drives: {results['processed'] - results.get('renamed', 0)} "
+            summary += f"({results.get('bytes_copied', 0) / (1024 * 1024):.1f} MB)\n"
+            summary += self.timing_summary(results)
             
             if results['errors'] > 0:
                 summary += f"\nErrors:\n" + "\n".join(results['errors_list'][:5])
@@ -747,21 +1244,41 @@ class FileSortApp(QtWidgets.QMainWindow):
             
             QMessageBox.information(self, "Organization Complete", summary)
             self.status_bar.showMessage("Organization completed successfully")
-            
-            # Store the file movements for revert
-            if "moved_files" in results and len(results["moved_files"]) > 0:
-                self.last_operation_moves = results["moved_files"]
-                self.revert_btn.setEnabled(True)
-                logging.info(f"Stored {len(self.last_operation_moves)} file movements for revert")
-            
-            # Save operation to recent operations
-            config_manager.config["recent_operations"].append({
-                "timestamp": datetime.now().isoformat(),
-                "source": self.source_input.text(),
-                "destination": self.dest_input.text(),
-                "results": results
-            })
-            config_manager.save_config()
+            self.record_run(results)
+    
+    def record_run(self, results):
+        """Remember a finished run for revert and add it to the history"""
+        # Keep only a small summary in the config; the moves themselves are in the journal
+        run_summary = summarize_results(results, self.source_input.text(), self.dest_input.text())
+        if results.get("journal") and results["processed"] > 0:
+            self.last_journal = results["journal"]
+            config_manager.config["last_run"] = run_summary
+            self.revert_btn.setEnabled(True)
+            logging.info(f"Journaled {results['processed']} file movements for revert in {self.last_journal}")
+        
+        # Save operation to the history store
+        self.history().add(run_summary)
+        config_manager.save_config()
+        self.export_run_metrics(results)
+    
+    def timing_summary(self, results):
+        """One line with the run time and the phases that took longest"""
+        metrics = results.get("metrics")
+        if not metrics:
+            return ""
+        slowest = sorted(metrics["phases"].items(), key=lambda item: -item[1])[:3]
+        phases = ", ".join(f"{phase} {seconds:.2f} s" for phase, seconds in slowest if seconds >= 0.01)
+        return f"Time: {metrics['wall_seconds']:.2f} s" + (f" ({phases})" if phases else "") + "\n"
+    
+    def export_run_metrics(self, results):
+        """Write the run's metrics to the files configured in the settings"""
+        settings = config_manager.config["settings"]
+        if results.get("metrics") and (settings.get("metrics_json_file") or settings.get("metrics_textfile")):
+            export_metrics(results["metrics"], settings.get("metrics_json_file"), settings.get("metrics_textfile"))
+    
+    def rebuild_category_index(self):
+        """Recompile the extension lookup after the categories changed"""
+        self.category_index = CategoryIndex(config_manager.config["categories"])
     
     def populate_categories_list(self):
         """Populate the categories list widget"""
@@ -790,6 +1307,7 @@ class FileSortApp(QtWidgets.QMainWindow):
             if name not in config_manager.config["categories"]:
                 config_manager.config["categories"][name] = []
                 config_manager.save_config()
+                self.rebuild_category_index()
                 self.populate_categories_list()
             else:
                 QMessageBox.warning(self, "Error", "Category already exists!")
@@ -807,6 +1325,7 @@ class FileSortApp(QtWidgets.QMainWindow):
             if reply == QMessageBox.Yes:
                 del config_manager.config["categories"][category]
                 config_manager.save_config()
+                self.rebuild_category_index()
                 self.populate_categories_list()
     
     def add_extension(self):
@@ -827,6 +1346,7 @@ class FileSortApp(QtWidgets.QMainWindow):
         if extension not in config_manager.config["categories"][category]:
             config_manager.config["categories"][category].append(extension)
             config_manager.save_config()
+            self.rebuild_category_index()
             self.populate_extensions_list(category)
             self.extension_input.clear()
         else:
@@ -843,49 +1363,72 @@ class FileSortApp(QtWidgets.QMainWindow):
             
             config_manager.config["categories"][category].remove(extension)
             config_manager.save_config()
+            self.rebuild_category_index()
             self.populate_extensions_list(category)
     
     def on_tab_changed(self, index):
-        """Handle tab change - refresh logs when logs tab is selected"""
+        """Handle tab change - refresh logs or history when their tab is selected"""
         tab_name = self.tab_widget.tabText(index)
         if tab_name == "Logs":
             self.refresh_logs()
+        elif tab_name == "History":
+            self.show_history_page(self.history_page)
     
     def refresh_logs(self):
-        """Refresh the log display"""
-        log_dir = os.path.join(os.path.expanduser("~"), "AppData", "Local", "FileSort", "logs")
-        log_file = os.path.join(log_dir, f"filesort_{datetime.now().strftime('%Y%m%d')}.log")
+        """Append the log lines written since the last refresh"""
+        try:
+            text, restarted = self.log_tail.read()
+        except OSError as e:
+            logging.warning(f"Error reading log file: {e}")
+            return
+        if restarted:
+            self.log_display.clear()
+        if not text:
+            return
         
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    if content.strip():
-                        self.log_display.setPlainText(content)
-                        # Scroll to bottom to show most recent logs
-                        cursor = self.log_display.textCursor()
-                        cursor.movePosition(cursor.End)
-                        self.log_display.setTextCursor(cursor)
-                    else:
-                        self.log_display.setPlainText("Log file exists but is empty.")
-            except Exception as e:
-                self.log_display.setPlainText(f"Error reading log file: {str(e)}")
+        # Keep following the end only if the view was already there
+        scrollbar = self.log_display.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+        self.log_display.appendPlainText(text.rstrip("\n"))
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+    
+    def toggle_log_follow(self, checked):
+        """Start or stop refreshing the Logs tab on a timer"""
+        if checked:
+            self.log_follow_timer.start()
+            self.refresh_logs()
         else:
-            self.log_display.setPlainText("No log file found for today.\nLogs will appear here after you organize files.")
+            self.log_follow_timer.stop()
+    
+    def follow_logs(self):
+        """Timer tick: refresh only while the Logs tab is shown"""
+        if self.tab_widget.tabText(self.tab_widget.currentIndex()) == "Logs" and self.isVisible():
+            self.refresh_logs()
     
     def clear_logs(self):
-        """Clear the log display"""
+        """Clear the log display; only lines written after this are shown"""
         self.log_display.clear()
     
     def revert_last_operation(self):
         """Revert the last file organization operation"""
-        if not self.last_operation_moves:
+        if self.busy():
+            self.status_bar.showMessage("Another operation is running; revert once it has finished")
+            return
+        try:
+            _, moves, reverted_entries = MoveJournal.load(self.last_journal) if self.last_journal else ({}, [], set())
+        except OSError as e:
+            logging.error(f"Could not read journal {self.last_journal}: {e}")
+            moves, reverted_entries = [], set()
+        pending = len(moves) - len(reverted_entries)
+        if pending <= 0:
             QMessageBox.warning(self, "No Operation", "No previous operation to revert.")
+            self.revert_btn.setEnabled(False)
             return
         
         reply = QMessageBox.question(self, "Confirm Revert", 
                                     f"Are you sure you want to revert the last organization?\n\n"
-                                    f"This will move {len(self.last_operation_moves)} files back to their original locations.",
+                                    f"This will move {pending} files back to their original locations.",
                                     QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.No:
@@ -893,81 +1436,66 @@ class FileSortApp(QtWidgets.QMainWindow):
         
         # Create revert progress
         self.progress_bar.setVisible(True)
-        self.progress_bar.setMaximum(len(self.last_operation_moves))
+        self.progress_bar.setMaximum(pending)
         self.progress_bar.setValue(0)
         self.revert_btn.setEnabled(False)
+        self.run_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
         self.results_text.clear()
         self.status_bar.showMessage("Reverting operation...")
         
-        reverted = 0
-        errors = 0
+        # Run the revert in the background, with the same worker count as organizing
+        self.revert_thread = RevertWorker(self.last_journal, self.workers_spin.value())
+        self.revert_thread.progress_updated.connect(self.update_progress)
+        self.revert_thread.files_processed.connect(self.log_files_processed)
+        self.revert_thread.operation_completed.connect(self.revert_completed)
+        self.revert_thread.start()
+    
+    def revert_completed(self, results):
+        """Handle revert completion"""
+        self.run_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.progress_bar.setVisible(False)
         
-        for idx, move in enumerate(self.last_operation_moves):
-            try:
-                # Move file back from destination to source
-                source = move["destination"]
-                dest = move["source"]
-                
-                # Make sure source exists
-                if not os.path.exists(source):
-                    logging.warning(f"Source file not found during revert: {source}")
-                    errors += 1
-                    continue
-                
-                # Create destination directory if it doesn't exist
-                os.makedirs(os.path.dirname(dest), exist_ok=True)
-                
-                # Handle if destination already exists
-                if os.path.exists(dest):
-                    dest = self.get_unique_filename(dest)
-                
-                # Move file back
-                shutil.move(source, dest)
-                reverted += 1
-                logging.info(f"Reverted: {source} -> {dest}")
-                self.results_text.append(f"{move['filename']}: Reverted successfully")
-                self.results_text.ensureCursorVisible()
-                
-            except Exception as e:
-                errors += 1
-                error_msg = f"Failed to revert {move['filename']}: {str(e)}"
-                logging.error(error_msg)
-                self.results_text.append(f"{move['filename']}: Error - {str(e)}")
-                self.results_text.ensureCursorVisible()
-            
-            # Update progress
-            self.progress_bar.setValue(idx + 1)
+        if "error" in results:
+            QMessageBox.critical(self, "Error", f"Revert failed: {results['error']}")
+            self.status_bar.showMessage("Revert failed")
+            self.revert_btn.setEnabled(True)
+            return
         
-        # Show completion
-        self.progress_bar.setVisible(False)
+        reverted = results["reverted"]
+        errors = results["errors"]
         self.status_bar.showMessage(f"Revert complete: {reverted} files reverted, {errors} errors")
         
         summary = f"Revert completed!\n\n"
         summary += f"Reverted: {reverted} files\n"
+        summary += self.timing_summary(results)
         summary += f"Errors: {errors}"
+        if results["cancelled"]:
+            summary += f"\n\nRevert was stopped with {results['cancelled']} files left. "
+            summary += "Click Revert again to continue where it stopped."
         
         QMessageBox.information(self, "Revert Complete", summary)
+        self.export_run_metrics(results)
         
-        # Clear the stored moves
-        self.last_operation_moves = []
-    
-    def get_unique_filename(self, filepath):
-        """Generate unique filename if file exists"""
-        base, ext = os.path.splitext(filepath)
-        counter = 1
-        while os.path.exists(filepath):
-            filepath = f"{base}_{counter}{ext}"
-            counter += 1
-        return filepath
+        # Entries that failed or were not reached stay pending in the journal and can be resumed
+        if errors == 0 and results["cancelled"] == 0:
+            config_manager.config["last_run"]["reverted"] = True
+            config_manager.save_config()
+        else:
+            self.revert_btn.setEnabled(True)
     
     def closeEvent(self, event):
         """Handle application close event"""
-        if self.organizer_thread and self.organizer_thread.isRunning():
+        running = [thread for thread in (self.organizer_thread, self.revert_thread, self.watch_thread,
+                                         self.batch_thread) if thread and thread.isRunning()]
+        if running:
             reply = QMessageBox.question(self, "Confirm Exit", 
                                        "Organization is in progress. Are you sure you want to exit?")
             if reply == QMessageBox.Yes:
-                self.organizer_thread.stop()
-                self.organizer_thread.wait()
+                for thread in running:
+                    thread.stop()
+                    thread.wait()
                 event.accept()
             else:
                 event.ignore()
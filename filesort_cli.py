@@ -0,0 +1,303 @@
+"""
+FileSort Pro command-line interface.
+
+Runs the core engine without PyQt5, for servers and scheduled jobs:
+
+    python filesort_cli.py SOURCE [DEST] [--dry-run] [--workers N] ...
+    python filesort_cli.py --job SRC1 DEST1 --job SRC2 DEST2 [--io-slots N] ...
+    python filesort_cli.py --resume
+
+Progress is written to stdout as JSON lines, one object per event; in a
+batch, file, progress and job events carry the index of their job.
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+
+from filesort_core import (BatchJob, BatchRunner, Organizer, Reverter, SourceWatcher, export_metrics,
+                           get_config_manager, latest_checkpoint, open_history_store, summarize_results)
+
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FILE_ERRORS = 1  # The run finished but some files could not be moved
+EXIT_USAGE = 2  # Bad arguments or missing folders (argparse uses 2 as well)
+EXIT_FAILED = 3  # The run aborted with an unexpected error
+EXIT_INTERRUPTED = 130
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="filesort", description="Sort files into category folders.")
+    parser.add_argument("source", nargs="?", help="folder to organize")
+    parser.add_argument("dest", nargs="?", help="folder to sort into (defaults to the source folder)")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be moved without moving anything")
+    parser.add_argument("--no-recursive", dest="recursive", action="store_false", help="do not descend into subfolders")
+    parser.add_argument("--date-folders", action=argparse.BooleanOptionalAction,
+                        help="create date-based subfolders, or not (default: the create_date_folders setting)")
+    parser.add_argument("--date-source", choices=("run", "mtime"),
+                        help="name date folders after the day of the run or the file's modification date "
+                             "(default: the date_folder_source setting)")
+    parser.add_argument("--skip-duplicates", action=argparse.BooleanOptionalAction,
+                        help="move files whose content already exists to the duplicates folder, or not "
+                             "(default: the skip_duplicates setting)")
+    parser.add_argument("--include-no-extension", action="store_true",
+                        help="sort files without an extension into Misc instead of skipping them")
+    parser.add_argument("--sniff", choices=("off", "extensionless", "all"),
+                        help="identify files by their content: never, only files without an extension, or all files "
+                             "(default: the content_sniffing setting)")
+    parser.add_argument("--full-scan", action="store_true",
+                        help="list every folder instead of only those changed since the last run")
+    parser.add_argument("--workers", type=int, help="number of files moved in parallel")
+    parser.add_argument("--job", nargs=2, action="append", metavar=("SRC", "DEST"),
+                        help="add a source -> destination job to a batch; repeat to run several jobs concurrently")
+    parser.add_argument("--io-slots", type=int, help="with --job, file moves running at once across all jobs "
+                                                     "(default: the batch_io_slots setting)")
+    parser.add_argument("--max-jobs", type=int, help="with --job, jobs running at once "
+                                                     "(default: the batch_max_jobs setting)")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and sort new files as they arrive (stop with Ctrl+C)")
+    parser.add_argument("--settle", type=float, metavar="SECONDS",
+                        help="with --watch, how long a new file must stay unchanged before it is moved")
+    parser.add_argument("--poll", action="store_true",
+                        help="with --watch, poll folders instead of using inotify (e.g. for network shares)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the last interrupted run from its checkpoint, with its folders and options")
+    parser.add_argument("--revert-last", action="store_true",
+                        help="move the files of the last run back, resuming an interrupted revert")
+    parser.add_argument("--history", type=int, metavar="N", nargs="?", const=20,
+                        help="print the N most recent runs (default 20) and exit")
+    parser.add_argument("--log-file", metavar="PATH", help="write the engine's log to PATH")
+    parser.add_argument("--log-format", choices=("text", "json"),
+                        help="log as plain text or as JSON lines (default: the log_format setting)")
+    parser.add_argument("--metrics-json", metavar="PATH",
+                        help="write per-phase timings and counters of the run to PATH as JSON")
+    parser.add_argument("--metrics-prom", metavar="PATH",
+                        help="write the run's metrics to PATH in the Prometheus text format (node exporter textfile)")
+    parser.add_argument("--quiet", action="store_true", help="only print the final summary line")
+    return parser
+
+
+def emit(event, **fields):
+    """Write one JSON-lines event to stdout"""
+    sys.stdout.write(json.dumps({"event": event, **fields}) + "\n")
+
+
+def write_metrics(args, results):
+    """Export the run's metrics to the paths given on the command line or in the settings"""
+    settings = get_config_manager().config["settings"]
+    export_metrics(results["metrics"], args.metrics_json or settings.get("metrics_json_file"),
+                   args.metrics_prom or settings.get("metrics_textfile"))
+
+
+def revert_last(args):
+    """Revert the run recorded as last_run in the config"""
+    config_manager = get_config_manager()
+    journal = config_manager.config["last_run"].get("journal")
+    if not journal or not os.path.exists(journal):
+        emit("error", message="No previous operation to revert")
+        return EXIT_USAGE
+
+    settings = config_manager.config["settings"]
+    reverter = Reverter(journal, args.workers or settings.get("move_workers", 4), make_batch_printer(args))
+    signal.signal(signal.SIGINT, lambda signum, frame: reverter.stop())
+    results = reverter.revert()
+    write_metrics(args, results)
+
+    if results["errors"] == 0 and results["cancelled"] == 0:
+        config_manager.config["last_run"]["reverted"] = True
+        config_manager.save_config()
+    emit("summary", **results)
+    if reverter.should_stop:
+        return EXIT_INTERRUPTED
+    return EXIT_FILE_ERRORS if results["errors"] else EXIT_OK
+
+
+def make_batch_printer(args):
+    """Return an on_batch callback writing file and progress events"""
+    def on_batch(statuses, progress):
+        if args.quiet:
+            return
+        for filename, status in statuses:
+            emit("file", file=filename, status=status)
+        if progress is not None:
+            emit("progress", current=progress[0], total=progress[1])
+        sys.stdout.flush()
+    return on_batch
+
+
+def build_options(args, settings):
+    """Organizer options from the command line, falling back to the settings"""
+    return {
+        "recursive": args.recursive,
+        "create_date_folders": (settings.get("create_date_folders", False) if args.date_folders is None
+                                else args.date_folders),
+        "skip_duplicates": (settings.get("skip_duplicates", False) if args.skip_duplicates is None
+                            else args.skip_duplicates),
+        "date_source": args.date_source or settings.get("date_folder_source", "run"),
+        "skip_no_extension": not args.include_no_extension,
+        "workers": args.workers or settings.get("move_workers", 4),
+        "incremental": settings.get("incremental_scan", True) and not args.full_scan,
+        "content_sniffing": args.sniff or settings.get("content_sniffing", "extensionless"),
+        "checkpoint": True,  # Only single runs keep one; watch sessions and batches share a journal
+        "dry_run": args.dry_run
+    }
+
+
+def record_runs(summaries, last_run):
+    """Add run summaries to the history and make ``last_run`` the run --revert-last undoes"""
+    if not last_run["journal"]:
+        return
+    store = open_history_store()
+    for summary in summaries:
+        store.add(summary)
+    store.close()
+    if last_run["processed"]:
+        config_manager = get_config_manager()
+        config_manager.config["last_run"] = last_run
+        config_manager.save_config()
+
+
+def run_batch(args):
+    """Run the --job pairs concurrently as one batch, which reverts as a single run"""
+    settings = get_config_manager().config["settings"]
+    jobs = [BatchJob(os.path.abspath(source), os.path.abspath(dest)) for source, dest in args.job]
+    lock = threading.Lock()  # Jobs report from their own threads
+
+    def on_job_batch(job, statuses, progress):
+        if args.quiet:
+            return
+        with lock:
+            for filename, status in statuses:
+                emit("file", job=job.index, file=filename, status=status)
+            if progress is not None:
+                emit("progress", job=job.index, current=progress[0], total=progress[1])
+            sys.stdout.flush()
+
+    def on_job_done(job):
+        if args.quiet:
+            return
+        with lock:
+            emit("job", **job.summary())
+            sys.stdout.flush()
+
+    runner = BatchRunner(jobs, build_options(args, settings),
+                         io_slots=args.io_slots or settings.get("batch_io_slots", 4),
+                         max_jobs=args.max_jobs or settings.get("batch_max_jobs", 4),
+                         on_job_batch=on_job_batch, on_job_done=on_job_done)
+    signal.signal(signal.SIGINT, lambda signum, frame: runner.stop())
+
+    try:
+        results = runner.run()
+    except Exception as e:
+        emit("error", message=str(e))
+        return EXIT_FAILED
+
+    write_metrics(args, results)
+    # One history row per job; they share the batch journal, which last_run reverts as a whole
+    record_runs([summarize_results(job.results, job.source_folder, job.destination_folder)
+                 for job in jobs if job.results],
+                summarize_results(results, [job.source_folder for job in jobs],
+                                  [job.destination_folder for job in jobs]))
+
+    results["categories_created"] = sorted(results["categories_created"])
+    emit("summary", **results)
+    if runner.should_stop:
+        return EXIT_INTERRUPTED
+    return EXIT_FILE_ERRORS if results["errors"] else EXIT_OK
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.log_file:
+        from filesort_logging import start_logging
+
+        settings = get_config_manager().config["settings"]
+        log_format = args.log_format or settings.get("log_format", "text")
+        start_logging(args.log_file, settings.get("log_level", "INFO"), log_format, console=False)
+    if args.revert_last:
+        return revert_last(args)
+    if args.resume:
+        if args.source or args.job or args.watch:
+            parser.error("--resume cannot be combined with a source folder, --job or --watch")
+        checkpoint = latest_checkpoint()
+        if checkpoint is None:
+            emit("error", message="No interrupted run to resume")
+            return EXIT_USAGE
+    if args.history is not None:
+        store = open_history_store()
+        for run in store.page(0, args.history, source=os.path.abspath(args.source) if args.source else None):
+            emit("run", **run)
+        store.close()
+        return EXIT_OK
+    if args.job:
+        if args.source or args.watch:
+            parser.error("--job cannot be combined with a source folder or --watch")
+        return run_batch(args)
+    if not args.source and not args.resume:
+        parser.error("the source folder is required")
+
+    if args.resume:
+        # The folders and options are those of the interrupted run
+        try:
+            organizer = Organizer.resume(checkpoint, on_batch=make_batch_printer(args))
+        except (OSError, ValueError) as e:
+            emit("error", message=f"Could not read the checkpoint: {e}")
+            return EXIT_FAILED
+        source, dest = organizer.source_folder, organizer.destination_folder
+    else:
+        source = os.path.abspath(args.source)
+        dest = os.path.abspath(args.dest or args.source)
+    if not os.path.isdir(source):
+        emit("error", message=f"Source folder does not exist: {source}")
+        return EXIT_USAGE
+
+    settings = get_config_manager().config["settings"]
+    options = build_options(args, settings)
+
+    if args.resume:
+        run = organizer.organize_files
+    elif args.watch:
+        def on_results(results):
+            if results["processed"] or results["errors"]:
+                emit("batch", processed=results["processed"], skipped=results["skipped"], errors=results["errors"])
+                sys.stdout.flush()
+                # Keep the exported metrics current during a long session
+                write_metrics(args, results)
+
+        organizer = SourceWatcher(source, dest, options, on_batch=make_batch_printer(args), on_results=on_results,
+                                  settle_seconds=args.settle or settings.get("watch_settle_seconds", 2.0),
+                                  force_polling=args.poll)
+        run = organizer.run
+    else:
+        organizer = Organizer(source, dest, options, on_batch=make_batch_printer(args))
+        run = organizer.organize_files
+    # Ctrl+C stops the run cleanly: queued moves are dropped, running ones finish
+    signal.signal(signal.SIGINT, lambda signum, frame: organizer.stop())
+
+    try:
+        results = run()
+    except Exception as e:
+        emit("error", message=str(e))
+        return EXIT_FAILED
+
+    write_metrics(args, results)
+    run_summary = summarize_results(results, source, dest)
+    record_runs([run_summary], run_summary)
+
+    results["categories_created"] = sorted(results["categories_created"])
+    results["stopped"] = organizer.should_stop
+    emit("summary", **results)
+
+    # Ctrl+C is the normal way to end a watch session
+    if organizer.should_stop and not args.watch:
+        return EXIT_INTERRUPTED
+    return EXIT_FILE_ERRORS if results["errors"] else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3503 @@
+"""
+FileSort Pro core engine.
+
+Everything needed to classify, organize and revert files, with no GUI
+dependency: the PyQt5 application (filesort.py) and the command-line
+interface (filesort_cli.py) are both thin front-ends over this module.
+"""
+
+import os
+import atexit
+import bisect
+import errno
+import shutil
+import stat
+import sys
+import json
+import copy
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from types import MappingProxyType
+
+# hashlib, sqlite3 and concurrent.futures are imported where they are first
+# needed, so runs that never hash or parallelize (and the CLI) start faster
+
+
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), "AppData", "Local", "FileSort")
+
+
+# -----------------------------
+# CONFIGURATION MANAGEMENT
+# -----------------------------
+class ConfigManager:
+    """Load and persist config.json.
+
+    Frequent edits (such as typing a path) only call mark_dirty(); the file
+    is written once the config has been quiet for SAVE_DELAY seconds, on an
+    explicit save_config() and at exit. Writes go to a temporary file that
+    is renamed over config.json, and are skipped when nothing changed.
+
+    The config is only edited, and save_config() only called, on the thread
+    that owns it. mark_dirty() copies the config there, so the delayed save
+    serializes that copy and never sees an edit half-applied.
+    """
+
+    SAVE_DELAY = 1.5
+
+    def __init__(self):
+        self.config_file = os.path.join(APP_DATA_DIR, "config.json")
+        self.ensure_config_dir()
+        self._lock = threading.RLock()
+        self._timer = None
+        self._save_deadline = 0.0
+        self._pending = None  # Copy of the config taken by mark_dirty(), for the delayed save
+        self._saved_text = None  # What config.json holds, to skip writes that change nothing
+        self.legacy_operations = []  # Old recent_operations entries, waiting to move into the HistoryStore
+        self.default_config = {
+            "categories": {
+                "Documents": [".pdf", ".docx", ".txt", ".rtf", ".odt", ".pptx", ".xlsx", ".csv", ".doc", ".ppt"],
+                "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp", ".svg", ".ico"],
+                "Videos": [".mp4", ".mov", ".avi", ".mkv", ".flv", ".wmv", ".m4v", ".webm"],
+                "Audio": [".mp3", ".wav", ".flac", ".aac", ".ogg", ".m4a", ".wma"],
+                "Archives": [".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz"],
+                "Installers": [".exe", ".msi", ".bat", ".cmd", ".appx", ".msix"],
+                "Code": [".py", ".cpp", ".c", ".h", ".js", ".html", ".css", ".java", ".json", ".xml", ".ts", ".php", ".rb", ".go"],
+                "Spreadsheets": [".xls", ".xlsx", ".ods", ".csv"],
+                "Misc": []
+            },
+            "settings": {
+                "default_source": os.path.join(os.path.expanduser("~"), "Downloads"),
+                "default_dest": os.path.join(os.path.expanduser("~"), "Downloads"),
+                "create_date_folders": False,
+                "date_folder_source": "run",  # Date folders by the day files are sorted ("run") or modified ("mtime")
+                "skip_duplicates": False,
+                "log_level": "INFO",
+                "log_format": "text",  # "text" or "json" (one JSON object per line, for log shippers)
+                "move_workers": 4,
+                "history_max_runs": 1000,
+                "history_max_days": 90,
+                "watch_settle_seconds": 2.0,
+                "incremental_scan": True,
+                "content_sniffing": "extensionless",  # Identify files by content: "off", "extensionless" or "all"
+                "metrics_json_file": "",  # Where to write each run's metrics as JSON ("" = off)
+                "metrics_textfile": "",  # Prometheus textfile for a node exporter to scrape ("" = off)
+                "batch_io_slots": 4,  # File moves running at once across all jobs of a batch
+                "batch_max_jobs": 4,  # Batch jobs scanning and planning at once
+                "batch_jobs": []  # [source, destination] pairs of the Batch tab
+            },
+            # Checked before the extension lists, first match wins, e.g.
+            # {"category": "Archives/Large", "extensions": [".zip"], "min_size": "1 GB"} (see RuleSet)
+            "rules": [],
+            "last_run": {}  # Summary of the last run, including its journal for revert
+        }
+        self.config = self.load_config()
+        atexit.register(self.save_config)
+
+    def ensure_config_dir(self):
+        os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
+
+    def load_config(self):
+        try:
+            # Always start with a fresh copy of default config
+            default_copy = copy.deepcopy(self.default_config)
+
+            if os.path.exists(self.config_file):
+                with open(self.config_file, 'r') as f:
+                    text = f.read()
+                config = json.loads(text)
+                self._saved_text = text
+                # History now lives in HistoryStore; never merge it into the config again
+                self.legacy_operations = config.pop("recent_operations", None) or []
+                # Merge with defaults for any missing keys
+                return self.merge_configs(default_copy, config)
+            return default_copy
+        except Exception as e:
+            logging.error(f"Failed to load config: {e}")
+            return copy.deepcopy(self.default_config)
+
+    def mark_dirty(self):
+        """Schedule a save of the config as it is now, once it has not changed for SAVE_DELAY seconds"""
+        snapshot = copy.deepcopy(self.config)
+        with self._lock:
+            self._pending = snapshot
+            self._save_deadline = time.monotonic() + self.SAVE_DELAY
+            if self._timer is None:
+                self._start_timer(self.SAVE_DELAY)
+
+    def _start_timer(self, delay):
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            remaining = self._save_deadline - time.monotonic()
+            if remaining > 0:
+                # More edits arrived since the timer was started
+                self._start_timer(remaining)
+                return
+            self._timer = None
+            snapshot, self._pending = self._pending, None
+            if snapshot is not None:  # None when save_config() ran in the meantime
+                self._write(snapshot)
+
+    def save_config(self):
+        """Write the config now if it differs from the file"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = None
+            self._write(self.config)
+
+    def _write(self, config):
+        if self.legacy_operations:
+            # Not in the HistoryStore yet; dropping them here would lose that history
+            config = dict(config, recent_operations=self.legacy_operations)
+        try:
+            text = json.dumps(config, indent=2)
+        except Exception as e:
+            logging.error(f"Failed to save config: {e}")
+            return
+        if text == self._saved_text:
+            return
+
+        temp_file = self.config_file + ".tmp"
+        try:
+            with open(temp_file, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.config_file)
+            self._saved_text = text
+        except Exception as e:
+            logging.error(f"Failed to save config: {e}")
+
+    def merge_configs(self, default, user):
+        """Recursively merge user config with defaults"""
+        result = copy.deepcopy(default)
+        for key, value in user.items():
+            if key in result:
+                if isinstance(value, dict) and isinstance(result[key], dict):
+                    result[key] = self.merge_configs(result[key], value)
+                else:
+                    result[key] = value
+            else:
+                result[key] = value
+        return result
+
+_config_manager = None
+
+
+def get_config_manager():
+    """Return the shared ConfigManager, loading the config on first use"""
+    global _config_manager
+    if _config_manager is None:
+        _config_manager = ConfigManager()
+    return _config_manager
+
+
+# -----------------------------
+# CATEGORY INDEX
+# -----------------------------
+class CategoryIndex:
+    """Immutable extension -> category lookup compiled from the categories config.
+
+    Extensions are case-folded and may span several suffixes (".tar.gz"); the
+    longest configured suffix of a filename wins. When an extension is listed
+    in more than one category, the category that comes first in the config
+    owns it, so e.g. ".csv" always resolves to Documents rather than
+    Spreadsheets with the default categories.
+    """
+
+    __slots__ = ("_by_suffix", "_max_parts", "categories", "fallback")
+
+    def __init__(self, categories, fallback="Misc"):
+        by_suffix = {}
+        max_parts = 1
+        for category, extensions in categories.items():
+            for ext in extensions:
+                suffix = ext.strip().lower()
+                if not suffix:
+                    continue
+                if not suffix.startswith("."):
+                    suffix = "." + suffix
+                if suffix in by_suffix:
+                    if by_suffix[suffix] != category:
+                        logging.debug(f"Extension {suffix} is in both {by_suffix[suffix]} and {category}; "
+                                      f"using {by_suffix[suffix]}")
+                    continue
+                by_suffix[suffix] = category
+                max_parts = max(max_parts, suffix.count("."))
+        object.__setattr__(self, "_by_suffix", MappingProxyType(by_suffix))
+        object.__setattr__(self, "_max_parts", max_parts)
+        object.__setattr__(self, "categories", tuple(categories))
+        object.__setattr__(self, "fallback", fallback)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CategoryIndex is immutable")
+
+    def suffix_of(self, filename):
+        """Return the longest configured suffix of a filename, or its plain extension"""
+        name = filename.lower()
+        if self._max_parts > 1:
+            # Collect the positions of the last few dots, then try the longest suffix first
+            starts = []
+            pos = len(name)
+            for _ in range(self._max_parts):
+                pos = name.rfind(".", 0, pos)
+                if pos <= 0:
+                    break
+                starts.append(pos)
+            for start in reversed(starts[1:]):
+                if name[start:] in self._by_suffix:
+                    return name[start:]
+        return os.path.splitext(name)[1]
+
+    def extension_map(self):
+        """The extension -> category mapping, or None when a configured suffix spans several dots"""
+        return self._by_suffix if self._max_parts == 1 else None
+
+    def category_for_extension(self, ext):
+        """Look up the category of an extension such as ".pdf" """
+        return self._by_suffix.get(ext.lower(), self.fallback)
+
+    def category_for(self, filename):
+        """Look up the category of a filename"""
+        return self._by_suffix.get(self.suffix_of(filename), self.fallback)
+
+    def category_for_content(self, filename, kind):
+        """Category of a file whose content was identified as ``kind`` (see ContentSniffer).
+
+        The extension still decides when it fits the content (a .docx is a
+        ZIP, an .m4a is MP4); otherwise, or without an extension, the content does.
+        """
+        suffix = self.suffix_of(filename)
+        if suffix and suffix in CONTENT_FAMILIES[kind]:
+            return self._by_suffix.get(suffix, self.fallback)
+        return self._by_suffix.get(kind, self.fallback)
+
+
+# -----------------------------
+# CATEGORY RULES
+# -----------------------------
+SIZE_UNITS = {"b": 1, "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3, "tb": 1024 ** 4}
+
+
+def parse_size(value):
+    """Bytes from a number or a string such as "1 GB" or "500mb" (units are powers of 1024)"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().lower().replace(" ", "")
+    number = text.rstrip("kmgtb")
+    unit = text[len(number):] or "b"
+    if not unit.endswith("b"):
+        unit += "b"
+    if unit not in SIZE_UNITS:
+        raise ValueError(f"Unknown size unit in {value!r}")
+    return int(float(number) * SIZE_UNITS[unit])
+
+
+def _interval_masks(intervals, free_mask):
+    """Bucket [low, high) intervals by their edges for bisect_right lookups; returns (edges, masks).
+
+    ``intervals`` maps a rule bit to (low, high), None meaning unbounded.
+    Every value in bucket i lies in [edges[i - 1], edges[i]), so each
+    interval covers a bucket either completely or not at all. Rules in
+    ``free_mask`` have no such condition and are set in every bucket.
+    """
+    edges = sorted({edge for interval in intervals.values() for edge in interval if edge is not None})
+    masks = []
+    for i in range(len(edges) + 1):
+        bucket_low = edges[i - 1] if i > 0 else None
+        bucket_high = edges[i] if i < len(edges) else None
+        mask = free_mask
+        for bit, (low, high) in intervals.items():
+            if ((low is None or (bucket_low is not None and bucket_low >= low)) and
+                    (high is None or (bucket_high is not None and bucket_high <= high))):
+                mask |= bit
+        masks.append(mask)
+    return edges, masks
+
+
+class RuleSet:
+    """Category rules from config["rules"], compiled once per run into a decision structure.
+
+    A rule sends the files it matches to its category, which may name a
+    subfolder ("Archives/Large"). Its conditions are optional and must all
+    hold: "extensions", "min_size"/"max_size" (bytes or "1 GB"),
+    "min_age_days"/"max_age_days" (by modification time), "glob" and
+    "regex" on the filename, and "subpath" (a folder under the source).
+    The first matching rule wins; files no rule matches fall back to the
+    extension categories. Invalid rules are logged and left out.
+
+    Each rule is one bit of an int, in priority order. The extension picks
+    the candidate mask with one dict lookup, so files no rule can apply to
+    cost nothing more. Size and age narrow the mask with one bisect each
+    over buckets computed up front, all name patterns are ruled out at once
+    by a merged regex, and subpath masks are cached per folder. Only then
+    are the name patterns of the remaining rules tried, in priority order,
+    stopping at the first rule that matches.
+
+    With a ``category_index``, classify() gives the final category in one
+    pass: the extension's entry holds both its rule mask and its extension
+    category, so a file whose extension no rule can apply to costs the
+    same single dict lookup as the extension categories alone. Rules
+    without an "extensions" condition (plain globs, subpaths) apply to
+    every extension, so with those every file pays for the checks above.
+    """
+
+    DISPATCH_LIMIT = 4096  # Distinct extensions whose entry is cached
+
+    def __init__(self, rules, source_folder, now=None, category_index=None):
+        import fnmatch
+        import re
+
+        self.source_folder = os.path.normcase(os.path.abspath(source_folder))
+        self.categories = []
+        self.folders = set()  # Top-level destination folders the rules create
+        ext_rules = {}  # ext -> mask of rules listing it
+        any_ext_mask = 0
+        self._sizes = {}
+        self._ages = {}
+        self._patterns = {}  # bit -> compiled name patterns of the rule, all of which must match
+        self._subpaths = []  # (bit, normalized subpath)
+        anchored = []  # Pattern sources that can only match at the start of the name
+        floating = []
+        for spec in rules:
+            try:
+                category = os.path.normpath(spec["category"].replace("\\", "/"))
+                if os.path.isabs(category) or category.split(os.sep)[0] in ("", os.curdir, os.pardir):
+                    raise ValueError(f"category must be a folder name under the destination: {spec['category']!r}")
+                bit = 1 << len(self.categories)
+                extensions = spec.get("extensions", ())
+                if isinstance(extensions, str):
+                    extensions = [extensions]
+                extensions = [ext.strip().lower() for ext in extensions]
+                sizes = (spec.get("min_size"), spec.get("max_size"))
+                sizes = tuple(None if value is None else parse_size(value) for value in sizes)
+                ages = (spec.get("min_age_days"), spec.get("max_age_days"))
+                ages = tuple(None if value is None else float(value) for value in ages)
+                name_patterns = []
+                if spec.get("glob"):
+                    globs = [spec["glob"]] if isinstance(spec["glob"], str) else spec["glob"]
+                    name_patterns.append("|".join(f"(?i:^{fnmatch.translate(glob)})" for glob in globs))
+                if spec.get("regex"):
+                    # Leading global flags ("(?i)...") become scoped ones, so the regex can join the merged filter
+                    name_patterns.append(re.sub(r"^\(\?([aiLmsux]+)\)(.*)$", r"(?\1:\2)", spec["regex"], flags=re.DOTALL))
+                patterns = [re.compile(source) for source in name_patterns]
+                subpath = spec.get("subpath")
+            except (AttributeError, KeyError, TypeError, ValueError, re.error) as e:
+                logging.warning(f"Ignoring invalid rule {spec!r}: {e}")
+                continue
+
+            self.categories.append(category)
+            self.folders.add(category.split(os.sep)[0])
+            if extensions:
+                for ext in extensions:
+                    ext = ext if ext.startswith(".") else "." + ext
+                    ext_rules[ext] = ext_rules.get(ext, 0) | bit
+            else:
+                any_ext_mask |= bit
+            if sizes != (None, None):
+                self._sizes[bit] = sizes
+            if ages != (None, None):
+                self._ages[bit] = ages
+            if patterns:
+                self._patterns[bit] = patterns
+            for source in name_patterns:
+                is_anchored = source.startswith("(?i:^") or re.match(r"(\(\?[aiLmsux]+:)?\^", source)
+                (anchored if is_anchored else floating).append(source)
+            if subpath:
+                subpath = os.path.normcase(os.path.normpath(subpath)).replace(os.sep, "/").strip("/")
+                self._subpaths.append((bit, subpath))
+
+        self.all_mask = (1 << len(self.categories)) - 1
+        # Rules without an extension condition are candidates for every extension
+        self._ext_masks = {ext: mask | any_ext_mask for ext, mask in ext_rules.items()}
+        self._any_ext_mask = any_ext_mask
+        # Rule bits are distinct, so summing them gives their union
+        self._size_edges, self._size_masks = _interval_masks(self._sizes, self.all_mask & ~sum(self._sizes))
+        self._size_mask = sum(self._sizes)
+        self._age_mask = sum(self._ages)
+        self._name_mask = sum(self._patterns)
+        # One match (anchored patterns) and one search (the rest) rule out every name pattern
+        # for most files; None if the patterns cannot be merged
+        self._name_filters = []
+        try:
+            if anchored:
+                self._name_filters.append(re.compile("|".join(f"(?:{source})" for source in anchored)).match)
+            if floating:
+                self._name_filters.append(re.compile("|".join(f"(?:{source})" for source in floating)).search)
+        except re.error:
+            self._name_filters = None
+        self._subpath_mask = 0
+        for bit, _ in self._subpaths:
+            self._subpath_mask |= bit
+        self.category_index = category_index
+        # Extension categories can be cached per extension unless a suffix like ".tar.gz" needs the whole name
+        self._ext_categories = category_index.extension_map() if category_index is not None else None
+        self._dispatch = {}  # ext -> (rule mask, extension category or None)
+        self.set_now(time.time() if now is None else now)
+
+    def __len__(self):
+        return len(self.categories)
+
+    def set_now(self, now):
+        """Recompute the age buckets for a run starting at ``now``"""
+        cutoffs = {}
+        for bit, (min_days, max_days) in self._ages.items():
+            # Older than min_days means an mtime before now - min_days
+            low = None if max_days is None else now - max_days * 86400
+            high = None if min_days is None else now - min_days * 86400
+            cutoffs[bit] = (low, high)
+        self._age_edges, self._age_masks = _interval_masks(cutoffs, self.all_mask & ~sum(self._ages))
+        self._dir_masks = {}
+
+    def category_for(self, record, kind=None):
+        """Category of the first rule matching a FileRecord, or None; ``kind`` is its sniffed type"""
+        mask = self._ext_masks.get(self._extension(record.name, kind), self._any_ext_mask)
+        return self._match(record, mask) if mask else None
+
+    def classify(self, record, kind=None):
+        """Category of a FileRecord: its first matching rule's, else its extension's (needs a category_index)"""
+        filename = record.name
+        # Same result as os.path.splitext(), which costs more than the rest of the lookup
+        dot = filename.rfind(".")
+        ext = filename[dot:].lower() if dot > 0 and (filename[0] != "." or filename[:dot].strip(".")) else ""
+        if kind and ext not in CONTENT_FAMILIES[kind]:
+            ext = kind
+        entry = self._dispatch.get(ext)
+        if entry is None:
+            entry = self._dispatch_entry(ext)
+        mask, category = entry
+        if mask:
+            matched = self._match(record, mask)
+            if matched is not None:
+                return matched
+        if category is None:
+            if kind:
+                return self.category_index.category_for_content(filename, kind)
+            return self.category_index.category_for(filename)
+        return category
+
+    def _dispatch_entry(self, ext):
+        categories = self._ext_categories
+        entry = (self._ext_masks.get(ext, self._any_ext_mask),
+                 None if categories is None else categories.get(ext, self.category_index.fallback))
+        if len(self._dispatch) < self.DISPATCH_LIMIT:
+            self._dispatch[ext] = entry
+        return entry
+
+    @staticmethod
+    def _extension(filename, kind):
+        # Same result as os.path.splitext(), which costs more than the rest of the lookup
+        dot = filename.rfind(".")
+        ext = filename[dot:].lower() if dot > 0 and (filename[0] != "." or filename[:dot].strip(".")) else ""
+        if kind and ext not in CONTENT_FAMILIES[kind]:
+            ext = kind
+        return ext
+
+    def _match(self, record, mask):
+        """Narrow a nonzero candidate mask to the first rule that matches, or None"""
+        filename = record.name
+        # Rules without size or age conditions pass every bucket, so most extensions skip the bisects
+        if mask & self._size_mask:
+            mask &= self._size_masks[bisect.bisect_right(self._size_edges, record.size)]
+        if mask & self._age_mask:
+            mask &= self._age_masks[bisect.bisect_right(self._age_edges, record.mtime)]
+        if mask & self._name_mask and self._name_filters is not None:
+            for test in self._name_filters:
+                if test(filename) is not None:
+                    break
+            else:
+                mask &= ~self._name_mask
+        if mask & self._subpath_mask:
+            directory = record.directory
+            dir_mask = self._dir_masks.get(directory)
+            if dir_mask is None:
+                dir_mask = self._dir_masks[directory] = self._subpath_matches(directory)
+            mask &= dir_mask | ~self._subpath_mask
+        # Remaining candidates in priority order; only their own name patterns are left to check,
+        # and only until one matches
+        while mask:
+            bit = mask & -mask
+            patterns = self._patterns.get(bit)
+            if patterns is None:
+                return self.categories[bit.bit_length() - 1]
+            for pattern in patterns:
+                if pattern.search(filename) is None:
+                    break
+            else:
+                return self.categories[bit.bit_length() - 1]
+            mask ^= bit
+        return None
+
+    def _subpath_matches(self, directory):
+        """Mask of the subpath rules whose folder contains ``directory``"""
+        relative = os.path.relpath(os.path.normcase(os.path.abspath(directory)), self.source_folder)
+        relative = relative.replace(os.sep, "/")
+        mask = 0
+        for bit, subpath in self._subpaths:
+            if relative == subpath or relative.startswith(subpath + "/"):
+                mask |= bit
+        return mask
+
+
+# -----------------------------
+# STREAMING SOURCE SCANNER
+# -----------------------------
+RACY_MTIME_SECONDS = 2.0  # Folder mtimes this close to a listing may hide a later change (FAT has 2 s steps)
+SNAPSHOT_DB_FILE = os.path.join(APP_DATA_DIR, "snapshots.db")
+SNAPSHOT_MAX_AGE = 7 * 86400  # Force a full rescan this often, for filesystems with unreliable folder mtimes
+
+
+class SourceSnapshot:
+    """Persistent record of the folders of a source tree, for incremental scans.
+
+    For every folder listed it keeps the mtime and inode seen just before
+    listing, plus the subfolders found. Adding, removing or renaming an
+    entry changes a folder's mtime, so a folder whose mtime is unchanged
+    holds nothing new and is only stat'ed; the scan descends through its
+    known subfolders without listing it. Folders are forgotten (listed
+    again next time) when their mtime was too recent to be trusted, or
+    when mark_dirty() says files were left in them during the run. The
+    whole snapshot is dropped when the scan options change or it is older
+    than SNAPSHOT_MAX_AGE.
+    """
+
+    def __init__(self, root, fingerprint, path=SNAPSHOT_DB_FILE):
+        import sqlite3
+
+        self.root = root
+        self._dirs = {}  # folder -> (mtime_ns, inode, subfolder names)
+        self._changes = {}  # folder -> new row, or None to delete
+        self._dirty = set()  # Folders that must be listed again next time, whatever their mtime
+        self._db = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._db = sqlite3.connect(path)
+            self._db.executescript(
+                "CREATE TABLE IF NOT EXISTS roots (root TEXT PRIMARY KEY, fingerprint TEXT, full_scan REAL);"
+                "CREATE TABLE IF NOT EXISTS dirs (root TEXT, path TEXT, mtime INTEGER, ino INTEGER, "
+                "subdirs TEXT, PRIMARY KEY (root, path)) WITHOUT ROWID;")
+            row = self._db.execute("SELECT fingerprint, full_scan FROM roots WHERE root = ?", (root,)).fetchone()
+            if row and row[0] == fingerprint and time.time() - row[1] < SNAPSHOT_MAX_AGE:
+                for path_, mtime, ino, subdirs in self._db.execute(
+                        "SELECT path, mtime, ino, subdirs FROM dirs WHERE root = ?", (root,)):
+                    self._dirs[path_] = (mtime, ino, json.loads(subdirs))
+            else:
+                # New root, different options or too old: start over with a full scan
+                self._db.execute("DELETE FROM dirs WHERE root = ?", (root,))
+                self._db.execute("INSERT OR REPLACE INTO roots VALUES (?, ?, ?)", (root, fingerprint, time.time()))
+                self._db.commit()
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logging.warning(f"Scan snapshot unavailable, scanning everything: {e}")
+            self._db = None
+
+    def __len__(self):
+        return len(self._dirs)
+
+    def unchanged_subdirs(self, directory):
+        """Return the known subfolders of an unchanged folder, or None if it must be listed"""
+        known = self._dirs.get(directory)
+        if known is None:
+            return None
+        try:
+            st = os.stat(directory)
+        except OSError:
+            return None
+        if st.st_mtime_ns != known[0] or st.st_ino != known[1]:
+            return None
+        return [os.path.join(directory, name) for name in known[2]]
+
+    def record(self, directory, st, subdirs):
+        """Remember a folder listed right after ``st`` was taken"""
+        if directory in self._dirty or time.time_ns() - st.st_mtime_ns < RACY_MTIME_SECONDS * 1e9:
+            # Another change within the same timestamp tick would go unnoticed
+            self.forget(directory)
+            return
+        names = sorted(os.path.basename(subdir) for subdir in subdirs)
+        previous = self._dirs.get(directory)
+        if previous is not None:
+            for name in set(previous[2]) - set(names):
+                self._forget_tree(os.path.join(directory, name))
+        row = (st.st_mtime_ns, st.st_ino, names)
+        if previous != row:
+            self._dirs[directory] = row
+            self._changes[directory] = row
+
+    def mark_dirty(self, directory):
+        """Make the next scan list a folder again, e.g. because files were left in it"""
+        if directory not in self._dirty:
+            self._dirty.add(directory)
+            self.forget(directory)
+
+    def forget(self, directory):
+        if self._dirs.pop(directory, None) is not None or directory in self._changes:
+            self._changes[directory] = None
+
+    def _forget_tree(self, top):
+        known = self._dirs.get(top)
+        self.forget(top)
+        if known is not None:
+            for name in known[2]:
+                self._forget_tree(os.path.join(top, name))
+
+    def save(self):
+        """Write the folders that changed during this scan"""
+        if self._db is None or not self._changes:
+            return
+        try:
+            self._db.executemany("DELETE FROM dirs WHERE root = ? AND path = ?",
+                                 [(self.root, d) for d, row in self._changes.items() if row is None])
+            self._db.executemany("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?)",
+                                 [(self.root, d, row[0], row[1], json.dumps(row[2]))
+                                  for d, row in self._changes.items() if row is not None])
+            self._db.commit()
+            self._changes.clear()
+        except Exception as e:
+            logging.warning(f"Could not save scan snapshot: {e}")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class FileRecord:
+    """What the pipeline knows about one file, taken from a single stat during the scan.
+
+    Classification, date folders, duplicate detection and the move read
+    these fields instead of asking the filesystem again. Directory listings
+    on Windows carry no file ID (st_ino is 0); identity() then stats the
+    file once, and only for the stages that need it.
+    """
+
+    __slots__ = ("path", "name", "directory", "size", "mtime", "mtime_ns", "dev", "ino", "seq")
+
+    def __init__(self, path, name, directory, st):
+        self.seq = 0  # Position in the scan, counting from 1, for checkpoints
+        self.path = path
+        self.name = name
+        self.directory = directory
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+        self.mtime_ns = st.st_mtime_ns
+        self.dev = st.st_dev
+        self.ino = st.st_ino
+
+    @classmethod
+    def from_entry(cls, entry):
+        """Record a DirEntry, or anything else with path, name and stat()"""
+        return cls(entry.path, entry.name, os.path.dirname(entry.path), entry.stat())
+
+    def identity(self):
+        """(device, inode, size, mtime_ns), the key of the hash and sniff caches"""
+        if not self.ino:
+            st = os.stat(self.path)
+            self.dev = st.st_dev
+            self.ino = st.st_ino
+        return self.dev, self.ino, self.size, self.mtime_ns
+
+
+class SourceScanner:
+    """Lazily yield the files under a source folder using os.scandir.
+
+    Directories are visited depth-first from an explicit stack, so only one
+    directory handle is open at a time and memory is bounded by the number
+    of directories still waiting to be listed, not by the number of files.
+    With a SourceSnapshot, folders that did not change since the last scan
+    are stat'ed instead of listed. With a RunCheckpoint, every listed folder
+    is reported to it, and folders an interrupted run already finished are
+    skipped without even a stat.
+    """
+
+    def __init__(self, source_folder, recursive=True, excluded_dirs=(), snapshot=None, checkpoint=None):
+        self.source_folder = source_folder
+        self.recursive = recursive
+        self.excluded_dirs = {os.path.normcase(os.path.abspath(d)) for d in excluded_dirs}
+        self.snapshot = snapshot
+        self.checkpoint = checkpoint
+        self.files_found = 0
+        self.dirs_scanned = 0
+        self.dirs_unchanged = 0
+        self.dirs_resumed = 0
+        self.dirs_pending = 0
+        self.finished = False
+
+    def __iter__(self):
+        # Normalized so os.path.dirname() of a yielded path is exactly the folder that was listed
+        pending = [os.path.normpath(self.source_folder)]
+        snapshot = self.snapshot
+        checkpoint = self.checkpoint
+        while pending:
+            current = pending.pop()
+            self.dirs_pending = len(pending)
+            if checkpoint is not None:
+                known = checkpoint.finished_subdirs(current)
+                if known is not None:
+                    self.dirs_resumed += 1
+                    pending.extend(reversed(known))
+                    self.dirs_pending = len(pending)
+                    continue
+            if snapshot is not None:
+                known = snapshot.unchanged_subdirs(current)
+                if known is not None:
+                    self.dirs_unchanged += 1
+                    if checkpoint is not None:
+                        checkpoint.listed(current, known, self.files_found)
+                    pending.extend(reversed(known))
+                    self.dirs_pending = len(pending)
+                    continue
+            subdirs = []
+            try:
+                # Taken before listing, so a change made while listing shows up as a newer mtime next time
+                st = os.stat(current) if snapshot is not None else None
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        if is_dir:
+                            # Like os.walk, symlinked directories are listed but never followed
+                            if self.recursive and not entry.is_symlink() and not self.is_excluded(entry.path):
+                                subdirs.append(entry.path)
+                                self.dirs_pending += 1
+                            continue
+                        self.files_found += 1
+                        yield entry
+                if snapshot is not None:
+                    snapshot.record(current, st, subdirs)
+                if checkpoint is not None:
+                    checkpoint.listed(current, subdirs, self.files_found)
+            except OSError as e:
+                logging.warning(f"Could not scan folder {current}: {e}")
+                if snapshot is not None:
+                    snapshot.forget(current)
+            self.dirs_scanned += 1
+            # Reversed so subfolders are visited in listing order
+            pending.extend(reversed(subdirs))
+            self.dirs_pending = len(pending)
+        self.finished = True
+
+    def is_excluded(self, path):
+        """Check whether a folder must not be descended into"""
+        return bool(self.excluded_dirs) and os.path.normcase(os.path.abspath(path)) in self.excluded_dirs
+
+    def estimated_total(self):
+        """Estimate the total file count from the folders scanned so far"""
+        if self.finished or not self.dirs_pending:
+            return self.files_found
+        files_per_dir = self.files_found / max(self.dirs_scanned, 1)
+        return self.files_found + int(files_per_dir * self.dirs_pending)
+
+
+# -----------------------------
+# FILE TRANSFER
+# -----------------------------
+# Cross-device copies move data in large chunks; the kernel-side paths never
+# touch Python buffers at all
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+
+_copy_buffers = threading.local()
+
+
+class DeviceMap:
+    """Remember which device folders live on, so each source/destination pair is checked once"""
+
+    def __init__(self):
+        self._devices = {}
+        self._pairs = {}
+
+    def device_of(self, directory):
+        """Return st_dev of a folder, or of its nearest existing parent; None if neither can be stat'ed"""
+        if directory in self._devices:
+            return self._devices[directory]
+        try:
+            device = os.stat(directory).st_dev
+        except FileNotFoundError:
+            # Absolute, so a relative folder such as "dst" still has a parent to walk up to
+            parent = os.path.dirname(os.path.abspath(directory))
+            # A folder that does not exist yet will be created on its parent's device
+            device = None if parent == os.path.abspath(directory) else self.device_of(parent)
+        except OSError as e:
+            logging.warning(f"Could not find the device of {directory}: {e}")
+            device = None
+        self._devices[directory] = device
+        return device
+
+    def same_device(self, source_dir, dest_dir):
+        """Check whether a rename between two folders can stay on one device"""
+        key = (source_dir, dest_dir)
+        same = self._pairs.get(key)
+        if same is None:
+            source_device, dest_device = self.device_of(source_dir), self.device_of(dest_dir)
+            # When a device is unknown, try the rename; move_within_device() copies on EXDEV
+            same = source_device is None or dest_device is None or source_device == dest_device
+            self._pairs[key] = same
+        return same
+
+
+class DirectoryCache:
+    """Per-run registry of destination folders, so each one is created only once"""
+
+    def __init__(self):
+        self._known = set()
+
+    def ensure(self, directory):
+        """Create a folder (and its parents) unless this run already did"""
+        if directory not in self._known:
+            os.makedirs(directory, exist_ok=True)
+            self._known.add(directory)
+        return directory
+
+
+class DestinationNameIndex:
+    """In-memory index of destination folder contents for O(1) collision handling.
+
+    Each folder is listed with a single scandir the first time it is used.
+    After that, names are reserved in memory and a per-base-name counter
+    remembers the next suffix to try, so resolving "invoice.pdf" does not
+    cost one stat per existing "invoice_<n>.pdf". Reserving also closes the
+    gap between checking a name and moving a file onto it.
+    """
+
+    def __init__(self, on_listed=None):
+        self.on_listed = on_listed  # Called with (folder, DirEntry) for everything already on disk
+        # Set when the index outlives a run (watch mode): a name it thinks free is then
+        # confirmed with one lstat, as the folder may have changed since it was listed
+        self.check_disk = False
+        self._names = {}  # folder -> normcased names present or reserved
+        self._next_suffix = {}  # (folder, base, ext) -> next counter to try
+        self._lock = threading.Lock()
+
+    def _names_in(self, directory):
+        names = self._names.get(directory)
+        if names is None:
+            names = set()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        names.add(os.path.normcase(entry.name))
+                        if self.on_listed is not None:
+                            self.on_listed(directory, entry)
+            except FileNotFoundError:
+                pass
+            self._names[directory] = names
+        return names
+
+    def load(self, directory):
+        """Make sure a folder has been listed"""
+        with self._lock:
+            self._names_in(directory)
+
+    def exists(self, path):
+        """Check whether a destination path is taken on disk or reserved"""
+        directory, name = os.path.split(path)
+        with self._lock:
+            names = self._names_in(directory)
+            return os.path.normcase(name) in names or self._taken_on_disk(directory, name, names)
+
+    def _taken_on_disk(self, directory, name, names):
+        if self.check_disk and os.path.lexists(os.path.join(directory, name)):
+            names.add(os.path.normcase(name))
+            return True
+        return False
+
+    def reserve(self, path):
+        """Claim a path, or its first free "<base>_<n><ext>" variant, and return the claimed path"""
+        directory, name = os.path.split(path)
+        with self._lock:
+            names = self._names_in(directory)
+            key = os.path.normcase(name)
+            if key not in names and not self._taken_on_disk(directory, name, names):
+                names.add(key)
+                return path
+
+            base, ext = os.path.splitext(name)
+            counter_key = (directory, os.path.normcase(base), os.path.normcase(ext))
+            counter = self._next_suffix.get(counter_key, 1)
+            candidate = f"{base}_{counter}{ext}"
+            while os.path.normcase(candidate) in names or self._taken_on_disk(directory, candidate, names):
+                counter += 1
+                candidate = f"{base}_{counter}{ext}"
+            self._next_suffix[counter_key] = counter + 1
+            names.add(os.path.normcase(candidate))
+            return os.path.join(directory, candidate)
+
+    def release(self, path):
+        """Give back a reserved path whose move did not happen"""
+        directory, name = os.path.split(path)
+        with self._lock:
+            names = self._names.get(directory)
+            if names is not None:
+                names.discard(os.path.normcase(name))
+
+
+def move_within_device(source, destination):
+    """Move a file with a plain rename; returns (renamed, bytes_copied)"""
+    try:
+        os.rename(source, destination)
+    except OSError as e:
+        # Bind mounts and some network shares report one device but refuse renames
+        if e.errno != errno.EXDEV:
+            raise
+        return move_across_devices(source, destination)
+    return True, 0
+
+
+def move_across_devices(source, destination):
+    """Copy a file to another device, then remove the original; returns (renamed, bytes_copied)"""
+    if os.path.islink(source):
+        # Let shutil recreate the link rather than copying what it points to
+        shutil.move(source, destination)
+        return False, 0
+
+    copied = copy_file_contents(source, destination)
+    shutil.copystat(source, destination)
+    os.unlink(source)
+    return False, copied
+
+
+def copy_file_contents(source, destination):
+    """Copy file data using copy_file_range/sendfile where available, else large buffered reads"""
+    with open(source, "rb") as fsrc:
+        # Exclusive create so a copy never overwrites a file that appeared meanwhile
+        with open(destination, "xb") as fdst:
+            try:
+                return _copy_fileobj(fsrc, fdst)
+            except BaseException:
+                fdst.close()
+                os.unlink(destination)
+                raise
+
+
+def _copy_fileobj(fsrc, fdst):
+    infd, outfd = fsrc.fileno(), fdst.fileno()
+
+    if hasattr(os, "copy_file_range"):
+        copied = 0
+        try:
+            while True:
+                sent = os.copy_file_range(infd, outfd, COPY_CHUNK_SIZE)
+                if not sent:
+                    return copied
+                copied += sent
+        except OSError as e:
+            # Unsupported between these filesystems; fall through if nothing was written yet
+            if copied or e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM):
+                raise
+
+    if sys.platform.startswith("linux"):
+        copied = 0
+        try:
+            while True:
+                sent = os.sendfile(outfd, infd, copied, COPY_CHUNK_SIZE)
+                if not sent:
+                    return copied
+                copied += sent
+        except OSError as e:
+            if copied or e.errno not in (errno.ENOSYS, errno.EINVAL, errno.ENOTSOCK, errno.EOPNOTSUPP):
+                raise
+
+    buffer = getattr(_copy_buffers, "buffer", None)
+    if buffer is None:
+        buffer = _copy_buffers.buffer = memoryview(bytearray(COPY_BUFFER_SIZE))
+    copied = 0
+    while True:
+        read = fsrc.readinto(buffer)
+        if not read:
+            return copied
+        fdst.write(buffer[:read])
+        copied += read
+
+
+# -----------------------------
+# DUPLICATE DETECTION
+# -----------------------------
+HASH_BLOCK_SIZE = 64 * 1024
+HASH_READ_SIZE = 1024 * 1024
+HASH_CACHE_FILE = os.path.join(APP_DATA_DIR, "hash_cache.db")
+
+
+class HashCache:
+    """On-disk cache of file hashes keyed by (device, inode, size, mtime).
+
+    A file whose identity and modification time are unchanged is not read
+    again, so re-running over the same archive costs one fstat per candidate.
+    One cache can be shared by the organizers of a batch, from their threads.
+    """
+
+    COMMIT_EVERY = 500
+
+    def __init__(self, path=HASH_CACHE_FILE):
+        import sqlite3
+
+        self.path = path
+        self._pending = 0
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                "dev INTEGER, ino INTEGER, size INTEGER, mtime INTEGER, edge BLOB, full BLOB, "
+                "PRIMARY KEY (dev, ino, size, mtime)) WITHOUT ROWID")
+        except (sqlite3.Error, OSError) as e:
+            logging.warning(f"Hash cache unavailable, hashing without it: {e}")
+            self._db = None
+
+    def get(self, key):
+        """Return the cached (edge, full) digests for a file key"""
+        if self._db is None:
+            return None, None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT edge, full FROM hashes WHERE dev = ? AND ino = ? AND size = ? AND mtime = ?", key).fetchone()
+        return row if row else (None, None)
+
+    def put(self, key, edge, full):
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)", (*key, edge, full))
+            self._pending += 1
+            if self._pending >= self.COMMIT_EVERY:
+                self._db.commit()
+                self._pending = 0
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+
+class _HashedFile:
+    """A file taking part in duplicate detection, with lazily computed digests"""
+
+    __slots__ = ("paths", "size", "record", "key", "edge", "full")
+
+    def __init__(self, paths, size, record=None):
+        self.paths = paths  # Places to read it from, in order; the first one that opens wins
+        self.size = size
+        self.record = record  # FileRecord from the scan, which saves the fstat for the cache key
+        self.key = None
+        self.edge = None
+        self.full = None
+
+
+class DuplicateDetector:
+    """Find files whose content matches a file already seen, using staged filtering.
+
+    Files are grouped by size. Only files sharing a size get their first and
+    last blocks hashed, and only files that still match after that get a full
+    BLAKE2 hash. Digests are kept in memory for the run and in a HashCache
+    across runs.
+    """
+
+    def __init__(self, cache=None):
+        import hashlib
+
+        self._blake2b = hashlib.blake2b
+        self.cache = cache
+        self._by_size = {}
+
+    def candidate(self, record):
+        """Wrap a file (a FileRecord) that is about to be checked"""
+        return _HashedFile((record.path,), record.size, record)
+
+    def find(self, candidate):
+        """Return the registered file with the same content as a candidate, or None"""
+        group = self._by_size.get(candidate.size)
+        if not group:
+            return None
+        for known in group:
+            if self._edge_digest(known) != self._edge_digest(candidate):
+                continue
+            # Small files are fully covered by the edge blocks
+            if candidate.size <= 2 * HASH_BLOCK_SIZE or self._full_digest(known) == self._full_digest(candidate):
+                return known
+        return None
+
+    def register(self, candidate, *new_paths):
+        """Remember a file for later comparisons; new_paths are where it may be found later"""
+        # The original location stays first: it holds the complete file until a move removes it
+        candidate.paths = candidate.paths + new_paths
+        self._by_size.setdefault(candidate.size, []).append(candidate)
+
+    def register_existing(self, record):
+        self._by_size.setdefault(record.size, []).append(_HashedFile((record.path,), record.size, record))
+
+    def _identify(self, hashed, f=None):
+        """Find a file's cache key, from its record or else an open handle, and load its cached digests"""
+        key = None
+        if hashed.record is not None:
+            try:
+                key = hashed.record.identity()
+            except OSError:
+                pass  # Moved away from where it was scanned; the open handle will tell
+        if key is None:
+            if f is None:
+                return
+            st = os.fstat(f.fileno())
+            key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        hashed.key = key
+        if self.cache is not None:
+            hashed.edge, hashed.full = self.cache.get(hashed.key)
+
+    def _open(self, hashed):
+        for path in hashed.paths:
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            if hashed.key is None:
+                self._identify(hashed, f)
+            return f
+        raise FileNotFoundError(f"None of {hashed.paths} exist")
+
+    def _edge_digest(self, hashed):
+        if hashed.edge is None and hashed.key is None and hashed.record is not None:
+            # Cached digests spare opening the file at all
+            self._identify(hashed)
+        if hashed.edge is None:
+            with self._open(hashed) as f:
+                if hashed.edge is None:
+                    digest = self._blake2b(digest_size=16)
+                    digest.update(f.read(HASH_BLOCK_SIZE))
+                    if hashed.size > HASH_BLOCK_SIZE:
+                        f.seek(max(hashed.size - HASH_BLOCK_SIZE, HASH_BLOCK_SIZE))
+                        digest.update(f.read(HASH_BLOCK_SIZE))
+                    hashed.edge = digest.digest()
+                    self._store(hashed)
+        return hashed.edge
+
+    def _full_digest(self, hashed):
+        if hashed.full is None and hashed.key is None and hashed.record is not None:
+            self._identify(hashed)
+        if hashed.full is None:
+            with self._open(hashed) as f:
+                if hashed.full is None:
+                    digest = self._blake2b()
+                    for chunk in iter(lambda: f.read(HASH_READ_SIZE), b""):
+                        digest.update(chunk)
+                    hashed.full = digest.digest()
+                    self._store(hashed)
+        return hashed.full
+
+    def _store(self, hashed):
+        if self.cache is not None and hashed.key is not None:
+            self.cache.put(hashed.key, hashed.edge, hashed.full)
+
+
+# -----------------------------
+# CONTENT SNIFFING
+# -----------------------------
+SNIFF_SIZE = 512  # Bytes read from the start of a file; the tar magic sits at offset 257
+SNIFF_CACHE_FILE = os.path.join(APP_DATA_DIR, "sniff_cache.db")
+SNIFF_MODES = ("off", "extensionless", "all")
+# Leading-byte signatures, most specific first. Each maps to the extensions that
+# legitimately carry such content; the first one is used to classify the file.
+CONTENT_SIGNATURES = (
+    (rb"%PDF-", (".pdf", ".ai")),
+    (rb"\x89PNG\r\n\x1a\n", (".png", ".apng")),
+    (rb"\xff\xd8\xff", (".jpg", ".jpeg", ".jpe", ".jfif")),
+    (rb"GIF8[79]a", (".gif",)),
+    (rb"RIFF.{4}WEBP", (".webp",)),
+    (rb"RIFF.{4}WAVE", (".wav",)),
+    (rb"RIFF.{4}AVI ", (".avi",)),
+    (rb"BM.{4}\x00\x00\x00\x00", (".bmp", ".dib")),
+    (rb"II\*\x00|MM\x00\*", (".tiff", ".tif", ".dng", ".nef", ".cr2", ".arw")),
+    (rb"PK\x03\x04.{26}\[Content_Types\]\.xml", (".docx", ".xlsx", ".pptx", ".docm", ".xlsm", ".pptm")),
+    (rb"PK\x03\x04.{26}mimetypeapplication/vnd\.oasis\.opendocument\.spreadsheet", (".ods",)),
+    (rb"PK\x03\x04.{26}mimetypeapplication/vnd\.oasis\.opendocument\.text", (".odt",)),
+    (rb"PK(?:\x03\x04|\x05\x06|\x07\x08)", (".zip", ".docx", ".xlsx", ".pptx", ".docm", ".xlsm", ".pptm", ".odt",
+                                            ".ods", ".odp", ".epub", ".jar", ".apk", ".xpi", ".whl", ".appx",
+                                            ".msix", ".nupkg", ".vsix", ".kmz", ".cbz")),
+    (rb"Rar!\x1a\x07", (".rar",)),
+    (rb"7z\xbc\xaf\x27\x1c", (".7z",)),
+    (rb"\x1f\x8b", (".gz", ".tgz", ".svgz")),
+    (rb"BZh[1-9]", (".bz2", ".tbz2", ".tbz")),
+    (rb"\xfd7zXZ\x00", (".xz", ".txz")),
+    (rb".{257}ustar", (".tar",)),
+    (rb"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", (".doc", ".xls", ".ppt", ".msi", ".msg", ".pub", ".vsd")),
+    (rb"\x7fELF", (".elf", ".so", ".o", ".ko", ".bin")),
+    (rb"MZ", (".exe", ".dll", ".sys", ".scr", ".cpl", ".ocx", ".efi", ".mui", ".com")),
+    (rb".{4}ftyp(?:M4A |M4B |M4P )", (".m4a", ".m4b", ".m4p", ".mp4")),
+    (rb".{4}ftypqt  ", (".mov", ".mp4", ".m4v")),
+    (rb".{4}ftyp(?:heic|heix|mif1|avif)", (".heic", ".heif", ".avif")),
+    (rb".{4}ftyp", (".mp4", ".m4v", ".mov", ".m4a", ".3gp", ".3g2", ".f4v")),
+    (rb"\x1a\x45\xdf\xa3", (".mkv", ".webm", ".mka", ".mk3d")),
+    (rb"FLV\x01", (".flv",)),
+    (rb"\x30\x26\xb2\x75\x8e\x66\xcf\x11", (".wmv", ".wma", ".asf")),
+    (rb"ID3|\xff[\xfb\xf3\xf2]", (".mp3",)),
+    (rb"fLaC", (".flac",)),
+    (rb"OggS", (".ogg", ".oga", ".ogv", ".opus")),
+    (rb"\{\\rtf", (".rtf",)),
+)
+# Bump when the table changes, so cached verdicts made with the old table are ignored
+SNIFF_TABLE_VERSION = 1
+CONTENT_FAMILIES = {extensions[0]: frozenset(extensions) for _, extensions in reversed(CONTENT_SIGNATURES)}
+
+
+class SniffCache:
+    """On-disk cache of content types keyed by (device, inode, size, mtime).
+
+    Files that matched no signature are cached too (as ""), so a folder of
+    unknown files is read once, not on every run. Like HashCache, it can be
+    shared between threads.
+    """
+
+    COMMIT_EVERY = 500
+
+    def __init__(self, path=SNIFF_CACHE_FILE):
+        import sqlite3
+
+        self.path = path
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._table = f"kinds_v{SNIFF_TABLE_VERSION}"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                "dev INTEGER, ino INTEGER, size INTEGER, mtime INTEGER, kind TEXT, "
+                "PRIMARY KEY (dev, ino, size, mtime)) WITHOUT ROWID")
+        except (sqlite3.Error, OSError) as e:
+            logging.warning(f"Sniff cache unavailable, reading every file: {e}")
+            self._db = None
+
+    def get(self, key):
+        """Return the cached kind for a file key, or None"""
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT kind FROM {self._table} WHERE dev = ? AND ino = ? AND size = ? AND mtime = ?",
+                key).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, kind):
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(f"INSERT OR REPLACE INTO {self._table} VALUES (?, ?, ?, ?, ?)", (*key, kind))
+            self._pending += 1
+            if self._pending >= self.COMMIT_EVERY:
+                self._db.commit()
+                self._pending = 0
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+
+class ContentSniffer:
+    """Identify file types from their leading bytes.
+
+    The signature table is compiled into one anchored regex whose matching
+    alternative names the type. Each thread reads into its own reused
+    buffer, so a sniff costs one open and one read of SNIFF_SIZE bytes and
+    allocates nothing per file. prefetch() sniffs ahead of the scan on a
+    thread pool and hands entries back in scan order, so the organizer only
+    waits when the pool falls behind. Kinds are the first extension of the
+    matching signature (".pdf"), or "" when nothing matched.
+    """
+
+    def __init__(self, mode="extensionless", cache=None, workers=1):
+        import re
+
+        self.mode = mode
+        self.cache = cache
+        self.workers = max(1, int(workers))
+        self.window = self.workers * 8
+        self.recognized = 0  # Files whose type was found from their content
+        self.seconds = 0.0  # Time the scan spent on cache lookups and waiting for sniff results
+        self._kinds = []
+        parts = []
+        for signature, extensions in CONTENT_SIGNATURES:
+            parts.append(b"(?P<k%d>%s)" % (len(self._kinds), signature))
+            self._kinds.append(extensions[0])
+        self._pattern = re.compile(b"|".join(parts), re.DOTALL)
+        self._local = threading.local()
+        self._pool = None
+
+    def wants(self, filename):
+        """Whether a file is sniffed in this mode"""
+        if self.mode == "all":
+            return True
+        return self.mode == "extensionless" and not os.path.splitext(filename)[1]
+
+    def sniff(self, path):
+        """Return the kind of one file; runs on a worker thread"""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = bytearray(SNIFF_SIZE)
+        with open(path, "rb", buffering=0) as f:
+            length = f.readinto(buffer)
+        match = self._pattern.match(buffer, 0, length)
+        return self._kinds[int(match.lastgroup[1:])] if match else ""
+
+    def prefetch(self, records):
+        """Yield (record, kind) for FileRecords in order; kind is None for files not sniffed"""
+        pending = deque()
+        try:
+            for record in records:
+                kind = key = future = None
+                if self.wants(record.name):
+                    start = time.perf_counter()
+                    try:
+                        key = record.identity()
+                        kind = self.cache.get(key) if self.cache is not None else None
+                        if kind is None:
+                            future = self._submit(record.path)
+                    except OSError:
+                        kind = ""  # Unreadable here; the move will report the real problem
+                    self.seconds += time.perf_counter() - start
+                pending.append((record, key, kind, future))
+                while pending and (len(pending) > self.window or pending[0][3] is None or pending[0][3].done()):
+                    yield self._resolve(*pending.popleft())
+            while pending:
+                yield self._resolve(*pending.popleft())
+        finally:
+            for _, _, _, future in pending:
+                if future is not None:
+                    future.cancel()
+
+    def _submit(self, path):
+        from concurrent.futures import Future
+
+        if self.workers == 1:
+            future = Future()
+            try:
+                future.set_result(self.sniff(path))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if self._pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="FileSortSniff")
+        return self._pool.submit(self.sniff, path)
+
+    def _resolve(self, record, key, kind, future):
+        if future is not None:
+            start = time.perf_counter()
+            try:
+                kind = future.result()
+            except OSError:
+                kind = None  # Not cached: the file may be readable next time
+            self.seconds += time.perf_counter() - start
+            if kind is not None and self.cache is not None:
+                self.cache.put(key, kind)
+        if kind:
+            self.recognized += 1
+        return record, kind
+
+    def close(self):
+        """Stop the sniffing threads; the cache belongs to the caller"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+# -----------------------------
+# PARALLEL MOVE EXECUTION
+# -----------------------------
+class MoveCancelled(Exception):
+    """Raised for a queued move that was dropped because the run was stopped"""
+
+
+class MoveJob:
+    """A single file move decided by the organizer"""
+
+    __slots__ = ("source", "destination", "filename", "category", "same_device", "index", "size")
+
+    def __init__(self, source, destination, filename, category, same_device=True, index=None, size=0):
+        self.source = source
+        self.destination = destination
+        self.filename = filename
+        self.category = category
+        self.same_device = same_device
+        self.index = index  # Position in the scan for organize jobs, in the journal for revert jobs
+        self.size = size
+
+
+class MoveExecutor:
+    """Run move jobs on a thread pool and hand back their outcomes in submission order.
+
+    Outcomes are (job, result, error) tuples. At most ``window`` jobs are in
+    flight; submitting beyond that blocks on the oldest job, which keeps
+    memory bounded while a streaming scan feeds the executor. With a single
+    worker jobs run inline on the calling thread.
+    """
+
+    def __init__(self, workers=1, should_stop=None, window=None):
+        self.workers = max(1, int(workers))
+        self.should_stop = should_stop or (lambda: False)
+        self.window = window or self.workers * 4
+        self._pool = None
+        if self.workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="FileSortMove")
+        self._in_flight = deque()
+
+    def submit(self, job, func):
+        """Queue a job and return the outcomes that are ready, oldest first"""
+        if self._pool is None:
+            return [(job, *self._call(func, job))]
+
+        self._in_flight.append((job, self._pool.submit(self._call, func, job)))
+        ready = []
+        while self._in_flight and (len(self._in_flight) > self.window or self._in_flight[0][1].done()):
+            job, future = self._in_flight.popleft()
+            ready.append((job, *future.result()))
+        return ready
+
+    def drain(self):
+        """Wait for every queued job and return their outcomes in submission order"""
+        ready = []
+        while self._in_flight:
+            job, future = self._in_flight.popleft()
+            ready.append((job, *future.result()))
+        return ready
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    def _call(self, func, job):
+        # Jobs that have not started when a stop is requested are dropped, so the
+        # results only ever count moves that really happened
+        if self.should_stop():
+            return None, MoveCancelled()
+        try:
+            return func(job), None
+        except Exception as e:
+            return None, e
+
+
+class IOScheduler:
+    """Global limit on concurrent file moves, shared fairly by the jobs of a batch.
+
+    A move takes a slot with acquire(owner) and gives it back with release().
+    While all slots are busy, waiting moves queue up per owner and each
+    freed slot goes to the next owner in round-robin order, so a job with
+    many workers or a fast scan cannot starve the others.
+    """
+
+    def __init__(self, slots=4):
+        self.slots = max(1, int(slots))
+        self._free = self.slots
+        self._lock = threading.Lock()
+        self._waiting = {}  # owner -> deque of Events, oldest first
+        self._ring = deque()  # Owners with waiting moves, next to be served first
+
+    def acquire(self, owner):
+        with self._lock:
+            if self._free and not self._ring:
+                self._free -= 1
+                return
+            granted = threading.Event()
+            waiting = self._waiting.get(owner)
+            if waiting is None:
+                waiting = self._waiting[owner] = deque()
+                self._ring.append(owner)
+            waiting.append(granted)
+        granted.wait()
+
+    def release(self):
+        """Free a slot, handing it straight to the next waiting owner if there is one"""
+        with self._lock:
+            if not self._ring:
+                self._free += 1
+                return
+            owner = self._ring.popleft()
+            waiting = self._waiting[owner]
+            granted = waiting.popleft()
+            if waiting:
+                self._ring.append(owner)
+            else:
+                del self._waiting[owner]
+        granted.set()
+
+
+# -----------------------------
+# PROGRESS REPORTING
+# -----------------------------
+UI_REFRESH_HZ = 15
+
+
+class ProgressBatcher:
+    """Coalesce per-file statuses and progress updates into batches sent at a fixed rate.
+
+    ``deliver`` is called with a list of (filename, status) tuples and the
+    latest (current, total) progress, or None when progress did not change.
+    """
+
+    def __init__(self, deliver, refresh_hz=UI_REFRESH_HZ):
+        self.deliver = deliver
+        self.interval = 1.0 / refresh_hz
+        self._statuses = []
+        self._progress = None
+        self._next_flush = time.monotonic() + self.interval
+
+    def file(self, filename, status):
+        self._statuses.append((filename, status))
+        self._maybe_flush()
+
+    def progress(self, current, total):
+        self._progress = (current, total)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        now = time.monotonic()
+        if now >= self._next_flush:
+            self._next_flush = now + self.interval
+            self.flush()
+
+    def flush(self):
+        """Deliver whatever is pending right away"""
+        if self._statuses or self._progress is not None:
+            statuses, self._statuses = self._statuses, []
+            progress, self._progress = self._progress, None
+            self.deliver(statuses, progress)
+
+
+class LogTail:
+    """Read only what was appended to a log file since the last read.
+
+    Keeps a byte offset into the file and seeks to it, so a refresh costs
+    the size of the new data, never the size of the file. The first read
+    and any burst bigger than ``max_bytes`` only return the last
+    ``max_bytes``, since a viewer shows a bounded number of lines anyway.
+    A partial last line is held back until its newline is written. If the
+    file is truncated or replaced, reading starts over.
+    """
+
+    def __init__(self, path, max_bytes=1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.offset = 0
+        self._inode = None
+
+    def read(self):
+        """Return (text, restarted); text is "" when nothing new was written"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return "", False
+        restarted = False
+        if st.st_ino != self._inode or st.st_size < self.offset:
+            restarted = self._inode is not None
+            self._inode = st.st_ino
+            self.offset = 0
+        if st.st_size == self.offset:
+            return "", restarted
+
+        start = max(self.offset, st.st_size - self.max_bytes)
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = f.read(st.st_size - start)
+        if start > self.offset:
+            # Skipped ahead: drop the partial line we landed in
+            data = data[data.find(b"\n") + 1:]
+            restarted = restarted or self.offset > 0
+        end = data.rfind(b"\n") + 1
+        self.offset = st.st_size - (len(data) - end)
+        return data[:end].decode("utf-8", errors="replace"), restarted
+
+
+# -----------------------------
+# RUN METRICS
+# -----------------------------
+METRICS_PHASES = ("scan", "sniff", "classify", "duplicates", "collisions", "devices", "makedirs", "io_wait", "move",
+                  "journal")
+# Upper bounds (seconds) of the move latency histogram, as Prometheus "le" buckets
+MOVE_LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                        1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class RunMetrics:
+    """Per-phase timers, a move latency histogram and bytes moved for one run.
+
+    Phases are timed with time.perf_counter() on the thread doing the work.
+    Planning phases run on the scanning thread and are plain additions;
+    moves run on the worker threads and are recorded under a lock, so the
+    "move" phase is the time summed over all workers and can exceed the
+    wall-clock time of the run. "io_wait" is the time moves spent queued
+    for a slot of a batch's IOScheduler. An organizer keeps one RunMetrics
+    for its lifetime, so a plan and its later execution add up to one run.
+    """
+
+    def __init__(self, kind="organize"):
+        self.kind = kind
+        self.started = time.time()
+        self.wall_seconds = 0.0
+        self.phases = dict.fromkeys(METRICS_PHASES, 0.0)
+        self.moves = 0
+        self.bytes_moved = 0
+        self.bucket_counts = [0] * (len(MOVE_LATENCY_BUCKETS) + 1)  # Last slot is +Inf
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        self.phases[phase] += seconds
+
+    def timed(self, iterable, phase):
+        """Yield from ``iterable``, charging the time spent producing each item to ``phase``"""
+        clock = time.perf_counter
+        phases = self.phases
+        iterator = iter(iterable)
+        while True:
+            start = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                phases[phase] += clock() - start
+                return
+            phases[phase] += clock() - start
+            yield item
+
+    def observe_move(self, seconds, size, waited=0.0):
+        """Record one completed move; called from worker threads"""
+        bucket = bisect.bisect_left(MOVE_LATENCY_BUCKETS, seconds)
+        with self._lock:
+            self.bucket_counts[bucket] += 1
+            self.phases["move"] += seconds
+            self.phases["io_wait"] += waited
+            self.moves += 1
+            self.bytes_moved += size
+
+    def merge(self, other):
+        """Add the phases, moves and histogram of another run, e.g. one job of a batch"""
+        for phase, seconds in other.phases.items():
+            self.phases[phase] += seconds
+        self.moves += other.moves
+        self.bytes_moved += other.bytes_moved
+        self.bucket_counts = [a + b for a, b in zip(self.bucket_counts, other.bucket_counts)]
+
+    def as_dict(self, results=None):
+        """Plain dict for results and JSON export; counters are the integer counts of ``results``"""
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(MOVE_LATENCY_BUCKETS + ("+Inf",), self.bucket_counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        counters = {}
+        if results is not None:
+            counters = {key: value for key, value in results.items()
+                        if isinstance(value, int) and not isinstance(value, bool)}
+        return {
+            "kind": self.kind,
+            "started": self.started,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "phases": {phase: round(seconds, 6) for phase, seconds in self.phases.items()},
+            "moves": self.moves,
+            "bytes_moved": self.bytes_moved,
+            "move_latency": {"buckets": buckets, "sum": round(self.phases["move"], 6), "count": self.moves},
+            "counters": counters
+        }
+
+
+def metrics_to_prometheus(metrics):
+    """Render a RunMetrics.as_dict() in the Prometheus text exposition format"""
+    kind = metrics["kind"]
+    lines = []
+
+    def family(name, metric_type, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    family("filesort_last_run_timestamp_seconds", "gauge", "Start time of the last run.")
+    lines.append(f'filesort_last_run_timestamp_seconds{{kind="{kind}"}} {metrics["started"]:.3f}')
+    family("filesort_run_duration_seconds", "gauge", "Wall-clock time of the last run.")
+    lines.append(f'filesort_run_duration_seconds{{kind="{kind}"}} {metrics["wall_seconds"]}')
+    family("filesort_phase_seconds", "gauge", "Time per phase of the last run; moves are summed over workers.")
+    for phase, seconds in metrics["phases"].items():
+        lines.append(f'filesort_phase_seconds{{kind="{kind}",phase="{phase}"}} {seconds}')
+    family("filesort_run_count", "gauge", "Counts reported by the last run (files, folders, bytes copied).")
+    for counter, value in metrics["counters"].items():
+        lines.append(f'filesort_run_count{{kind="{kind}",counter="{counter}"}} {value}')
+    family("filesort_bytes_moved", "gauge", "Bytes of the files moved by the last run.")
+    lines.append(f'filesort_bytes_moved{{kind="{kind}"}} {metrics["bytes_moved"]}')
+
+    latency = metrics["move_latency"]
+    family("filesort_move_duration_seconds", "histogram", "Time to move one file in the last run.")
+    for bound, count in latency["buckets"].items():
+        lines.append(f'filesort_move_duration_seconds_bucket{{kind="{kind}",le="{bound}"}} {count}')
+    lines.append(f'filesort_move_duration_seconds_sum{{kind="{kind}"}} {latency["sum"]}')
+    lines.append(f'filesort_move_duration_seconds_count{{kind="{kind}"}} {latency["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def export_metrics(metrics, json_path=None, prom_path=None):
+    """Write run metrics as JSON and/or a Prometheus textfile; failures are logged, not raised.
+
+    Files are written to a temporary name and renamed into place, so a
+    node exporter textfile collector never reads a half-written file.
+    """
+    for path, render in ((json_path, lambda: json.dumps(metrics, indent=2)),
+                         (prom_path, lambda: metrics_to_prometheus(metrics))):
+        if not path:
+            continue
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(render())
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write metrics to {path}: {e}")
+
+
+# -----------------------------
+# MOVE JOURNAL
+# -----------------------------
+JOURNAL_DIR = os.path.join(APP_DATA_DIR, "journal")
+
+
+class MoveJournal:
+    """Append-only record of the moves made by one run, used for revert.
+
+    The first line is a JSON header describing the run; every other line is
+    a compact JSON array: ["m", source, destination] for a move and
+    ["r", index] once the move with that index has been reverted. Records
+    are buffered and written with one fsync per batch, so a crash loses at
+    most the last batch and the journal survives restarts. The jobs of a
+    batch share one journal, so records may come from several threads.
+    """
+
+    FLUSH_EVERY = 256
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, path, header=None):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._buffer = []
+        self._lock = threading.Lock()  # Guards the buffer
+        self._write_lock = threading.Lock()  # Keeps flushed batches in order while appends go on
+        self._next_flush = time.monotonic() + self.FLUSH_INTERVAL
+        if header is not None:
+            self._buffer.append(json.dumps(header) + "\n")
+            self.flush()
+
+    @classmethod
+    def create(cls, source, destination, journal_dir=JOURNAL_DIR):
+        """Start the journal of a new run"""
+        os.makedirs(journal_dir, exist_ok=True)
+        run_id = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        header = {"run": run_id, "source": source, "destination": destination,
+                  "started": datetime.now().isoformat()}
+        return cls(os.path.join(journal_dir, f"{run_id}.jsonl"), header)
+
+    def record_move(self, source, destination):
+        self._append(json.dumps(["m", source, destination]) + "\n")
+
+    def record_revert(self, index):
+        self._append(f'["r", {index}]\n')
+
+    def _append(self, line):
+        with self._lock:
+            self._buffer.append(line)
+            due = len(self._buffer) >= self.FLUSH_EVERY or time.monotonic() >= self._next_flush
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records and fsync them"""
+        with self._write_lock:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+                self._next_flush = time.monotonic() + self.FLUSH_INTERVAL
+            if lines:
+                self._file.write("".join(lines))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def load(path):
+        """Read a journal; returns (header, moves, reverted) where moves is a list of (source, destination)"""
+        header = {}
+        moves = []
+        reverted = set()
+        with open(path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write
+                    logging.warning(f"Ignoring damaged journal line {number + 1} in {path}")
+                    continue
+                if number == 0 and isinstance(record, dict):
+                    header = record
+                elif record[0] == "m":
+                    moves.append((record[1], record[2]))
+                elif record[0] == "r":
+                    reverted.add(record[1])
+        return header, moves, reverted
+
+
+def summarize_results(results, source, destination):
+    """Reduce run results to the small summary kept in the config"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "source": source,
+        "destination": destination,
+        "total_files": results.get("total_files", 0),
+        "processed": results.get("processed", 0),
+        "skipped": results.get("skipped", 0),
+        "errors": results.get("errors", 0),
+        "categories_created": sorted(results.get("categories_created", ())),
+        "journal": results.get("journal")
+    }
+
+
+# -----------------------------
+# RUN CHECKPOINTS
+# -----------------------------
+CHECKPOINT_SUFFIX = ".resume.jsonl"  # Next to the run's journal, which has the same name ending in .jsonl
+CHECKPOINT_INTERVAL = 2.0  # Seconds between checkpoint writes
+END_LINE = '["end"]\n'  # Last line of the checkpoint of a completed run
+
+
+class RunCheckpoint:
+    """Resume point of an organize run: the source folders whose files are all done.
+
+    The scanner reports each folder once it is listed, together with the
+    scan position of its last file. advance() commits folders once every
+    file up to that position has an outcome, so a folder is never committed
+    ahead of an earlier move. Committed folders are appended to a JSON-lines
+    file, ["d", folder, subfolder names], in batches about every
+    CHECKPOINT_INTERVAL seconds; ``before_flush`` (the journal's flush)
+    runs first, so the moves behind a commit are on disk before it is.
+
+    A resumed run does not list the ``finished`` folders again but
+    descends straight into their recorded subfolders, and adds to the same
+    checkpoint file and journal. Once a run completes, its file ends with
+    ["end"] and is deleted; the marker keeps it from being resumed should
+    the delete fail.
+    """
+
+    def __init__(self, finished=None, before_flush=None):
+        self.finished = finished or {}  # Folder -> subfolder names, from the run being resumed
+        self.before_flush = before_flush or (lambda: None)
+        self.path = None
+        self.committed = 0
+        self._file = None
+        self._listed = deque()  # (last scan position, folder, subfolder names) in scan order
+        self._buffer = []
+        self._next_flush = time.monotonic() + CHECKPOINT_INTERVAL
+
+    @staticmethod
+    def path_for(journal_path):
+        return os.path.splitext(journal_path)[0] + CHECKPOINT_SUFFIX
+
+    def open(self, path, header=None):
+        """Start writing commits to ``path``; a resumed run appends without a new header"""
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        if header is not None:
+            self._file.write(json.dumps(header) + "\n")
+        self.flush()
+
+    def finished_subdirs(self, directory):
+        """Subfolders of a folder the resumed run already finished, or None to list it"""
+        names = self.finished.get(directory)
+        if names is None:
+            return None
+        return [os.path.join(directory, name) for name in names]
+
+    def listed(self, directory, subdirs, position):
+        """Note a folder whose files are the scan positions up to ``position``"""
+        self._listed.append((position, directory, [os.path.basename(subdir) for subdir in subdirs]))
+
+    def advance(self, position):
+        """Commit the folders whose files, and every file before them, have an outcome"""
+        listed = self._listed
+        while listed and listed[0][0] <= position:
+            _, directory, names = listed.popleft()
+            self._buffer.append(json.dumps(["d", directory, names]) + "\n")
+            self.committed += 1
+        if self._buffer and time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def flush(self):
+        if self._file is None:
+            return  # A plan waiting for confirmation keeps its commits until the run starts
+        self.before_flush()
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer.clear()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._next_flush = time.monotonic() + CHECKPOINT_INTERVAL
+
+    def close(self, completed=False):
+        """Write what is committed; a completed run has nothing to resume, so its file is deleted"""
+        if self._file is None:
+            return
+        if completed:
+            self._buffer = [END_LINE]
+        self.flush()
+        self._file.close()
+        self._file = None
+        if completed:
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                logging.warning(f"Could not remove the checkpoint of a completed run {self.path}: {e}")
+
+    @staticmethod
+    def is_finished(path):
+        """Whether the run of a checkpoint completed, going by its last line"""
+        try:
+            with open(path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - len(END_LINE) - 2))
+                return f.read().rstrip().endswith(END_LINE.strip().encode())
+        except OSError:
+            return True
+
+    @staticmethod
+    def load(path):
+        """Read a checkpoint; returns (header, finished) where finished maps folders to subfolder names"""
+        header = {}
+        finished = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logging.warning(f"Ignoring damaged checkpoint line {number + 1} in {path}")
+                    continue
+                if number == 0 and isinstance(record, dict):
+                    header = record
+                elif isinstance(record, list) and record[:1] == ["d"]:
+                    finished[record[1]] = record[2]
+                elif record == ["end"]:
+                    raise ValueError(f"The run of this checkpoint already completed: {path}")
+        return header, finished
+
+
+def latest_checkpoint(journal_dir=JOURNAL_DIR):
+    """Checkpoint of the most recent run that can be resumed, or None"""
+    try:
+        names = [name for name in os.listdir(journal_dir) if name.endswith(CHECKPOINT_SUFFIX)]
+    except OSError:
+        return None
+    # Run ids start with their timestamp
+    for name in sorted(names, reverse=True):
+        path = os.path.join(journal_dir, name)
+        if not RunCheckpoint.is_finished(path):
+            return path
+    return None
+
+
+# -----------------------------
+# OPERATION HISTORY
+# -----------------------------
+HISTORY_DB_FILE = os.path.join(APP_DATA_DIR, "history.db")
+
+
+class HistoryStore:
+    """Bounded, queryable history of organize runs backed by SQLite.
+
+    Runs are indexed by timestamp and by source folder, and are only read a
+    page at a time, so startup cost does not grow with history. Runs beyond
+    ``max_runs`` or older than ``max_days`` are deleted, together with their
+    journals, every time a run is added.
+    """
+
+    COLUMNS = ("id", "timestamp", "source", "destination", "total_files", "processed",
+               "skipped", "errors", "categories_created", "journal")
+
+    def __init__(self, path=HISTORY_DB_FILE, max_runs=1000, max_days=90):
+        import sqlite3
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_runs = max_runs
+        self.max_days = max_days
+        self._db = sqlite3.connect(path)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "id INTEGER PRIMARY KEY, timestamp TEXT NOT NULL, source TEXT, destination TEXT, "
+            "total_files INTEGER, processed INTEGER, skipped INTEGER, errors INTEGER, "
+            "categories_created TEXT, journal TEXT);"
+            "CREATE INDEX IF NOT EXISTS runs_by_time ON runs (timestamp);"
+            "CREATE INDEX IF NOT EXISTS runs_by_source ON runs (source, timestamp);")
+
+    def add(self, summary):
+        """Store a run summary (see summarize_results) and apply the retention policy"""
+        run_id = self._insert(summary)
+        self.apply_retention(commit=False)
+        self._db.commit()
+        return run_id
+
+    def import_legacy(self, operations):
+        """Move recent_operations entries from an old config.json into the store"""
+        for operation in operations:
+            # Entries written before the journal existed embed the full results dict
+            summary = dict(operation.get("results") or {}, **operation)
+            self._insert(summary)
+        self.apply_retention(commit=False)
+        self._db.commit()
+
+    def _insert(self, summary):
+        cursor = self._db.execute(
+            "INSERT INTO runs (timestamp, source, destination, total_files, processed, skipped, errors, "
+            "categories_created, journal) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (summary.get("timestamp") or datetime.now().isoformat(), summary.get("source"),
+             summary.get("destination"), summary.get("total_files", 0), summary.get("processed", 0),
+             summary.get("skipped", 0), summary.get("errors", 0),
+             json.dumps(sorted(summary.get("categories_created") or ())), summary.get("journal")))
+        return cursor.lastrowid
+
+    def apply_retention(self, commit=True):
+        """Delete runs beyond max_runs or older than max_days, and journals no remaining run uses"""
+        conditions = []
+        params = []
+        if self.max_days:
+            cutoff = datetime.fromtimestamp(time.time() - self.max_days * 86400).isoformat()
+            conditions.append("timestamp < ?")
+            params.append(cutoff)
+        if self.max_runs:
+            conditions.append("id NOT IN (SELECT id FROM runs ORDER BY timestamp DESC, id DESC LIMIT ?)")
+            params.append(self.max_runs)
+        if not conditions:
+            return 0
+        where = " OR ".join(conditions)
+        expired = self._db.execute(f"SELECT journal FROM runs WHERE {where}", params).fetchall()
+        self._db.execute(f"DELETE FROM runs WHERE {where}", params)
+        # The jobs of a batch share one journal, which goes with the last of their runs
+        for journal in {journal for (journal,) in expired if journal}:
+            if self._db.execute("SELECT 1 FROM runs WHERE journal = ? LIMIT 1", (journal,)).fetchone():
+                continue
+            for path in (journal, RunCheckpoint.path_for(journal)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        if commit:
+            self._db.commit()
+        return len(expired)
+
+    def count(self, source=None):
+        if source is None:
+            return self._db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        return self._db.execute("SELECT COUNT(*) FROM runs WHERE source = ?", (source,)).fetchone()[0]
+
+    def page(self, offset=0, limit=50, source=None):
+        """Return runs newest first, as dicts, one page at a time"""
+        query = f"SELECT {', '.join(self.COLUMNS)} FROM runs"
+        params = []
+        if source is not None:
+            query += " WHERE source = ?"
+            params.append(source)
+        query += " ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        runs = []
+        for row in self._db.execute(query, params):
+            run = dict(zip(self.COLUMNS, row))
+            run["categories_created"] = json.loads(run["categories_created"] or "[]")
+            runs.append(run)
+        return runs
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def open_history_store():
+    """Open the history store with the configured retention, migrating legacy config history"""
+    config_manager = get_config_manager()
+    settings = config_manager.config["settings"]
+    store = HistoryStore(max_runs=settings.get("history_max_runs", 1000),
+                         max_days=settings.get("history_max_days", 90))
+    if config_manager.legacy_operations:
+        store.import_legacy(config_manager.legacy_operations)
+        config_manager.legacy_operations = []
+        config_manager.save_config()
+    return store
+
+
+# -----------------------------
+# ORGANIZER ENGINE
+# -----------------------------
+DATE_SOURCES = ("run", "mtime")
+
+
+class DateBuckets:
+    """Date folder names for timestamps, formatted once per distinct day.
+
+    Local days start on a quarter-hour boundary in practically every time
+    zone, so names are cached per quarter hour and strftime only runs for
+    the first timestamp of each day. The rare quarter hour that spans two
+    dates (a DST switch at 00:01) is looked up per timestamp.
+    """
+
+    QUARTER_HOUR = 900
+
+    def __init__(self, date_format="%Y-%m-%d"):
+        self.date_format = date_format
+        self._quarters = {}
+        self._days = {}
+
+    def name(self, timestamp):
+        quarter = int(timestamp // self.QUARTER_HOUR)
+        name = self._quarters.get(quarter)
+        if name is None:
+            start = quarter * self.QUARTER_HOUR
+            if time.localtime(start)[:3] != time.localtime(start + self.QUARTER_HOUR - 1)[:3]:
+                return self._day_name(time.localtime(timestamp))
+            name = self._quarters[quarter] = self._day_name(time.localtime(start))
+        return name
+
+    def _day_name(self, local):
+        name = self._days.get(local[:3])
+        if name is None:
+            name = self._days[local[:3]] = time.strftime(self.date_format, local)
+        return name
+
+
+class MovePlan:
+    """Every move of a run, decided before any file is touched.
+
+    Jobs carry their final destination, with collisions and duplicates
+    already resolved in memory, and whether the move stays on one device.
+    Executing a plan needs no further classification or existence checks.
+    ``results`` holds what the scan already settled (skips, errors).
+    """
+
+    __slots__ = ("jobs", "results", "category_counts", "duplicates", "collisions", "total_bytes")
+
+    def __init__(self, results):
+        self.jobs = []
+        self.results = results
+        self.category_counts = {}
+        self.duplicates = 0  # Files going to the duplicates folder
+        self.collisions = 0  # Files getting a "_<n>" suffix because the name is taken
+        self.total_bytes = 0
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def add(self, job):
+        self.jobs.append(job)
+        self.category_counts[job.category] = self.category_counts.get(job.category, 0) + 1
+        if job.category == "duplicates":
+            self.duplicates += 1
+        if os.path.basename(job.destination) != job.filename:
+            self.collisions += 1
+        self.total_bytes += job.size
+
+    def summary(self):
+        """Counts for a preview, per category in descending order"""
+        return {
+            "total_files": self.results["total_files"],
+            "moves": len(self.jobs),
+            "skipped": self.results["skipped"],
+            "errors": self.results["errors"],
+            "duplicates": self.duplicates,
+            "collisions": self.collisions,
+            "total_bytes": self.total_bytes,
+            "categories": dict(sorted(self.category_counts.items(), key=lambda item: (-item[1], item[0])))
+        }
+
+
+class Organizer:
+    """Sort the files of a source folder into category folders under a destination.
+
+    organize_files() streams: files are moved while the scan is still
+    running. plan_files() only scans and decides, returning a MovePlan
+    that execute_plan() carries out later, e.g. after a preview. With the
+    "dry_run" option organize_files() reports the plan and moves nothing.
+
+    ``on_batch`` receives coalesced (statuses, progress) updates from a
+    ProgressBatcher; front-ends turn them into Qt signals or JSON lines.
+    A caller that sorts several batches into one run (watch mode) passes
+    its own open ``journal`` and sets ``keep_indexes``: the destination
+    indexes built by the first pass are then reused by every call with
+    ``entries``, and closed by close_indexes(). ``rules`` defaults to
+    config["rules"]. The
+    jobs of a BatchRunner also share an IOScheduler that every move must
+    get a slot from, and the hash and sniff caches, which are then left
+    open for their owner to close.
+
+    With the "checkpoint" option, a run that owns its journal keeps a
+    RunCheckpoint, so Organizer.resume() can continue it after a stop or a
+    crash without rescanning the folders it finished.
+    """
+
+    def __init__(self, source_folder, destination_folder, options, category_index=None, on_batch=None,
+                 journal=None, rules=None, scheduler=None, hash_cache=None, sniff_cache=None):
+        # Absolute, so relative folders resolve the same way for the scanner, the journal and the moves
+        self.source_folder = os.path.abspath(source_folder)
+        self.destination_folder = os.path.abspath(destination_folder)
+        self.options = options
+        # Compiled once per run so the hot path never touches the shared config dict
+        self.category_index = category_index or CategoryIndex(get_config_manager().config["categories"])
+        self.rule_specs = get_config_manager().config.get("rules", []) if rules is None else rules
+        self.rules = RuleSet(self.rule_specs, source_folder, category_index=self.category_index) \
+            if self.rule_specs else None
+        # Every top-level folder files are sorted into
+        self.category_folders = self.category_index.categories
+        if self.rules is not None:
+            self.category_folders += tuple(sorted(self.rules.folders - set(self.category_folders)))
+        self.dry_run = options.get("dry_run", False)
+        self.date_source = options.get("date_source", "run")
+        self.date_buckets = DateBuckets()
+        self.should_stop = False
+        self.batcher = ProgressBatcher(on_batch or (lambda statuses, progress: None))
+        self.shared_journal = journal
+        self.journal = None
+        self.scheduler = scheduler
+        self.shared_hash_cache = hash_cache
+        self.shared_sniff_cache = sniff_cache
+        self.snapshot = None
+        self.hash_cache = None
+        self.sniffer = None
+        self.checkpoint = None
+        self.keep_indexes = False
+        self.names = None
+        self.resume_from = None  # (checkpoint path, header, finished folders) of the run being continued
+        self._done = 0
+        self.log_files = False
+        self.metrics = RunMetrics("organize")
+
+    @classmethod
+    def resume(cls, checkpoint_path, category_index=None, on_batch=None):
+        """An organizer that continues the interrupted run of a checkpoint, with that run's folders and options"""
+        header, finished = RunCheckpoint.load(checkpoint_path)
+        if not all(key in header for key in ("source", "destination", "journal", "options")):
+            raise ValueError(f"Checkpoint has no run header: {checkpoint_path}")
+        organizer = cls(header["source"], header["destination"], header["options"], category_index, on_batch)
+        organizer.resume_from = (checkpoint_path, header, finished)
+        return organizer
+
+    def stop(self):
+        self.should_stop = True
+
+    def new_results(self):
+        return {
+            "total_files": 0,
+            "processed": 0,
+            "skipped": 0,
+            "errors": 0,
+            "cancelled": 0,
+            "renamed": 0,  # Files moved with a same-device rename
+            "bytes_copied": 0,  # Data copied for cross-device moves
+            "categories_created": set(),
+            "errors_list": [],
+            "journal": None,  # Path of the move journal used for revert
+            "dry_run": self.dry_run,
+            "dirs_unchanged": 0,  # Folders skipped by an incremental scan
+            "dirs_resumed": 0,  # Folders a resumed run did not list again
+            "sniffed": 0  # Files whose type was recognized from their content
+        }
+
+    def organize_files(self, entries=None):
+        """Sort the whole source folder, or only ``entries`` (DirEntry-like objects) when given"""
+        if self.dry_run:
+            return self.report_plan(self.plan_files(entries))
+
+        started = time.perf_counter()
+        results = self.new_results()
+        entries, estimated_total = self.open_scan(entries, results)
+        executor = MoveExecutor(self.options.get("workers", 1), lambda: self.should_stop)
+        self.open_journal(results)
+        completed = False
+
+        # Stream jobs straight from the scanner so moves start with the first entries
+        try:
+            for job, _ in self.planned_jobs(entries, results, estimated_total):
+                self.dispatch(executor, job, results, estimated_total)
+            for job, outcome, error in executor.drain():
+                self._done += 1
+                self.record_outcome(results, job, outcome, error)
+                self.batcher.progress(self._done, estimated_total())
+            completed = not self.should_stop
+        finally:
+            executor.shutdown()
+            self.batcher.flush()
+            self.close_checkpoint(completed)
+            self.close_journal()
+            self.close_scan(results)
+            self.metrics.wall_seconds += time.perf_counter() - started
+        results["metrics"] = self.metrics.as_dict(results)
+        return results
+
+    def plan_files(self, entries=None):
+        """Scan and decide every move without touching any file; returns a MovePlan"""
+        started = time.perf_counter()
+        plan = MovePlan(self.new_results())
+        entries, estimated_total = self.open_scan(entries, plan.results)
+        try:
+            for job, _ in self.planned_jobs(entries, plan.results, estimated_total):
+                plan.add(job)
+                self._done += 1
+                self.batcher.progress(self._done, estimated_total())
+        finally:
+            self.batcher.flush()
+            self.close_scan(plan.results)
+            self.metrics.wall_seconds += time.perf_counter() - started
+        return plan
+
+    def execute_plan(self, plan):
+        """Carry out the moves of a plan made by plan_files() on this organizer"""
+        started = time.perf_counter()
+        results = plan.results
+        total = len(plan.jobs)
+        self._done = 0
+        self.log_files = logging.getLogger().isEnabledFor(logging.INFO)
+        executor = MoveExecutor(self.options.get("workers", 1), lambda: self.should_stop)
+        self.open_journal(results)
+        submitted = 0
+        completed = False
+
+        try:
+            for job in plan.jobs:
+                if self.should_stop:
+                    break
+                submitted += 1
+                self.dispatch(executor, job, results, lambda: total)
+            for job, outcome, error in executor.drain():
+                self._done += 1
+                self.record_outcome(results, job, outcome, error)
+                self.batcher.progress(self._done, total)
+            results["cancelled"] += total - submitted
+            completed = not self.should_stop
+        finally:
+            executor.shutdown()
+            self.batcher.flush()
+            self.close_checkpoint(completed)
+            self.close_journal()
+            self.metrics.wall_seconds += time.perf_counter() - started
+        results["metrics"] = self.metrics.as_dict(results)
+        return results
+
+    def report_plan(self, plan):
+        """Turn a plan into dry-run results, reporting what would be moved"""
+        results = plan.results
+        for job in plan.jobs:
+            if self.log_files:
+                logging.info("Would move file: %s -> %s", job.source, job.destination)
+            self.batcher.file(job.filename, f"Would move to {job.category} folder")
+        self.batcher.flush()
+        results["processed"] = len(plan.jobs)
+        results["categories_created"] = set(plan.category_counts)
+        results["plan"] = plan.summary()
+        results["metrics"] = self.metrics.as_dict(results)
+        return results
+
+    def open_scan(self, entries, results):
+        """Set up the scan and the in-memory indexes; returns (entries, estimated_total)"""
+        self._done = 0
+        # Per-file records are skipped outright, not built and then filtered, when INFO is off
+        self.log_files = logging.getLogger().isEnabledFor(logging.INFO)
+        # Category folders inside the source are not descended into, otherwise files
+        # moved during this run would be picked up again
+        excluded_dirs = [os.path.join(self.destination_folder, category) for category in self.category_folders]
+        excluded_dirs.append(os.path.join(self.destination_folder, "duplicates"))
+        # An incremental scan only lists folders that changed since the last run of this source
+        self.snapshot = None
+        if entries is None and self.options.get("incremental", False):
+            fingerprint = json.dumps([self.options.get("recursive", True), self.options.get("skip_no_extension", True),
+                                      self.options.get("content_sniffing", "off"), self.rule_specs,
+                                      sorted(os.path.normcase(os.path.abspath(d)) for d in excluded_dirs)],
+                                     sort_keys=True, default=str)
+            self.snapshot = SourceSnapshot(os.path.abspath(self.source_folder), fingerprint)
+        # Folders are committed to the checkpoint as the moves of their files complete, in scan order
+        self.checkpoint = None
+        self._unresolved = deque()  # Scan positions of planned moves still waiting for an outcome
+        self._resolved_early = set()  # Positions that got their outcome before an older move did
+        self._planned_position = 0
+        if entries is None and not self.dry_run and self.options.get("checkpoint", False) \
+                and self.shared_journal is None:
+            finished = self.resume_from[2] if self.resume_from is not None else None
+            self.checkpoint = RunCheckpoint(finished, lambda: self.journal.flush())
+        if entries is None:
+            self.scanner = SourceScanner(self.source_folder, self.options.get("recursive", True), excluded_dirs,
+                                         self.snapshot, self.checkpoint)
+            entries, estimated_total = self.scanner, self.scanner.estimated_total
+        else:
+            self.scanner = None
+            entries = list(entries)
+            estimated_total = entries.__len__
+            results["total_files"] = len(entries)
+
+        # A later batch of a session reuses what earlier ones learned about the destination, so its cost
+        # follows the batch and not the destination; the files they moved are already reserved and registered
+        reuse = entries is not None and self.keep_indexes and self.names is not None
+        if not reuse:
+            # Content-based duplicate detection also learns about files already in the destination
+            self.close_indexes()
+            self.duplicates = None
+            on_listed = None
+            if self.options.get("skip_duplicates", True):
+                self.hash_cache = self.shared_hash_cache or HashCache()
+                self.duplicates = DuplicateDetector(self.hash_cache)
+                on_listed = self.register_existing_file
+            # Destination names are reserved in memory, so no two jobs claim the same target
+            self.names = DestinationNameIndex(on_listed)
+            self.device_map = DeviceMap()
+        else:
+            # Folders listed by an earlier batch may have changed on disk since
+            self.names.check_disk = True
+        # Cheap to rebuild, and a category folder deleted between batches gets created again
+        self.directories = DirectoryCache()
+
+        # Age rules are relative to the start of the run
+        if self.rules is not None:
+            self.rules.set_now(time.time())
+
+        # Files without (or, in "all" mode, with any) extension are identified by their first bytes
+        self.sniffer = None
+        if self.options.get("content_sniffing", "off") != "off":
+            self.sniffer = ContentSniffer(self.options["content_sniffing"], self.shared_sniff_cache or SniffCache(),
+                                          self.options.get("workers", 1))
+        return entries, estimated_total
+
+    def close_scan(self, results):
+        if self.scanner is not None:
+            results["total_files"] = self.scanner.files_found
+            results["dirs_unchanged"] = self.scanner.dirs_unchanged
+            results["dirs_resumed"] = self.scanner.dirs_resumed
+        if not self.keep_indexes:
+            self.close_indexes()
+        if self.sniffer is not None:
+            results["sniffed"] = self.sniffer.recognized
+            self.metrics.add("sniff", self.sniffer.seconds)
+            self.sniffer.close()
+            if self.sniffer.cache is not self.shared_sniff_cache:
+                self.sniffer.cache.close()
+            self.sniffer = None
+        if self.snapshot is not None:
+            self.snapshot.save()
+            self.snapshot.close()
+            self.snapshot = None
+
+    def close_indexes(self):
+        """Drop the destination indexes and close the hash cache the organizer opened for them"""
+        if self.hash_cache is not None:
+            if self.hash_cache is not self.shared_hash_cache:
+                self.hash_cache.close()
+            self.hash_cache = None
+
+    def open_journal(self, results):
+        # Moves are journaled in scan order as their outcomes come back
+        self.journal = self.shared_journal
+        if self.journal is None and self.resume_from is not None:
+            # A resumed run adds to the journal of the run it continues, so both revert as one
+            self.journal = MoveJournal(self.resume_from[1]["journal"])
+        elif self.journal is None:
+            self.journal = MoveJournal.create(self.source_folder, self.destination_folder)
+        results["journal"] = self.journal.path
+        if self.checkpoint is not None and self.resume_from is not None:
+            self.checkpoint.open(self.resume_from[0])
+        elif self.checkpoint is not None:
+            self.checkpoint.open(RunCheckpoint.path_for(self.journal.path), {
+                "source": self.source_folder, "destination": self.destination_folder, "journal": self.journal.path,
+                "options": self.options, "started": datetime.now().isoformat()})
+
+    def close_checkpoint(self, completed):
+        if self.checkpoint is not None:
+            self.checkpoint.close(completed)
+
+    def resolve(self, position):
+        """Mark the move at a scan position as done and commit the folders that are now finished"""
+        unresolved = self._unresolved
+        if unresolved and unresolved[0] == position:
+            unresolved.popleft()
+            while unresolved and unresolved[0] in self._resolved_early:
+                self._resolved_early.discard(unresolved.popleft())
+        else:
+            self._resolved_early.add(position)
+        self.advance_checkpoint()
+
+    def advance_checkpoint(self):
+        # After a stop, moves that were dropped leave their folders unfinished, so nothing more is committed
+        if self.checkpoint is not None and not self.should_stop:
+            self.checkpoint.advance(self._unresolved[0] - 1 if self._unresolved else self._planned_position)
+
+    def close_journal(self):
+        if self.journal is self.shared_journal:
+            self.journal.flush()
+        else:
+            self.journal.close()
+
+    def file_records(self, entries, results, estimated_total):
+        """Stat every entry once, yielding a FileRecord; files that vanish or cannot be stat'ed are errors"""
+        for position, entry in enumerate(entries, 1):
+            try:
+                record = FileRecord.from_entry(entry)
+            except OSError as e:
+                if self.snapshot is not None:
+                    self.snapshot.mark_dirty(os.path.dirname(entry.path))
+                self._done += 1
+                self.record_error(results, entry.name, e)
+                self.batcher.progress(self._done, estimated_total())
+                continue
+            record.seq = position
+            yield record
+
+    def planned_jobs(self, entries, results, estimated_total):
+        """Yield (MoveJob, FileRecord) for every file to move, recording skips and planning errors"""
+        skip_no_extension = self.options.get("skip_no_extension", True)
+        records = self.metrics.timed(self.file_records(entries, results, estimated_total), "scan")
+        if self.sniffer is not None:
+            records = self.sniffer.prefetch(records)
+        else:
+            records = ((record, None) for record in records)
+        for record, kind in records:
+            if self.should_stop:
+                return
+
+            file_path = record.path
+            filename = record.name
+            try:
+                _, ext = os.path.splitext(filename)
+
+                # Skip files without extensions if configured, unless their content gave them a type
+                if not ext and skip_no_extension and not kind:
+                    results["skipped"] += 1
+                    self._done += 1
+                    if self.log_files:
+                        logging.info("Skipped file (no extension): %s", file_path)
+                    self.batcher.file(filename, "Skipped (no extension)")
+                    self.batcher.progress(self._done, estimated_total())
+                    self._planned_position = record.seq
+                    self.advance_checkpoint()
+                    continue
+
+                # Files that stay behind (errors, stops, dry runs) must be seen again next time
+                if self.snapshot is not None:
+                    self.snapshot.mark_dirty(record.directory)
+                job = self.plan_move(record, kind)
+            except Exception as e:
+                self._done += 1
+                self.record_error(results, filename, e)
+                self.batcher.progress(self._done, estimated_total())
+                self._planned_position = record.seq
+                self.advance_checkpoint()
+                continue
+            if self.checkpoint is not None:
+                self._unresolved.append(record.seq)
+            self._planned_position = record.seq
+            yield job, record
+
+    def dispatch(self, executor, job, results, estimated_total):
+        """Create the job's folder if needed, queue the move and fold in finished outcomes"""
+        start = time.perf_counter()
+        try:
+            self.directories.ensure(os.path.dirname(job.destination))
+        except OSError as e:
+            self.metrics.add("makedirs", time.perf_counter() - start)
+            self.names.release(job.destination)
+            self._done += 1
+            self.record_error(results, job.filename, e)
+            self.batcher.progress(self._done, estimated_total())
+            if self.checkpoint is not None:
+                self.resolve(job.index)
+            return
+        self.metrics.add("makedirs", time.perf_counter() - start)
+        for job, outcome, error in executor.submit(job, self.move_file):
+            self._done += 1
+            self.record_outcome(results, job, outcome, error)
+            self.batcher.progress(self._done, estimated_total())
+
+    def plan_move(self, record, kind=None):
+        """Pick the category and a free destination path for a FileRecord; ``kind`` is its sniffed type"""
+        clock = time.perf_counter
+        phases = self.metrics.phases
+        start = clock()
+        file_path = record.path
+        filename = record.name
+        if self.rules is not None:
+            category = self.rules.classify(record, kind)
+        elif kind:
+            category = self.category_index.category_for_content(filename, kind)
+        else:
+            category = self.category_index.category_for(filename)
+        dest_path = self.create_destination_path(category, filename, record)
+        now = clock()
+        phases["classify"] += now - start
+        start = now
+
+        # Handle duplicates: same content as a file already in the destination or moved earlier
+        candidate = None
+        if self.duplicates is not None:
+            self.names.load(os.path.dirname(dest_path))
+            candidate = self.duplicates.candidate(record)
+            if self.duplicates.find(candidate) is not None:
+                # Move to duplicates folder instead of skipping
+                dest_path = os.path.join(self.destination_folder, "duplicates", filename)
+                category = "duplicates"
+                candidate = None
+            now = clock()
+            phases["duplicates"] += now - start
+            start = now
+
+        # Claim the name, or a unique variant of it if it is already taken
+        dest_path = self.names.reserve(dest_path)
+        if candidate is not None:
+            self.duplicates.register(candidate, dest_path)
+        now = clock()
+        phases["collisions"] += now - start
+        # Folders that do not exist yet are judged by their nearest existing parent
+        same_device = self.device_map.same_device(record.directory, os.path.dirname(dest_path))
+        phases["devices"] += clock() - now
+        return MoveJob(file_path, dest_path, filename, category, same_device, record.seq, record.size)
+
+    def register_existing_file(self, directory, entry):
+        """Feed files found in destination folders to the duplicate detector"""
+        if os.path.basename(directory) == "duplicates" and os.path.dirname(directory) == self.destination_folder:
+            return
+        try:
+            if entry.is_file(follow_symlinks=False):
+                self.duplicates.register_existing(
+                    FileRecord(entry.path, entry.name, directory, entry.stat(follow_symlinks=False)))
+        except OSError:
+            pass
+
+    def move_file(self, job):
+        """Move a single file; runs on a worker thread"""
+        start = time.perf_counter()
+        waited = 0.0
+        if self.scheduler is not None:
+            self.scheduler.acquire(self)
+            now = time.perf_counter()
+            waited = now - start
+            start = now
+        try:
+            # A stop may have come in while the move was queued for a slot
+            if self.scheduler is not None and self.should_stop:
+                raise MoveCancelled()
+            if job.same_device:
+                outcome = move_within_device(job.source, job.destination)
+            else:
+                outcome = move_across_devices(job.source, job.destination)
+        finally:
+            if self.scheduler is not None:
+                self.scheduler.release()
+        self.metrics.observe_move(time.perf_counter() - start, job.size, waited)
+        return outcome
+
+    def record_outcome(self, results, job, outcome, error):
+        """Fold a finished move job into the results"""
+        if error is None:
+            renamed, copied = outcome
+            results["renamed"] += renamed
+            results["bytes_copied"] += copied
+            # Track the movement for revert
+            start = time.perf_counter()
+            self.journal.record_move(job.source, job.destination)
+            self.metrics.add("journal", time.perf_counter() - start)
+
+            results["processed"] += 1
+            results["categories_created"].add(job.category)
+
+            # Enhanced logging
+            if self.log_files:
+                logging.info("Moved file: %s -> %s", job.source, job.destination)
+            self.batcher.file(job.filename, f"Moved to {job.category} folder")
+            if self.checkpoint is not None:
+                self.resolve(job.index)
+            return
+
+        self.names.release(job.destination)
+        if isinstance(error, MoveCancelled):
+            results["cancelled"] += 1
+        else:
+            self.record_error(results, job.filename, error)
+            if self.checkpoint is not None:
+                self.resolve(job.index)
+
+    def record_error(self, results, filename, error):
+        """Record a file that could not be moved"""
+        results["errors"] += 1
+        error_msg = f"Failed to move {filename}: {str(error)}"
+        results["errors_list"].append(error_msg)
+        logging.error(error_msg)
+        self.batcher.file(filename, f"Error: {str(error)}")
+
+    def get_file_category(self, ext):
+        """Determine file category based on extension"""
+        return self.category_index.category_for_extension(ext)
+
+    def create_destination_path(self, category, filename, record=None):
+        """Create destination path with optional date folders, by the day of the run or of the file's mtime"""
+        base_path = os.path.join(self.destination_folder, category)
+
+        if self.options.get("create_date_folders", False):
+            if self.date_source == "mtime" and record is not None:
+                day = self.date_buckets.name(record.mtime)
+            else:
+                day = self.date_buckets.name(time.time())
+            base_path = os.path.join(base_path, day)
+
+        return os.path.join(base_path, filename)
+
+    def get_unique_filename(self, filepath):
+        """Generate unique filename if file exists"""
+        return self.names.reserve(filepath)
+
+
+# -----------------------------
+# REVERT
+# -----------------------------
+class Reverter:
+    """Move the files recorded in a journal back to where they came from.
+
+    Follows the Organizer contract: ``on_batch`` receives coalesced updates
+    and stop() drops queued work. Entries already marked as reverted are
+    skipped, and each entry is marked in the journal as it completes, so an
+    interrupted revert resumes where it stopped. Every entry is restored to
+    its own reserved name, so entries are independent and run in parallel.
+    Metrics charge reading the journal to the "scan" phase.
+    """
+
+    def __init__(self, journal_path, workers=1, on_batch=None):
+        self.journal_path = journal_path
+        self.workers = workers
+        self.should_stop = False
+        self.batcher = ProgressBatcher(on_batch or (lambda statuses, progress: None))
+        self._moves = []
+        self.metrics = RunMetrics("revert")
+
+    def stop(self):
+        self.should_stop = True
+
+    def revert(self):
+        started = time.perf_counter()
+        _, self._moves, already_reverted = MoveJournal.load(self.journal_path)
+        self.metrics.add("scan", time.perf_counter() - started)
+        results = {
+            "total": len(self._moves),
+            "reverted": 0,
+            "already_reverted": len(already_reverted),
+            "errors": 0,
+            "cancelled": 0,
+            "errors_list": [],
+            "journal": self.journal_path
+        }
+        pending = len(self._moves) - len(already_reverted)
+        self.log_files = logging.getLogger().isEnabledFor(logging.INFO)
+
+        self.journal = MoveJournal(self.journal_path)
+        self.names = DestinationNameIndex()
+        self.directories = DirectoryCache()
+        self.device_map = DeviceMap()
+        executor = MoveExecutor(self.workers, lambda: self.should_stop)
+        done = 0
+
+        try:
+            for idx, (original, organized) in enumerate(self._moves):
+                if self.should_stop:
+                    break
+                if idx in already_reverted:
+                    continue
+                try:
+                    job = self.plan_revert(idx, original, organized)
+                except Exception as e:
+                    done += 1
+                    self.record_error(results, os.path.basename(original), e)
+                    self.batcher.progress(done, pending)
+                    continue
+
+                for job, outcome, error in executor.submit(job, self.revert_file):
+                    done += 1
+                    self.record_outcome(results, job, outcome, error)
+                    self.batcher.progress(done, pending)
+
+            for job, outcome, error in executor.drain():
+                done += 1
+                self.record_outcome(results, job, outcome, error)
+                self.batcher.progress(done, pending)
+            # Entries never reached after a stop stay pending for the next revert
+            results["cancelled"] += pending - done
+        finally:
+            executor.shutdown()
+            self.batcher.flush()
+            self.journal.close()
+            self.metrics.wall_seconds += time.perf_counter() - started
+
+        results["metrics"] = self.metrics.as_dict(results)
+        return results
+
+    def plan_revert(self, idx, original, organized):
+        """Reserve the original location (or a free variant of it) for a journaled move"""
+        clock = time.perf_counter
+        phases = self.metrics.phases
+        start = clock()
+        dest = self.names.reserve(original)
+        now = clock()
+        phases["collisions"] += now - start
+        start = now
+        dest_dir = self.directories.ensure(os.path.dirname(dest))
+        now = clock()
+        phases["makedirs"] += now - start
+        same_device = self.device_map.same_device(os.path.dirname(organized), dest_dir)
+        phases["devices"] += clock() - now
+        return MoveJob(organized, dest, os.path.basename(original), None, same_device, idx)
+
+    def revert_file(self, job):
+        """Move one file back; runs on a worker thread. Returns None if it was already back"""
+        start = time.perf_counter()
+        try:
+            size = os.stat(job.source).st_size
+            if job.same_device:
+                outcome = move_within_device(job.source, job.destination)
+            else:
+                outcome = move_across_devices(job.source, job.destination)
+            self.metrics.observe_move(time.perf_counter() - start, size)
+            return outcome
+        except FileNotFoundError:
+            # Restored by an interrupted revert whose journal mark was lost in the crash
+            original = self._moves[job.index][0]
+            if job.destination != original and not os.path.exists(job.source) and os.path.exists(original):
+                return None
+            raise
+
+    def record_outcome(self, results, job, outcome, error):
+        if error is None:
+            start = time.perf_counter()
+            self.journal.record_revert(job.index)
+            self.metrics.add("journal", time.perf_counter() - start)
+            if outcome is None:
+                self.names.release(job.destination)
+                results["already_reverted"] += 1
+                self.batcher.file(job.filename, "Already reverted")
+                return
+            results["reverted"] += 1
+            if self.log_files:
+                logging.info("Reverted: %s -> %s", job.source, job.destination)
+            self.batcher.file(job.filename, "Reverted successfully")
+            return
+
+        self.names.release(job.destination)
+        if isinstance(error, MoveCancelled):
+            results["cancelled"] += 1
+        else:
+            self.record_error(results, job.filename, error)
+
+    def record_error(self, results, filename, error):
+        results["errors"] += 1
+        error_msg = f"Failed to revert {filename}: {str(error)}"
+        results["errors_list"].append(error_msg)
+        logging.error(error_msg)
+        self.batcher.file(filename, f"Error - {str(error)}")
+
+
+def pending_reverts(journal_path):
+    """Count the journaled moves that have not been reverted yet"""
+    try:
+        _, moves, reverted = MoveJournal.load(journal_path)
+    except OSError:
+        return 0
+    return len(moves) - len(reverted)
+
+
+# -----------------------------
+# SOURCE WATCHER
+# -----------------------------
+WATCH_SETTLE_SECONDS = 2.0  # A new file must stay unchanged this long before it is moved
+WATCH_POLL_INTERVAL = 1.0  # Seconds between directory checks of the polling backend
+WATCH_BATCH_LIMIT = 1000  # Most files handed to the organizer at once under bursty load
+# Names used by browsers and download managers while a file is still being written
+PARTIAL_DOWNLOAD_SUFFIXES = (".part", ".partial", ".crdownload", ".download", ".tmp")
+
+
+class PathEntry:
+    """Minimal os.DirEntry stand-in for a file reported by a watcher"""
+
+    __slots__ = ("path", "name", "_stat")
+
+    def __init__(self, path, stat_result=None):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._stat = stat_result
+
+    def stat(self, follow_symlinks=True):
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+
+class InotifyBackend:
+    """Report new files under a folder tree through Linux inotify (via ctypes).
+
+    Every watched folder costs one inotify watch; new subfolders are watched
+    as they appear and listed once, so files written into them before the
+    watch existed are not missed. changes() returns new and modified paths.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE |
+                  IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+    def __init__(self, root, recursive, is_excluded):
+        import ctypes
+        import ctypes.util
+        import struct
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._event = struct.Struct("iIII")
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self.recursive = recursive
+        self.is_excluded = is_excluded
+        self._dirs = {}  # watch descriptor -> folder
+        self._add_tree(root, None)
+
+    def _add_watch(self, directory):
+        import ctypes
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                logging.warning(f"inotify watch limit reached, not watching {directory}")
+            return False
+        self._dirs[wd] = directory
+        return True
+
+    def _add_tree(self, top, found):
+        """Watch a folder and its subfolders; collect the files already in them into ``found``"""
+        pending = [top]
+        while pending:
+            directory = pending.pop()
+            # Watch before listing, so nothing created in between is missed
+            if not self._add_watch(directory):
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if is_dir:
+                            if self.recursive and not self.is_excluded(entry.path):
+                                pending.append(entry.path)
+                        elif found is not None:
+                            found.append(entry.path)
+            except OSError:
+                pass
+
+    def changes(self, timeout):
+        """Wait up to ``timeout`` seconds and return the file paths that appeared or changed"""
+        import select
+
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        found = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self._event.unpack_from(data, offset)
+                offset += self._event.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    logging.warning(f"inotify queue overflowed, relisting {self.root}")
+                    self.rescan(found)
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & (self.IN_IGNORED | self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                    self._dirs.pop(wd, None)
+                    continue
+                if not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO) and self.recursive and not self.is_excluded(path):
+                        self._add_tree(path, found)
+                    continue
+                found.append(path)
+        return found
+
+    def rescan(self, found):
+        """Rebuild every watch after lost events and report all files as changed"""
+        for wd in list(self._dirs):
+            self._libc.inotify_rm_watch(self.fd, wd)
+        self._dirs.clear()
+        self._add_tree(self.root, found)
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingBackend:
+    """Portable watcher that finds new files by checking folder modification times.
+
+    Each poll costs one stat per watched folder; only folders whose mtime
+    changed are listed again and diffed against their previous listing.
+    Folders listed within RACY_MTIME_SECONDS of their mtime are listed again
+    on the next poll, since a change in the same timestamp tick would not
+    move the mtime.
+    """
+
+    def __init__(self, root, recursive, is_excluded, interval=WATCH_POLL_INTERVAL):
+        self.root = root
+        self.recursive = recursive
+        self.is_excluded = is_excluded
+        self.interval = interval
+        self._dirs = {}  # folder -> (mtime_ns or None when racy, set of file names, set of subfolder paths)
+        self._next_poll = time.monotonic() + interval
+        self._wakeup = threading.Event()
+        self._add_tree(root, None)
+
+    def _list(self, directory):
+        files, subdirs = set(), set()
+        try:
+            st = os.stat(directory)
+            listed_at = time.time_ns()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if not is_dir:
+                        files.add(entry.name)
+                    elif self.recursive and not self.is_excluded(entry.path):
+                        subdirs.add(entry.path)
+        except OSError:
+            return None
+        mtime = st.st_mtime_ns
+        if listed_at - mtime < RACY_MTIME_SECONDS * 1e9:
+            mtime = None
+        return mtime, files, subdirs
+
+    def _add_tree(self, top, found):
+        pending = [top]
+        while pending:
+            directory = pending.pop()
+            listing = self._list(directory)
+            if listing is None:
+                continue
+            self._dirs[directory] = listing
+            if found is not None:
+                found.extend(os.path.join(directory, name) for name in listing[1])
+            pending.extend(listing[2])
+
+    def _drop_tree(self, top):
+        listing = self._dirs.pop(top, None)
+        if listing is not None:
+            for subdir in listing[2]:
+                self._drop_tree(subdir)
+
+    def changes(self, timeout):
+        """Wait up to ``timeout`` seconds and return the file paths that appeared"""
+        delay = self._next_poll - time.monotonic()
+        if delay > timeout:
+            self._wakeup.wait(timeout)
+            return []
+        if delay > 0:
+            self._wakeup.wait(delay)
+        self._next_poll = time.monotonic() + self.interval
+
+        found = []
+        for directory, (mtime, files, subdirs) in list(self._dirs.items()):
+            if directory not in self._dirs:
+                continue  # Dropped with a parent that disappeared
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                self._drop_tree(directory)
+                continue
+            if mtime is not None and current == mtime:
+                continue
+            listing = self._list(directory)
+            if listing is None:
+                self._drop_tree(directory)
+                continue
+            self._dirs[directory] = listing
+            found.extend(os.path.join(directory, name) for name in listing[1] - files)
+            for subdir in subdirs - listing[2]:
+                self._drop_tree(subdir)
+            for subdir in listing[2] - subdirs:
+                self._add_tree(subdir, found)
+        return found
+
+    def close(self):
+        self._wakeup.set()
+
+
+def make_watch_backend(root, recursive, is_excluded, force_polling=False):
+    """Use inotify where available and fall back to polling"""
+    if sys.platform.startswith("linux") and not force_polling:
+        try:
+            return InotifyBackend(root, recursive, is_excluded)
+        except (OSError, AttributeError) as e:
+            logging.warning(f"inotify unavailable, polling {root} instead: {e}")
+    return PollingBackend(root, recursive, is_excluded)
+
+
+class SettleTracker:
+    """Hold back changed files until their size and mtime stop changing.
+
+    A file is checked with one stat per settle window: if it changed since
+    the last check it waits another window, otherwise it is ready. Files
+    that disappear (moved away, or a temporary file that was renamed) are
+    forgotten.
+    """
+
+    def __init__(self, settle_seconds=WATCH_SETTLE_SECONDS):
+        self.settle_seconds = settle_seconds
+        self._pending = {}  # path -> [size, mtime_ns, time of the last change]; insertion ordered
+
+    def __len__(self):
+        return len(self._pending)
+
+    def touch(self, path, now):
+        """Note that a file appeared or was written to"""
+        if path.lower().endswith(PARTIAL_DOWNLOAD_SUFFIXES):
+            return
+        state = self._pending.get(path)
+        if state is None:
+            self._pending[path] = [-1, -1, now]
+        else:
+            state[2] = now
+
+    def next_deadline(self):
+        """Monotonic time at which the oldest pending file is due for a check"""
+        if not self._pending:
+            return None
+        return min(state[2] for state in self._pending.values()) + self.settle_seconds
+
+    def ready(self, now, limit=WATCH_BATCH_LIMIT):
+        """Return up to ``limit`` PathEntry objects for files that have settled"""
+        settled = []
+        for path, state in list(self._pending.items()):
+            if now - state[2] < self.settle_seconds:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+            if (st.st_size, st.st_mtime_ns) != (state[0], state[1]):
+                state[0], state[1], state[2] = st.st_size, st.st_mtime_ns, now
+                continue
+            del self._pending[path]
+            if stat.S_ISREG(st.st_mode):
+                settled.append(PathEntry(path, st))
+                if len(settled) >= limit:
+                    break
+        return settled
+
+
+class SourceWatcher:
+    """Keep a source folder sorted by organizing files as they arrive.
+
+    Starts with one full organize pass, then feeds settled new files to the
+    same Organizer in batches, so the work per event depends on the change
+    and never on the size of the folder. All batches of a session share one
+    journal, which makes the whole session revertable as a single run.
+    ``on_results`` is called with the results of every batch; their
+    "metrics" cover the session so far.
+    """
+
+    TICK = 0.5  # Longest wait between checks, which bounds how long stop() takes
+
+    def __init__(self, source_folder, destination_folder, options, category_index=None, on_batch=None,
+                 on_results=None, settle_seconds=WATCH_SETTLE_SECONDS, force_polling=False):
+        self.source_folder = source_folder
+        self.destination_folder = destination_folder
+        self.options = options
+        self.on_results = on_results or (lambda results: None)
+        self.settle_seconds = settle_seconds
+        self.force_polling = force_polling
+        self.should_stop = False
+        self.journal = None
+        if not options.get("dry_run", False):
+            self.journal = MoveJournal.create(source_folder, destination_folder)
+        self.organizer = Organizer(source_folder, destination_folder, options, category_index, on_batch,
+                                   journal=self.journal)
+        self.organizer.metrics.kind = "watch"
+        self.organizer.keep_indexes = True
+
+    def stop(self):
+        self.should_stop = True
+        self.organizer.stop()
+
+    def is_excluded(self, path):
+        """Never watch the category folders files are moved into"""
+        parent, name = os.path.split(path)
+        if os.path.normcase(parent) != os.path.normcase(self.destination_folder):
+            return False
+        return name == "duplicates" or name in self.organizer.category_folders
+
+    def run(self):
+        """Watch until stop() is called; returns the combined results of the session"""
+        session = None
+        backend = None
+        try:
+            backend = make_watch_backend(self.source_folder, self.options.get("recursive", True),
+                                         self.is_excluded, self.force_polling)
+            session = self.organizer.organize_files()
+            self.on_results(session)
+            session["batches"] = 1
+            tracker = SettleTracker(self.settle_seconds)
+
+            while not self.should_stop:
+                deadline = tracker.next_deadline()
+                timeout = self.TICK if deadline is None else min(self.TICK, max(deadline - time.monotonic(), 0))
+                now = time.monotonic()
+                for path in backend.changes(timeout):
+                    tracker.touch(path, now)
+
+                batch = tracker.ready(time.monotonic())
+                if not batch or self.should_stop:
+                    continue
+                logging.info(f"Watch: sorting {len(batch)} new files ({len(tracker)} still settling)")
+                results = self.organizer.organize_files(batch)
+                self.merge_results(session, results)
+                # The organizer's metrics cover every batch of the session
+                results["metrics"] = session["metrics"] = self.organizer.metrics.as_dict(session)
+                self.on_results(results)
+        finally:
+            if backend is not None:
+                backend.close()
+            self.organizer.close_indexes()
+            if self.journal is not None:
+                self.journal.close()
+        return session
+
+    @staticmethod
+    def merge_results(session, results):
+        for key, value in results.items():
+            if isinstance(value, bool) or key == "journal":
+                continue
+            if isinstance(value, int):
+                session[key] += value
+            elif isinstance(value, set):
+                session[key] |= value
+            elif isinstance(value, list):
+                session[key].extend(value)
+        session["batches"] += 1
+
+
+# -----------------------------
+# BATCH JOBS
+# -----------------------------
+BATCH_JOB_STATES = ("queued", "running", "done", "stopped", "failed")
+# Counters summed over the jobs of a batch
+BATCH_COUNTERS = ("total_files", "processed", "skipped", "errors", "cancelled", "renamed", "bytes_copied",
+                  "dirs_unchanged", "sniffed")
+
+
+def _paths_overlap(a, b):
+    """True if two normalized absolute paths are the same folder or one contains the other"""
+    return a == b or a.startswith(b.rstrip(os.sep) + os.sep) or b.startswith(a.rstrip(os.sep) + os.sep)
+
+
+class BatchJob:
+    """One source -> destination pair of a batch, with its own status, progress and results"""
+
+    def __init__(self, source_folder, destination_folder=None, options=None):
+        self.source_folder = os.path.abspath(source_folder)
+        self.destination_folder = os.path.abspath(destination_folder or source_folder)
+        self.options = options or {}  # Overrides the batch options for this job
+        self.index = None
+        self.status = "queued"
+        self.progress = None  # Last (current, total) reported
+        self.results = None
+        self.error = None
+        self.organizer = None
+
+    def summary(self):
+        """Small per-job record for the batch results"""
+        summary = {
+            "index": self.index,
+            "source": self.source_folder,
+            "destination": self.destination_folder,
+            "status": self.status,
+            "error": self.error
+        }
+        if self.results is not None:
+            for key in BATCH_COUNTERS:
+                summary[key] = self.results.get(key, 0)
+            summary["categories_created"] = sorted(self.results.get("categories_created", ()))
+        return summary
+
+
+class BatchRunner:
+    """Run several organize jobs concurrently under one global I/O limit.
+
+    Up to ``max_jobs`` jobs scan and plan at the same time, each with its
+    own Organizer, while every file move of every job needs a slot of one
+    IOScheduler with ``io_slots`` slots, handed out round-robin across the
+    jobs. Jobs whose folders overlap (the same destination, or a source
+    inside another job's folders) run one after another in a lane, since
+    their name indexes and scans would otherwise race each other.
+
+    All jobs write to one journal, so the batch reverts as a single run,
+    and share the hash and sniff caches. ``on_job_batch(job, statuses,
+    progress)`` relays each job's coalesced updates; ``on_job_done(job)``
+    is called as every job finishes, fails or is skipped after a stop.
+    """
+
+    def __init__(self, jobs, options, category_index=None, io_slots=4, max_jobs=4, on_job_batch=None,
+                 on_job_done=None):
+        self.jobs = list(jobs)
+        for index, job in enumerate(self.jobs):
+            job.index = index
+        self.options = options
+        self.category_index = category_index or CategoryIndex(get_config_manager().config["categories"])
+        self.scheduler = IOScheduler(io_slots)
+        self.max_jobs = max(1, int(max_jobs))
+        self.on_job_batch = on_job_batch or (lambda job, statuses, progress: None)
+        self.on_job_done = on_job_done or (lambda job: None)
+        self.should_stop = False
+        self.journal = None
+        self.hash_cache = None
+        self.sniff_cache = None
+        self.metrics = RunMetrics("batch")
+
+    def stop(self):
+        self.should_stop = True
+        for job in self.jobs:
+            if job.organizer is not None:
+                job.organizer.stop()
+
+    def lanes(self):
+        """Group the jobs into lanes of overlapping folders, keeping each lane in job order"""
+        lanes = []  # (normalized folders, jobs)
+        for job in self.jobs:
+            folders = {os.path.normcase(job.source_folder), os.path.normcase(job.destination_folder)}
+            merged = [lane for lane in lanes
+                      if any(_paths_overlap(a, b) for a in lane[0] for b in folders)]
+            for lane in merged:
+                lanes.remove(lane)
+                folders |= lane[0]
+            lanes.append((folders, sorted((j for lane in merged for j in lane[1]), key=lambda j: j.index) + [job]))
+        return [jobs for _, jobs in sorted(lanes, key=lambda lane: lane[1][0].index)]
+
+    def run(self):
+        """Run every job; returns the combined results with a summary per job under "jobs\""""
+        from concurrent.futures import ThreadPoolExecutor
+
+        started = time.perf_counter()
+        job_options = [dict(self.options, **job.options) for job in self.jobs]
+        if not self.options.get("dry_run", False):
+            self.journal = MoveJournal.create([job.source_folder for job in self.jobs],
+                                              [job.destination_folder for job in self.jobs])
+        if any(options.get("skip_duplicates", True) for options in job_options):
+            self.hash_cache = HashCache()
+        if any(options.get("content_sniffing", "off") != "off" for options in job_options):
+            self.sniff_cache = SniffCache()
+
+        lanes = self.lanes()
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.max_jobs, len(lanes)) or 1,
+                                    thread_name_prefix="FileSortJob") as pool:
+                for future in [pool.submit(self.run_lane, lane) for lane in lanes]:
+                    future.result()
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+            for cache in (self.hash_cache, self.sniff_cache):
+                if cache is not None:
+                    cache.close()
+            self.metrics.wall_seconds += time.perf_counter() - started
+        return self.combine_results()
+
+    def run_lane(self, lane):
+        for job in lane:
+            if self.should_stop:
+                job.status = "stopped"
+                self.on_job_done(job)
+                continue
+            self.run_job(job)
+
+    def run_job(self, job):
+        """Organize one job's source on the calling thread"""
+        job.status = "running"
+        logging.info(f"Batch job {job.index + 1}: {job.source_folder} -> {job.destination_folder}")
+
+        def deliver(statuses, progress):
+            if progress is not None:
+                job.progress = progress
+            self.on_job_batch(job, statuses, progress)
+
+        try:
+            if not os.path.isdir(job.source_folder):
+                raise FileNotFoundError(f"Source folder does not exist: {job.source_folder}")
+            job.organizer = Organizer(job.source_folder, job.destination_folder, dict(self.options, **job.options),
+                                      self.category_index, deliver, journal=self.journal,
+                                      scheduler=self.scheduler, hash_cache=self.hash_cache,
+                                      sniff_cache=self.sniff_cache)
+            if self.should_stop:
+                job.organizer.stop()  # stop() came in while the organizer was being set up
+            job.results = job.organizer.organize_files()
+            job.status = "stopped" if job.organizer.should_stop else "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logging.error(f"Batch job {job.index + 1} failed: {e}")
+        self.on_job_done(job)
+
+    def combine_results(self):
+        results = dict.fromkeys(BATCH_COUNTERS, 0)
+        results.update({
+            "jobs": [],
+            "categories_created": set(),
+            "errors_list": [],
+            "journal": self.journal.path if self.journal is not None else None,
+            "dry_run": self.options.get("dry_run", False),
+            "stopped": self.should_stop
+        })
+        for job in self.jobs:
+            results["jobs"].append(job.summary())
+            if job.results is None:
+                if job.error is not None:
+                    results["errors"] += 1
+                    results["errors_list"].append(f"{job.source_folder}: {job.error}")
+                continue
+            for key in BATCH_COUNTERS:
+                results[key] += job.results.get(key, 0)
+            results["categories_created"] |= job.results["categories_created"]
+            results["errors_list"].extend(job.results["errors_list"])
+            self.metrics.merge(job.organizer.metrics)
+        results["metrics"] = self.metrics.as_dict(results)
+        return results
@@ -0,0 +1,116 @@
+"""
+FileSort Pro logging pipeline.
+
+Log calls only put the record on a queue. A QueueListener thread formats
+the records and writes them through a buffered file handler, flushing
+whenever the queue runs empty (and at once for warnings and errors), so
+the organizer never waits on formatting or disk writes.
+
+Records are formatted as text or, for log shippers, as JSON lines.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+from datetime import datetime
+
+
+LOG_BUFFER_SIZE = 64 * 1024
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_FORMATS = ("text", "json")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format each record as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Queue records without formatting them on the logging thread.
+
+    The stock QueueHandler formats the message before queueing it; here the
+    message and its arguments travel as they are and the listener formats
+    them. Arguments must therefore not be mutated after the call, which
+    holds for the paths and numbers FileSort logs.
+    """
+
+    def prepare(self, record):
+        if record.exc_info:
+            # Tracebacks hold frames that must not outlive the call
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """File handler that writes through a large buffer and leaves flushing to the listener"""
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE, encoding=self.encoding,
+                    errors=getattr(self, "errors", None))
+
+    def emit(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.WARNING:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+class FlushingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes its handlers whenever the queue runs empty"""
+
+    def dequeue(self, block):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            # Idle: push buffered lines out, so the file is current for the Logs tab
+            for handler in self.handlers:
+                handler.flush()
+            return self.queue.get(block)
+
+    def stop(self):
+        if self._thread is None:
+            return  # Already stopped, e.g. by the front-end before the atexit hook
+        super().stop()
+        for handler in self.handlers:
+            handler.flush()
+
+
+def start_logging(log_file, level="INFO", log_format="text", console=True):
+    """Route the root logger through a queue to a buffered log file (and the console); returns the listener"""
+    formatter = JsonLinesFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [BufferedFileHandler(log_file, encoding="utf-8")]
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    root_logger.handlers.clear()
+    root_logger.setLevel(getattr(logging, level, logging.INFO))
+    root_logger.addHandler(LazyQueueHandler(log_queue))
+
+    listener = FlushingQueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener